@@ -64,42 +64,7 @@ export default function TPCCConcurrentPage() {
         body: JSON.stringify({
           transaction_types: transactionMix === "mixed" ? transactionTypes : [transactionMix],
           concurrency: clientCount,
-          duration: testDuration,
-          params: {
-            NEW_ORDER: {
-              w_id: 1,
-              d_id: 1,
-              c_id: 1,
-              items: Array.from({ length: Math.floor(Math.random() * 11) + 5 }, () => ({
-                i_id: Math.floor(Math.random() * 100) + 1,
-                quantity: Math.floor(Math.random() * 10) + 1
-              }))
-            },
-            PAYMENT: {
-              w_id: 1,
-              d_id: 1,
-              c_id: Math.floor(Math.random() * 100) + 1,
-              amount: Number((Math.random() * 5000).toFixed(2)),
-              payment_date: new Date().toISOString()
-            },
-            DELIVERY: {
-              w_id: 1,
-              d_id: 1,
-              o_id: Math.floor(Math.random() * 100) + 1,
-              carrier_id: Math.floor(Math.random() * 10) + 1,
-              delivery_date: new Date().toISOString()
-            },
-            ORDER_STATUS: {
-              w_id: 1,
-              d_id: 1,
-              c_id: 1
-            },
-            STOCK_LEVEL: {
-              w_id: 1,
-              d_id: 1,
-              threshold: 10
-            }
-          }
+          duration: testDuration
         })
       })
 
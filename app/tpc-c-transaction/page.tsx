@@ -132,31 +132,12 @@ export default function TPCCTransactionPage() {
 
       // 根据事务类型添加特定字段
       if (selectedTransaction === "NEW_ORDER") {
-        // 获取当前最大订单ID
-        const maxOrderResponse = await fetch("http://localhost:8000/api/tpcc/max-order-id", {
-          method: "POST",
-          headers: {
-            "Content-Type": "application/json",
-          },
-          body: JSON.stringify({
-            w_id: requestBody.w_id,
-            d_id: requestBody.d_id
-          }),
-        })
-
-        if (!maxOrderResponse.ok) {
-          throw new Error("获取最大订单ID失败")
-        }
-
-        const maxOrderData = await maxOrderResponse.json()
-        const nextOrderId = maxOrderData.data.max_order_id + 1
-
         // 修改请求体格式，确保与后端 API 定义一致
         requestBody = {
           w_id: parseInt(warehouseId.replace("WH-", "")),
           d_id: 1,
           c_id: parseInt(customerId),
-          o_id: nextOrderId,
+          // 订单ID由服务端通过 d_next_o_id 分配
           items: selectedItems.map(item => ({
             i_id: item.i_id,
             quantity: item.quantity
@@ -173,6 +154,7 @@ export default function TPCCTransactionPage() {
         }
       } else if (selectedTransaction === "STOCK_LEVEL") {
         requestBody.threshold = 10
+        requestBody.detailed = true // 页面展示每个商品的库存明细
       }
 
       console.log('发送请求:', {
@@ -10,7 +10,7 @@ VALUES
 -- 插入区域数据
 INSERT INTO tpcc_district (d_id, d_w_id, d_name, d_street_1, d_street_2, d_city, d_state, d_zip, d_tax, d_ytd, d_next_o_id)
 VALUES 
-(1, 1, '区域1', '街道1', '街道2', '城市1', 'ST', '123456789', 0.1, 100000.00, 1),
+(1, 1, '区域1', '街道1', '街道2', '城市1', 'ST', '123456789', 0.1, 100000.00, 2),
 (2, 1, '区域2', '街道3', '街道4', '城市1', 'ST', '123456789', 0.1, 100000.00, 1),
 (1, 2, '区域1', '街道1', '街道2', '城市2', 'ST', '987654321', 0.1, 100000.00, 1),
 (2, 2, '区域2', '街道3', '街道4', '城市2', 'ST', '987654321', 0.1, 100000.00, 1);
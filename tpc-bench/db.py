@@ -0,0 +1,159 @@
+"""
+数据库连接池管理
+整个服务在应用生命周期内共享一个 asyncpg 连接池（TPC-H 与 TPC-C 路由共用）
+"""
+import os
+import json
+import asyncio
+import asyncpg
+from datetime import datetime
+from typing import Dict, Optional
+
+from logs import get_logger
+from statements import PLAN_CACHE_MODE, STATEMENTS, PreparedConnection
+
+log = get_logger("db")
+
+# 连接池参数（可通过环境变量调整）
+POOL_MIN_SIZE = int(os.getenv("TPC_POOL_MIN_SIZE", "4"))
+POOL_MAX_SIZE = int(os.getenv("TPC_POOL_MAX_SIZE", "32"))
+# 空闲连接最长保留时间（秒），超过后由 asyncpg 自动关闭
+POOL_MAX_INACTIVE_LIFETIME = float(os.getenv("TPC_POOL_MAX_INACTIVE_LIFETIME", "300"))
+# 后台健康检查间隔（秒），0 表示关闭
+POOL_HEALTH_CHECK_INTERVAL = float(os.getenv("TPC_POOL_HEALTH_CHECK_INTERVAL", "30"))
+POOL_HEALTH_CHECK_TIMEOUT = float(os.getenv("TPC_POOL_HEALTH_CHECK_TIMEOUT", "5"))
+
+# 全局共享连接池
+pool: Optional[asyncpg.Pool] = None
+_pool_lock: Optional[asyncio.Lock] = None
+_health_task: Optional[asyncio.Task] = None
+_health_status: Dict = {"healthy": None, "lastCheck": None, "error": None}
+
+# 读取数据库配置
+def get_db_config() -> Dict:
+    try:
+        with open("config/database.json", "r") as f:
+            config = json.load(f)
+            return {
+                "user": config["username"],
+                "password": config["password"],
+                "database": config["database"],
+                "host": config["host"],
+                "port": config["port"]
+            }
+    except:
+        # 如果配置文件不存在，使用默认配置
+        return {
+            "user": "tpc_user",
+            "password": "tpc_password",
+            "database": "tpc_db",
+            "host": "localhost",
+            "port": 5432
+        }
+
+def get_db_url() -> str:
+    """以 DSN 形式返回数据库配置"""
+    config = get_db_config()
+    return f"postgresql://{config['user']}:{config['password']}@{config['host']}:{config['port']}/{config['database']}"
+
+async def _warm_up(new_pool: asyncpg.Pool, count: int) -> None:
+    """预热：同时占用 count 个连接并执行一次往返，确保连接全部建立完成"""
+    async def ping():
+        async with new_pool.acquire() as conn:
+            await conn.fetchval("SELECT 1")
+
+    await asyncio.gather(*(ping() for _ in range(count)))
+
+async def check_pool_health() -> Dict:
+    """对连接池执行一次健康检查"""
+    loop = asyncio.get_event_loop()
+    if pool is None:
+        _health_status.update(healthy=False, error="连接池未初始化")
+        return dict(_health_status)
+    try:
+        start = loop.time()
+        async with pool.acquire(timeout=POOL_HEALTH_CHECK_TIMEOUT) as conn:
+            await conn.fetchval("SELECT 1", timeout=POOL_HEALTH_CHECK_TIMEOUT)
+        _health_status.update(
+            healthy=True,
+            error=None,
+            latency=(loop.time() - start) * 1000
+        )
+    except Exception as e:
+        _health_status.update(healthy=False, error=str(e))
+    _health_status["lastCheck"] = datetime.now().isoformat()
+    return dict(_health_status)
+
+async def _health_check_loop() -> None:
+    while True:
+        await asyncio.sleep(POOL_HEALTH_CHECK_INTERVAL)
+        status = await check_pool_health()
+        if not status["healthy"]:
+            log.warning("pool.health_check_failed", error=status["error"])
+
+def get_pool_stats() -> Dict:
+    """返回连接池使用情况"""
+    if pool is None:
+        return {"initialized": False}
+    return {
+        "initialized": True,
+        "minSize": pool.get_min_size(),
+        "maxSize": pool.get_max_size(),
+        "size": pool.get_size(),
+        "idle": pool.get_idle_size(),
+        "health": dict(_health_status),
+        "preparedStatements": len(STATEMENTS.statements),
+        "planCacheMode": PLAN_CACHE_MODE
+    }
+
+async def init_pool(
+    min_size: int = POOL_MIN_SIZE,
+    max_size: int = POOL_MAX_SIZE
+) -> asyncpg.Pool:
+    """创建并预热共享连接池（幂等）"""
+    global pool, _health_task, _pool_lock
+    if _pool_lock is None:
+        _pool_lock = asyncio.Lock()
+    async with _pool_lock:
+        if pool is not None:
+            return pool
+        server_settings = {"search_path": "tpc, public"}
+        if PLAN_CACHE_MODE != "auto":
+            server_settings["plan_cache_mode"] = PLAN_CACHE_MODE
+        new_pool = await asyncpg.create_pool(
+            **get_db_config(),
+            min_size=min_size,
+            max_size=max(min_size, max_size),
+            max_inactive_connection_lifetime=POOL_MAX_INACTIVE_LIFETIME,
+            server_settings=server_settings,
+            # 每个新连接建立时准备全部已注册的语句，执行时命中连接的语句缓存
+            connection_class=PreparedConnection,
+            statement_cache_size=STATEMENTS.statement_cache_size(),
+            init=STATEMENTS.prepare_all
+        )
+        await _warm_up(new_pool, min_size)
+        pool = new_pool
+        await check_pool_health()
+        if POOL_HEALTH_CHECK_INTERVAL > 0:
+            _health_task = asyncio.create_task(_health_check_loop())
+        return pool
+
+async def close_pool() -> None:
+    """关闭共享连接池"""
+    global pool, _health_task
+    if _health_task is not None:
+        _health_task.cancel()
+        try:
+            await _health_task
+        except asyncio.CancelledError:
+            pass
+        _health_task = None
+    if pool is not None:
+        await pool.close()
+        pool = None
+
+async def get_pool() -> asyncpg.Pool:
+    """获取共享连接池，未初始化时按默认参数创建"""
+    if pool is None:
+        return await init_pool()
+    return pool
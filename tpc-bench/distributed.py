@@ -0,0 +1,275 @@
+"""
+分布式负载驱动
+单台客户端机器无法压满数据库时，由协调者（并发测试接口）把负载分配给多台机器上的驱动代理。
+协调者与代理之间使用 TCP 上的 JSON 行协议：
+
+    协调者 -> 代理  {"type": "prepare", "token": "...", "workload": "tpcc" | "tpch", "args": [...], "poolSize": n, "interval": 秒}
+    代理 -> 协调者  {"type": "ready"}                      连接池建好、预热完成
+    协调者 -> 代理  {"type": "start"}                      全部代理就绪后同时发出（启动屏障）
+    代理 -> 协调者  {"type": "interval", "stats": {...}}   按间隔发送区间统计（可合并）
+    代理 -> 协调者  {"type": "result", "result": {...}}    运行结束，累计统计和其他结果
+    代理 -> 协调者  {"type": "error", "error": "..."}
+
+代理执行与多进程负载相同的子负载（TPC-C 终端或 TPC-H 查询流），统计以直方图状态传回并在协调者合并。
+代理只执行携带共享令牌（TPC_AGENT_TOKEN）的负载，默认只监听 127.0.0.1。
+启动代理：TPC_AGENT_TOKEN=... python distributed.py agent --host 0.0.0.0 --port 9101（同一台机器可以启动多个代理）。
+"""
+import os
+import hmac
+import json
+import asyncio
+import argparse
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from db import POOL_MAX_SIZE, close_pool, init_pool
+from loadgen import ProcessTarget, StatsRecorder
+from logs import error_type, get_logger
+from metrics import RunStats
+from streaming import ProgressStream
+
+log = get_logger("distributed")
+
+DEFAULT_AGENT_PORT = int(os.getenv("TPC_AGENT_PORT", "9101"))
+DEFAULT_AGENT_HOST = os.getenv("TPC_AGENT_HOST", "127.0.0.1")
+# 协调者与代理的共享令牌，代理拒绝令牌不一致的负载
+AGENT_TOKEN = os.getenv("TPC_AGENT_TOKEN", "")
+# 等待全部代理建好连接池的最长时间（秒）
+AGENT_START_TIMEOUT = float(os.getenv("TPC_AGENT_START_TIMEOUT", "60"))
+# 单条消息的最大长度（统计状态中只包含非空桶，通常只有几十 KB）
+MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+
+def _workload(name: str) -> ProcessTarget:
+    """代理可执行的子负载，参数与多进程负载的子进程相同"""
+    if name == "tpcc":
+        from tpcc.api import run_terminal_process
+        return run_terminal_process
+    if name == "tpch":
+        from main import run_query_process
+        return run_query_process
+    raise ValueError(f"不支持的负载类型: {name}")
+
+def _state_types() -> Dict[str, Any]:
+    from tpcc.delivery import DeliveryQueue
+    return {"RunStats": RunStats, "DeliveryQueue": DeliveryQueue}
+
+def encode_result(result: Dict) -> Dict:
+    """将结果中的统计对象转换为可 JSON 序列化的状态"""
+    encoded = {}
+    for key, value in result.items():
+        if hasattr(value, "to_state"):
+            value = {"$type": type(value).__name__, "state": value.to_state()}
+        encoded[key] = value
+    return encoded
+
+def decode_result(result: Dict) -> Dict:
+    types = _state_types()
+    decoded = {}
+    for key, value in result.items():
+        if isinstance(value, dict) and "$type" in value:
+            value = types[value["$type"]].from_state(value["state"])
+        decoded[key] = value
+    return decoded
+
+async def send_message(writer: asyncio.StreamWriter, message: Dict) -> None:
+    writer.write(json.dumps(message, ensure_ascii=False, default=str).encode() + b"\n")
+    await writer.drain()
+
+async def read_message(reader: asyncio.StreamReader) -> Optional[Dict]:
+    """读取一条消息，连接关闭时返回 None"""
+    line = await reader.readline()
+    if not line:
+        return None
+    return json.loads(line)
+
+class _IntervalSender:
+    """StatsRecorder 的区间统计发送端：编码后写入连接"""
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+
+    def put(self, stats: RunStats) -> None:
+        message = {"type": "interval", "stats": stats.to_state()}
+        self.writer.write(json.dumps(message).encode() + b"\n")
+
+class DriverAgent:
+    """驱动代理：每次连接执行一次子负载，同一时间只执行一个"""
+
+    def __init__(self, token: str):
+        if not token:
+            raise ValueError("驱动代理必须配置共享令牌（TPC_AGENT_TOKEN 或 --token）")
+        self.token = token
+        self.busy = False
+        self.runs = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        peer = writer.get_extra_info("peername")
+        try:
+            message = await read_message(reader)
+            if message is None:
+                return
+            if message.get("type") != "prepare":
+                await send_message(writer, {"type": "error", "error": f"未知消息: {message.get('type')}"})
+                return
+            if not hmac.compare_digest(str(message.get("token", "")).encode(), self.token.encode()):
+                log.warning("agent_unauthorized", peer=str(peer))
+                await send_message(writer, {"type": "error", "error": "令牌无效"})
+                return
+            if self.busy:
+                await send_message(writer, {"type": "error", "error": "代理正在执行其他负载"})
+                return
+            self.busy = True
+            try:
+                await self._run(message, reader, writer)
+            finally:
+                self.busy = False
+        except Exception as e:
+            log.error("agent_run_failed", exc=e, peer=str(peer))
+            try:
+                await send_message(writer, {"type": "error", "error": str(e), "errorType": error_type(e)})
+            except Exception:
+                pass
+        finally:
+            writer.close()
+
+    async def _run(self, prepare: Dict, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        target = _workload(prepare["workload"])
+        pool_size = max(1, min(prepare["poolSize"], POOL_MAX_SIZE))
+        interval = prepare.get("interval", 0)
+        pool = await init_pool(min_size=pool_size, max_size=pool_size)
+        try:
+            await send_message(writer, {"type": "ready"})
+            message = await read_message(reader)
+            if message is None or message.get("type") != "start":
+                # 其他代理未能就绪，协调者取消了本次运行
+                return
+
+            self.runs += 1
+            log.info("agent_run_started", workload=prepare["workload"], poolSize=pool_size)
+            # 协调者不需要流式输出时只在结束时返回累计统计
+            recorder = StatsRecorder(_IntervalSender(writer) if interval > 0 else None, interval)
+            publisher = asyncio.create_task(recorder.publish()) if interval > 0 else None
+            run = asyncio.create_task(target(pool, recorder, *prepare["args"]))
+            # 协调者断开连接时停止负载
+            disconnected = asyncio.create_task(reader.read())
+            try:
+                await asyncio.wait({run, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                if publisher is not None:
+                    publisher.cancel()
+                disconnected.cancel()
+            if not run.done():
+                run.cancel()
+                log.warning("agent_run_cancelled")
+                return
+            result = run.result()
+            recorder.flush()
+            result["stats"] = recorder.total
+            await send_message(writer, {"type": "result", "result": encode_result(result)})
+        finally:
+            await close_pool()
+
+async def serve_agent(host: str, port: int, token: str = AGENT_TOKEN) -> None:
+    agent = DriverAgent(token)
+    server = await asyncio.start_server(agent.handle, host, port, limit=MAX_MESSAGE_SIZE)
+    log.info("agent_listening", host=host, port=port)
+    async with server:
+        await server.serve_forever()
+
+def parse_address(address: str) -> Tuple[str, int]:
+    """地址格式为 host:port，省略端口时使用默认端口"""
+    host, _, port = address.rpartition(":")
+    if not host:
+        return address, DEFAULT_AGENT_PORT
+    return host, int(port)
+
+async def _expect(reader: asyncio.StreamReader, agent: str, expected: str) -> Dict:
+    message = await read_message(reader)
+    if message is None:
+        raise ConnectionError(f"代理 {agent} 断开连接")
+    if message["type"] == "error":
+        raise RuntimeError(f"代理 {agent}: {message['error']}")
+    if message["type"] != expected:
+        raise RuntimeError(f"代理 {agent} 返回了意外的消息: {message['type']}")
+    return message
+
+async def _collect(reader: asyncio.StreamReader, agent: str, progress: Optional[ProgressStream]) -> Dict:
+    while True:
+        message = await read_message(reader)
+        if message is None:
+            raise ConnectionError(f"代理 {agent} 断开连接")
+        if message["type"] == "interval":
+            if progress is not None:
+                progress.merge(RunStats.from_state(message["stats"]))
+        elif message["type"] == "result":
+            return decode_result(message["result"])
+        else:
+            raise RuntimeError(f"代理 {agent}: {message.get('error', message['type'])}")
+
+async def run_on_agents(
+    agents: Sequence[str],
+    workload: str,
+    args_list: Sequence[Tuple],
+    pool_sizes: Sequence[int],
+    progress: Optional[ProgressStream] = None,
+    token: str = AGENT_TOKEN
+) -> List[Dict]:
+    """
+    在各代理上执行子负载 workload(*args)：全部代理就绪后同时开始，
+    运行期间将区间统计合并到 progress，返回各代理的结果（其中 "stats" 为该代理的 RunStats）
+    """
+    if not token:
+        raise ValueError("使用驱动代理需要配置共享令牌 TPC_AGENT_TOKEN")
+    connections = []
+    try:
+        for agent in agents:
+            host, port = parse_address(agent)
+            connections.append(await asyncio.open_connection(host, port, limit=MAX_MESSAGE_SIZE))
+
+        interval = progress.interval if progress is not None else 0
+        for (_, writer), args, pool_size in zip(connections, args_list, pool_sizes):
+            await send_message(writer, {
+                "type": "prepare",
+                "token": token,
+                "workload": workload,
+                "args": list(args),
+                "poolSize": pool_size,
+                "interval": interval
+            })
+
+        # 启动屏障：全部代理建好连接池后再同时开始
+        await asyncio.wait_for(
+            asyncio.gather(*(_expect(reader, agent, "ready") for (reader, _), agent in zip(connections, agents))),
+            AGENT_START_TIMEOUT
+        )
+        for _, writer in connections:
+            await send_message(writer, {"type": "start"})
+
+        return await asyncio.gather(*(
+            _collect(reader, agent, progress) for (reader, _), agent in zip(connections, agents)
+        ))
+    finally:
+        for _, writer in connections:
+            writer.close()
+
+def warehouse_ranges(warehouses: int, agents: int) -> List[Tuple[int, int]]:
+    """将仓库 1..warehouses 划分为 agents 个连续区间"""
+    if agents > warehouses:
+        raise ValueError(f"代理数 {agents} 超过仓库数 {warehouses}")
+    return [(k * warehouses // agents + 1, (k + 1) * warehouses // agents) for k in range(agents)]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="分布式负载驱动代理")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    agent_parser = subparsers.add_parser("agent", help="启动驱动代理")
+    agent_parser.add_argument("--host", default=DEFAULT_AGENT_HOST, help="监听地址，其他机器访问时需指定对外地址或 0.0.0.0")
+    agent_parser.add_argument("--port", type=int, default=DEFAULT_AGENT_PORT)
+    agent_parser.add_argument("--token", default=AGENT_TOKEN, help="共享令牌，默认取 TPC_AGENT_TOKEN")
+    args = parser.parse_args()
+
+    if args.command == "agent":
+        if not args.token:
+            parser.error("驱动代理必须配置共享令牌（TPC_AGENT_TOKEN 或 --token）")
+        asyncio.run(serve_agent(args.host, args.port, args.token))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+闭环负载驱动
+N 个相互独立的 worker，每个 worker 在上一次操作完成后立即发起下一次操作，
+不存在批次之间的同步屏障
+"""
+import asyncio
+import random
+from typing import Awaitable, Callable, Dict, Optional
+
+# 单次思考时间的上限（相对均值的倍数），与 TPC-C 规范对负指数分布的截断一致
+THINK_TIME_CAP = 10
+
+def sample_think_time(mean: float) -> float:
+    """按负指数分布采样思考时间（秒）"""
+    if mean <= 0:
+        return 0
+    return min(random.expovariate(1 / mean), mean * THINK_TIME_CAP)
+
+async def run_closed_loop(
+    operation: Callable[[int, int], Awaitable[Dict]],
+    concurrency: int,
+    duration: float,
+    think_time: float = 0,
+    ramp_up: float = 0,
+    on_result: Optional[Callable[[Dict, bool], None]] = None
+) -> float:
+    """
+    运行闭环负载
+    operation(worker_id, iteration) 执行一次操作并返回结果；
+    前 ramp_up 秒内各 worker 依次错峰启动，之后的 duration 秒为测量区间。
+    每个结果通过 on_result(result, measured) 回调，measured 表示该操作是否在测量区间内发起。
+    返回测量区间的实际时长（秒，包含区间结束时仍在执行的操作）。
+    """
+    loop = asyncio.get_event_loop()
+    start = loop.time()
+    measure_start = start + ramp_up
+    measure_end = measure_start + duration
+
+    async def worker(worker_id: int):
+        # 预热阶段错峰启动
+        if ramp_up > 0:
+            await asyncio.sleep(ramp_up * worker_id / concurrency)
+
+        iteration = 0
+        while True:
+            op_start = loop.time()
+            if op_start >= measure_end:
+                break
+
+            result = await operation(worker_id, iteration)
+            iteration += 1
+            if on_result is not None:
+                on_result(result, op_start >= measure_start)
+
+            if think_time > 0:
+                remaining = measure_end - loop.time()
+                if remaining <= 0:
+                    break
+                await asyncio.sleep(min(sample_think_time(think_time), remaining))
+
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return max(loop.time() - measure_start, 0)
@@ -0,0 +1,145 @@
+"""
+多进程负载生成
+将 worker（TPC-C 终端或 TPC-H 查询流）分配给多个子进程，每个子进程有自己的事件循环和连接池，
+避免结果解码、记录构造等 Python 端开销集中在服务 HTTP 的单个事件循环上。
+子进程建好连接池后在屏障处等待，全部就绪后同时开始；统计（计数和延迟直方图）在父进程中合并。
+流式输出时子进程按间隔发送区间统计，由父进程合并到 ProgressStream。
+"""
+import os
+import queue
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from db import POOL_MAX_SIZE, close_pool, init_pool
+from metrics import RunStats
+from streaming import ProgressStream
+
+# 等待全部子进程建好连接池的最长时间（秒）
+PROCESS_START_TIMEOUT = float(os.getenv("TPC_PROCESS_START_TIMEOUT", "60"))
+
+# 子进程中执行的负载：target(pool, recorder, *args) 返回可 pickle 的字典
+ProcessTarget = Callable[..., Awaitable[Dict]]
+
+def split_workers(count: int, processes: int) -> List[List[int]]:
+    """将 worker 编号 0..count-1 轮流分配给各进程（进程数不超过 worker 数）"""
+    processes = max(1, min(processes, count))
+    return [list(range(p, count, processes)) for p in range(processes)]
+
+class StatsRecorder:
+    """子进程内的统计：累计统计随结果返回，区间统计按间隔发送给父进程"""
+
+    def __init__(self, progress_queue=None, interval: float = 1.0):
+        self.total = RunStats()
+        self.current = RunStats()
+        self.progress_queue = progress_queue
+        self.interval = interval
+
+    def record(self, key: str, success: bool, elapsed: float, error: Optional[str] = None) -> None:
+        self.total.record(key, success, elapsed, error)
+        if self.progress_queue is not None:
+            self.current.record(key, success, elapsed, error)
+
+    def flush(self) -> None:
+        if self.progress_queue is not None and self.current.overall.total:
+            interval_stats, self.current = self.current, RunStats()
+            self.progress_queue.put(interval_stats)
+
+    async def publish(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            self.flush()
+
+async def _run_process(
+    target: ProcessTarget,
+    args: Tuple,
+    pool_size: int,
+    barrier,
+    progress_queue,
+    interval: float
+) -> Dict:
+    loop = asyncio.get_event_loop()
+    try:
+        pool = await init_pool(min_size=pool_size, max_size=pool_size)
+    except Exception:
+        # 让其他子进程不再等待
+        barrier.abort()
+        raise
+    try:
+        await loop.run_in_executor(None, barrier.wait, PROCESS_START_TIMEOUT)
+        recorder = StatsRecorder(progress_queue, interval)
+        publisher = asyncio.create_task(recorder.publish()) if progress_queue is not None else None
+        try:
+            result = await target(pool, recorder, *args)
+        finally:
+            if publisher is not None:
+                publisher.cancel()
+        recorder.flush()
+        result["stats"] = recorder.total
+        return result
+    finally:
+        await close_pool()
+
+def _process_main(target: ProcessTarget, args: Tuple, pool_size: int, barrier, progress_queue, interval: float) -> Dict:
+    """子进程入口"""
+    return asyncio.run(_run_process(target, args, pool_size, barrier, progress_queue, interval))
+
+def _relay(progress_queue, progress: ProgressStream, loop: asyncio.AbstractEventLoop, stop: threading.Event) -> None:
+    """在线程中读取子进程发送的区间统计，合并到 progress（在事件循环中执行）"""
+    while True:
+        try:
+            stats = progress_queue.get(timeout=0.1)
+        except queue.Empty:
+            if stop.is_set():
+                return
+            continue
+        loop.call_soon_threadsafe(progress.merge, stats)
+
+async def run_processes(
+    target: ProcessTarget,
+    args_list: Sequence[Tuple],
+    pool_sizes: Sequence[int],
+    progress: Optional[ProgressStream] = None
+) -> List[Dict]:
+    """
+    在 len(args_list) 个子进程中执行 target(pool, recorder, *args)，
+    每个子进程的连接池大小由 pool_sizes 给出（不超过 TPC_POOL_MAX_SIZE）。
+    返回各子进程的结果（其中 "stats" 为该进程的 RunStats）
+    """
+    loop = asyncio.get_event_loop()
+    ctx = multiprocessing.get_context("spawn")
+    processes = len(args_list)
+    manager = await loop.run_in_executor(None, ctx.Manager)
+    try:
+        barrier = manager.Barrier(processes)
+        progress_queue = manager.Queue() if progress is not None else None
+        interval = progress.interval if progress is not None else 0
+        stop = threading.Event()
+        relay = None
+        if progress is not None:
+            relay = loop.run_in_executor(None, _relay, progress_queue, progress, loop, stop)
+
+        executor = ProcessPoolExecutor(max_workers=processes, mp_context=ctx)
+        try:
+            return await asyncio.gather(*(
+                loop.run_in_executor(
+                    executor, _process_main, target, args, min(size, POOL_MAX_SIZE), barrier, progress_queue, interval
+                )
+                for args, size in zip(args_list, pool_sizes)
+            ))
+        finally:
+            stop.set()
+            if relay is not None:
+                await relay
+            await loop.run_in_executor(None, executor.shutdown)
+    finally:
+        await loop.run_in_executor(None, manager.shutdown)
+
+def merge_results(results: List[Dict]) -> Tuple[RunStats, float]:
+    """合并各子进程的统计，测量时长取各进程中最长的"""
+    stats = RunStats()
+    for result in results:
+        stats.merge(result["stats"])
+    return stats, max((result["totalTime"] for result in results), default=0)
@@ -0,0 +1,196 @@
+"""
+结构化日志
+事件以 JSON 行输出：调用方只把日志记录放入有界队列（不格式化、不阻塞，队列满时丢弃并计数），
+由后台线程的 QueueListener 负责格式化异常堆栈和写出，避免 stdout/stderr 的 I/O 阻塞事件循环。
+级别低于 TPC_LOG_LEVEL 的事件在调用处直接返回；同一事件的同类错误按时间窗口采样，
+被抑制的次数在下一条输出中给出，各类错误的总次数始终计数。
+"""
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from collections import Counter
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, Tuple
+
+# 日志级别（DEBUG 时输出事务级的调试事件）
+LOG_LEVEL = os.getenv("TPC_LOG_LEVEL", "INFO").upper()
+# 日志队列的最大长度，队列满时丢弃
+LOG_QUEUE_SIZE = int(os.getenv("TPC_LOG_QUEUE_SIZE", "10000"))
+# 每个采样窗口内同一事件、同类错误最多输出的条数
+ERROR_SAMPLE_BURST = int(os.getenv("TPC_LOG_ERROR_BURST", "5"))
+# 错误采样窗口（秒）
+ERROR_SAMPLE_INTERVAL = float(os.getenv("TPC_LOG_ERROR_INTERVAL", "10"))
+
+ROOT_LOGGER = "tpc"
+
+def error_type(exc: BaseException) -> str:
+    """错误类型名（asyncpg 的异常类与 SQLSTATE 一一对应，如 DeadlockDetectedError）"""
+    return type(exc).__name__
+
+class JsonFormatter(logging.Formatter):
+    """将日志记录格式化为一行 JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        event = {
+            "time": datetime.fromtimestamp(record.created).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage()
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            event.update(fields)
+        if record.exc_info:
+            event["traceback"] = self.formatException(record.exc_info)
+        return json.dumps(event, ensure_ascii=False, default=str)
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """只入队不格式化（格式化在监听线程中进行），队列满时丢弃"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class ErrorSampler:
+    """按 (事件, 错误类型) 在时间窗口内限制输出条数，并统计各类错误的次数"""
+
+    def __init__(self, burst: int = ERROR_SAMPLE_BURST, interval: float = ERROR_SAMPLE_INTERVAL):
+        self.burst = burst
+        self.interval = interval
+        self.counts: Counter = Counter()
+        # (事件, 错误类型) -> [窗口开始时间, 窗口内次数, 被抑制的次数]
+        self._windows: Dict[Tuple[str, str], list] = {}
+        self._lock = threading.Lock()
+
+    def sample(self, event: str, kind: str) -> Optional[int]:
+        """返回 None 表示本次不输出，否则返回此前被抑制的次数"""
+        now = time.monotonic()
+        with self._lock:
+            self.counts[kind] += 1
+            window = self._windows.get((event, kind))
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window is not None else 0
+                self._windows[(event, kind)] = [now, 1, 0]
+                return suppressed
+            window[1] += 1
+            if window[1] <= self.burst:
+                return 0
+            window[2] += 1
+            return None
+
+    def suppressed(self) -> int:
+        with self._lock:
+            return sum(window[2] for window in self._windows.values())
+
+ERROR_SAMPLER = ErrorSampler()
+
+_handler: Optional[_NonBlockingQueueHandler] = None
+_listener: Optional[QueueListener] = None
+_setup_lock = threading.Lock()
+
+def setup_logging(level: str = LOG_LEVEL) -> None:
+    """配置 tpc.* 日志：队列处理器 + 后台线程写出到 stderr（幂等）"""
+    global _handler, _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+        log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        stream_handler = logging.StreamHandler(sys.stderr)
+        stream_handler.setFormatter(JsonFormatter())
+        _handler = _NonBlockingQueueHandler(log_queue)
+        _listener = QueueListener(log_queue, stream_handler)
+
+        logger = logging.getLogger(ROOT_LOGGER)
+        logger.setLevel(level)
+        logger.addHandler(_handler)
+        logger.propagate = False
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+def shutdown_logging() -> None:
+    """写出队列中剩余的日志并停止后台线程"""
+    global _handler, _listener
+    with _setup_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        logging.getLogger(ROOT_LOGGER).removeHandler(_handler)
+        _listener = None
+
+class EventLogger:
+    """结构化事件日志：log.info("事件名", 字段=值, ...)"""
+
+    __slots__ = ("logger",)
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+
+    def enabled(self, level: int) -> bool:
+        return self.logger.isEnabledFor(level)
+
+    @property
+    def debug_enabled(self) -> bool:
+        """调用方在构造调试字段之前先判断，关闭时不产生任何开销"""
+        return self.logger.isEnabledFor(logging.DEBUG)
+
+    def _log(self, level: int, event: str, fields: Dict, exc: Optional[BaseException] = None) -> None:
+        exc_info = (type(exc), exc, exc.__traceback__) if exc is not None else None
+        self.logger.log(level, event, exc_info=exc_info, extra={"fields": fields})
+
+    def debug(self, event: str, **fields) -> None:
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self._log(logging.DEBUG, event, fields)
+
+    def info(self, event: str, **fields) -> None:
+        if self.logger.isEnabledFor(logging.INFO):
+            self._log(logging.INFO, event, fields)
+
+    def warning(self, event: str, exc: Optional[BaseException] = None, **fields) -> None:
+        if self.logger.isEnabledFor(logging.WARNING):
+            if exc is not None:
+                fields["error"] = str(exc)
+                fields["errorType"] = error_type(exc)
+            self._log(logging.WARNING, event, fields, exc)
+
+    def error(self, event: str, exc: Optional[BaseException] = None, **fields) -> None:
+        """
+        记录错误：始终计入错误类型计数；同一事件的同类错误按窗口采样输出，
+        输出时附带此前被抑制的次数
+        """
+        kind = error_type(exc) if exc is not None else event
+        suppressed = ERROR_SAMPLER.sample(event, kind)
+        if suppressed is None or not self.logger.isEnabledFor(logging.ERROR):
+            return
+        if exc is not None:
+            fields["error"] = str(exc)
+            fields["errorType"] = kind
+        if suppressed:
+            fields["suppressed"] = suppressed
+        self._log(logging.ERROR, event, fields, exc)
+
+def get_logger(name: str) -> EventLogger:
+    setup_logging()
+    return EventLogger(logging.getLogger(f"{ROOT_LOGGER}.{name}"))
+
+def get_log_stats() -> Dict:
+    return {
+        "level": logging.getLevelName(logging.getLogger(ROOT_LOGGER).getEffectiveLevel()),
+        "errors": dict(ERROR_SAMPLER.counts),
+        "suppressed": ERROR_SAMPLER.suppressed(),
+        "dropped": _handler.dropped if _handler is not None else 0
+    }
@@ -0,0 +1,221 @@
+"""
+运行统计
+只保存固定大小的计数和延迟直方图，不保留单个结果，适合长时间运行的并发测试
+"""
+import math
+from typing import Dict, List, Optional
+
+# 输出的延迟百分位
+PERCENTILES = [("p50", 50.0), ("p90", 90.0), ("p95", 95.0), ("p99", 99.0), ("p99.9", 99.9)]
+
+class LatencyHistogram:
+    """
+    固定内存、可合并的对数分桶延迟直方图（HDR 风格）
+    桶宽按 1 + PRECISION 的比例递增，因此任意百分位的相对误差不超过 PRECISION；
+    单位为毫秒，覆盖 MIN_VALUE 到 MAX_VALUE，超出范围的值计入两端的桶。
+    """
+
+    MIN_VALUE = 0.001  # 1 微秒
+    MAX_VALUE = 3600000.0  # 1 小时
+    PRECISION = 0.01
+    _LOG_BASE = math.log1p(PRECISION)
+    BUCKET_COUNT = int(math.log(MAX_VALUE / MIN_VALUE) / _LOG_BASE) + 2
+
+    __slots__ = ("counts", "count", "min", "max")
+
+    def __init__(self):
+        self.counts: List[int] = [0] * self.BUCKET_COUNT
+        self.count = 0
+        self.min = None
+        self.max = 0.0
+
+    @classmethod
+    def _index(cls, value: float) -> int:
+        if value <= cls.MIN_VALUE:
+            return 0
+        index = int(math.log(value / cls.MIN_VALUE) / cls._LOG_BASE) + 1
+        return min(index, cls.BUCKET_COUNT - 1)
+
+    @classmethod
+    def _value(cls, index: int) -> float:
+        """桶的代表值（桶上下界的几何中点）"""
+        if index == 0:
+            return cls.MIN_VALUE
+        return cls.MIN_VALUE * math.exp((index - 0.5) * cls._LOG_BASE)
+
+    def record(self, value: float) -> None:
+        self.counts[self._index(value)] += 1
+        self.count += 1
+        if self.min is None or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        counts = self.counts
+        for i, c in enumerate(other.counts):
+            if c:
+                counts[i] += c
+        self.count += other.count
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        self.max = max(self.max, other.max)
+
+    def to_state(self) -> Dict:
+        """可 JSON 序列化的完整状态（只包含非空桶），用于跨节点合并"""
+        return {
+            "buckets": [[i, c] for i, c in enumerate(self.counts) if c],
+            "count": self.count,
+            "min": self.min,
+            "max": self.max
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> "LatencyHistogram":
+        histogram = cls()
+        for i, c in state["buckets"]:
+            histogram.counts[i] = c
+        histogram.count = state["count"]
+        histogram.min = state["min"]
+        histogram.max = state["max"]
+        return histogram
+
+    def percentile(self, p: float) -> float:
+        if self.count == 0:
+            return 0
+        target = max(1, math.ceil(self.count * p / 100))
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= target:
+                # 代表值限制在实际观测到的最小值和最大值之间
+                return min(max(self._value(i), self.min), self.max)
+        return self.max
+
+    def percentiles(self) -> Dict:
+        """一次遍历计算全部输出百分位"""
+        result = {name: 0 for name, _ in PERCENTILES}
+        result["max"] = self.max
+        if self.count == 0:
+            return result
+        targets = [(name, max(1, math.ceil(self.count * p / 100))) for name, p in PERCENTILES]
+        seen = 0
+        t = 0
+        for i, c in enumerate(self.counts):
+            if not c:
+                continue
+            seen += c
+            while t < len(targets) and seen >= targets[t][1]:
+                result[targets[t][0]] = min(max(self._value(i), self.min), self.max)
+                t += 1
+            if t == len(targets):
+                break
+        return result
+
+class OperationStats:
+    """单一类别（查询或事务类型）的计数"""
+
+    __slots__ = ("total", "successful", "failed", "total_time", "histogram", "errors")
+
+    def __init__(self):
+        self.total = 0
+        self.successful = 0
+        self.failed = 0
+        self.total_time = 0.0
+        # 仅记录成功操作的延迟
+        self.histogram = LatencyHistogram()
+        # 失败按错误类型计数
+        self.errors: Dict[str, int] = {}
+
+    def record(self, success: bool, elapsed: float, error: Optional[str] = None) -> None:
+        self.total += 1
+        if not success:
+            self.failed += 1
+            error = error or "Unknown"
+            self.errors[error] = self.errors.get(error, 0) + 1
+            return
+        self.successful += 1
+        self.total_time += elapsed
+        self.histogram.record(elapsed)
+
+    def merge(self, other: "OperationStats") -> None:
+        self.total += other.total
+        self.successful += other.successful
+        self.failed += other.failed
+        self.total_time += other.total_time
+        self.histogram.merge(other.histogram)
+        for error, count in other.errors.items():
+            self.errors[error] = self.errors.get(error, 0) + count
+
+    def to_state(self) -> Dict:
+        return {
+            "total": self.total,
+            "successful": self.successful,
+            "failed": self.failed,
+            "totalTime": self.total_time,
+            "histogram": self.histogram.to_state(),
+            "errors": dict(self.errors)
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> "OperationStats":
+        stats = cls()
+        stats.total = state["total"]
+        stats.successful = state["successful"]
+        stats.failed = state["failed"]
+        stats.total_time = state["totalTime"]
+        stats.histogram = LatencyHistogram.from_state(state["histogram"])
+        stats.errors = dict(state["errors"])
+        return stats
+
+    def to_dict(self, duration: float) -> Dict:
+        return {
+            "total": self.total,
+            "successful": self.successful,
+            "failed": self.failed,
+            "avgResponseTime": self.total_time / self.successful if self.successful else 0,
+            "minResponseTime": self.histogram.min or 0,
+            "maxResponseTime": self.histogram.max,
+            "percentiles": self.histogram.percentiles(),
+            "throughput": self.successful / duration if duration > 0 else 0,
+            "errorRate": self.failed / self.total * 100 if self.total else 0,
+            "errors": dict(self.errors)
+        }
+
+class RunStats:
+    """整次运行的统计：总体计数加上按类别（queryId / transaction_type）的计数"""
+
+    def __init__(self):
+        self.overall = OperationStats()
+        self.by_key: Dict[str, OperationStats] = {}
+
+    def record(self, key: str, success: bool, elapsed: float, error: Optional[str] = None) -> None:
+        self.overall.record(success, elapsed, error)
+        stats = self.by_key.get(key)
+        if stats is None:
+            stats = self.by_key[key] = OperationStats()
+        stats.record(success, elapsed, error)
+
+    def merge(self, other: "RunStats") -> None:
+        self.overall.merge(other.overall)
+        for key, stats in other.by_key.items():
+            self.by_key.setdefault(key, OperationStats()).merge(stats)
+
+    def to_state(self) -> Dict:
+        return {
+            "overall": self.overall.to_state(),
+            "byKey": {key: stats.to_state() for key, stats in self.by_key.items()}
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> "RunStats":
+        stats = cls()
+        stats.overall = OperationStats.from_state(state["overall"])
+        stats.by_key = {key: OperationStats.from_state(s) for key, s in state["byKey"].items()}
+        return stats
+
+    def to_dict(self, duration: float) -> Dict:
+        summary = self.overall.to_dict(duration)
+        summary["duration"] = duration
+        summary["byKey"] = {key: stats.to_dict(duration) for key, stats in self.by_key.items()}
+        return summary
@@ -0,0 +1,157 @@
+"""
+服务端预备语句注册表
+TPC-H 查询和 TPC-C 事务使用的 SQL 在此按名称注册，连接池创建每个连接时（init 钩子）
+在该连接上一次性准备全部语句，执行时按 SQL 文本命中 asyncpg 的连接级语句缓存，不再重复解析。
+缓存容量按注册的语句数设置（见 statement_cache_size），注册的语句不会被 LRU 淘汰。
+同时按语句分别统计准备耗时和执行耗时。
+"""
+import os
+import asyncio
+import asyncpg
+from typing import Dict, List, Optional, Set
+
+from logs import get_logger
+
+log = get_logger("statements")
+
+# 是否在连接初始化时预先准备全部语句（关闭时首次使用时再准备）
+PREPARE_ON_CONNECT = os.getenv("TPC_PREPARE_ON_CONNECT", "1") not in ("0", "false", "False")
+
+# 除注册的语句外，连接的语句缓存为其他查询（刷新函数、临时查询等）保留的容量
+STATEMENT_CACHE_EXTRA = int(os.getenv("TPC_STATEMENT_CACHE_EXTRA", "100"))
+
+# PostgreSQL (12+) 的 plan_cache_mode：
+#   auto                 前 5 次使用定制计划，之后若通用计划代价不高于定制计划则改用通用计划
+#   force_generic_plan   始终使用通用计划（只在首次执行时规划一次）
+#   force_custom_plan    每次执行都按实际参数重新规划
+PLAN_CACHE_MODES = ("auto", "force_generic_plan", "force_custom_plan")
+PLAN_CACHE_MODE = os.getenv("TPC_PLAN_CACHE_MODE", "auto")
+if PLAN_CACHE_MODE not in PLAN_CACHE_MODES:
+    raise ValueError(f"TPC_PLAN_CACHE_MODE 必须为 {', '.join(PLAN_CACHE_MODES)} 之一: {PLAN_CACHE_MODE}")
+
+class PreparedConnection(asyncpg.Connection):
+    """记录该连接上已准备（已进入语句缓存）的语句名称"""
+
+    __slots__ = ("prepared_statements",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared_statements: Set[str] = set()
+
+class StatementStats:
+    """单条语句的准备与执行耗时统计（毫秒）"""
+
+    __slots__ = ("prepares", "prepare_time", "prepare_errors", "executions", "execute_time", "failures", "last_error")
+
+    def __init__(self):
+        self.prepares = 0
+        self.prepare_time = 0.0
+        self.prepare_errors = 0
+        self.executions = 0
+        self.execute_time = 0.0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        return {
+            "prepares": self.prepares,
+            "prepareErrors": self.prepare_errors,
+            "avgPrepareTime": self.prepare_time / self.prepares if self.prepares else 0,
+            "executions": self.executions,
+            "failures": self.failures,
+            "avgExecuteTime": self.execute_time / self.executions if self.executions else 0,
+            "lastError": self.last_error
+        }
+
+class StatementRegistry:
+    """按名称注册的预备语句"""
+
+    def __init__(self):
+        self.statements: Dict[str, str] = {}
+        self.stats: Dict[str, StatementStats] = {}
+
+    def register(self, name: str, sql: str) -> str:
+        """注册一条语句并返回其名称（重复注册相同 SQL 时保持不变）"""
+        existing = self.statements.get(name)
+        if existing is not None and existing != sql:
+            raise ValueError(f"语句名称已被其他 SQL 使用: {name}")
+        self.statements[name] = sql
+        self.stats.setdefault(name, StatementStats())
+        return name
+
+    def statement_cache_size(self) -> int:
+        """连接池的 statement_cache_size：容纳全部注册的语句和其他查询"""
+        return len(self.statements) + STATEMENT_CACHE_EXTRA
+
+    async def _prepare(self, conn, name: str) -> None:
+        """在连接上准备语句，只有准备本身计入准备耗时"""
+        sql = self.statements[name]
+        stats = self.stats[name]
+        loop = asyncio.get_event_loop()
+        start = loop.time()
+        try:
+            # 服务端 Parse/Describe：语法错误、表或列不存在等在此失败
+            await conn.prepare(sql)
+        except Exception as e:
+            stats.prepare_errors += 1
+            stats.last_error = str(e)
+            raise
+        stats.prepares += 1
+        stats.prepare_time += (loop.time() - start) * 1000
+        # prepare() 返回的语句不进入 asyncpg 的语句缓存，且连接归还连接池后即不可再用；
+        # 以空参数列表的 executemany 将语句放入缓存（只 Parse，不执行），之后的执行直接命中缓存
+        await conn.executemany(sql, [])
+        conn.prepared_statements.add(name)
+
+    async def prepare_all(self, conn) -> None:
+        """
+        连接池的 init 钩子：在新连接上准备全部语句
+        表尚未创建等原因导致准备失败的语句记录日志后跳过，首次使用时再准备
+        """
+        if not PREPARE_ON_CONNECT:
+            return
+        for name in list(self.statements):
+            try:
+                await self._prepare(conn, name)
+            except asyncpg.PostgresError as e:
+                log.warning("statement.prepare_failed", statement=name, error=str(e))
+
+    async def _run(self, conn, name: str, method: str, args, timeout: Optional[float]):
+        if name not in conn.prepared_statements:
+            # 连接初始化时未准备（关闭了预先准备或当时准备失败），执行前先准备
+            await self._prepare(conn, name)
+        stats = self.stats[name]
+        loop = asyncio.get_event_loop()
+        start = loop.time()
+        try:
+            result = await getattr(conn, method)(self.statements[name], *args, timeout=timeout)
+        except Exception as e:
+            stats.failures += 1
+            stats.last_error = str(e)
+            raise
+        stats.executions += 1
+        stats.execute_time += (loop.time() - start) * 1000
+        return result
+
+    async def fetch(self, conn, name: str, *args, timeout: Optional[float] = None) -> List[asyncpg.Record]:
+        return await self._run(conn, name, "fetch", args, timeout)
+
+    async def fetchrow(self, conn, name: str, *args, timeout: Optional[float] = None) -> Optional[asyncpg.Record]:
+        return await self._run(conn, name, "fetchrow", args, timeout)
+
+    async def fetchval(self, conn, name: str, *args, timeout: Optional[float] = None):
+        return await self._run(conn, name, "fetchval", args, timeout)
+
+    async def execute(self, conn, name: str, *args, timeout: Optional[float] = None) -> str:
+        """执行不返回结果的语句，返回命令状态（如 "UPDATE 1"）"""
+        return await self._run(conn, name, "execute", args, timeout)
+
+    def get_stats(self) -> Dict:
+        return {
+            "prepareOnConnect": PREPARE_ON_CONNECT,
+            "planCacheMode": PLAN_CACHE_MODE,
+            "statements": {name: stats.to_dict() for name, stats in self.stats.items()}
+        }
+
+# 全局语句注册表
+STATEMENTS = StatementRegistry()
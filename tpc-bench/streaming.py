@@ -0,0 +1,123 @@
+"""
+并发测试的流式进度输出
+运行期间按固定间隔输出区间统计（以及可选的单次操作记录），格式为 NDJSON 或 Server-Sent Events。
+内存中只保留固定大小的统计和一个有界的记录队列。
+"""
+import asyncio
+import json
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from fastapi.responses import StreamingResponse
+
+from metrics import RunStats
+
+STREAM_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream"
+}
+
+# 待发送记录队列上限，客户端读取过慢时多余的记录会被丢弃并计数
+MAX_PENDING_RECORDS = 10000
+
+def _encode(event: Dict, fmt: str) -> str:
+    payload = json.dumps(event, default=str, ensure_ascii=False)
+    if fmt == "sse":
+        return f"event: {event['type']}\ndata: {payload}\n\n"
+    return payload + "\n"
+
+class ProgressStream:
+    """收集运行中的结果并生成流式事件"""
+
+    def __init__(self, interval: float = 1.0, include_records: bool = False):
+        self.interval = max(interval, 0.1)
+        self.include_records = include_records
+        self.total = RunStats()
+        self.current = RunStats()
+        self.dropped_records = 0
+        self._records: asyncio.Queue = asyncio.Queue(maxsize=MAX_PENDING_RECORDS)
+
+    def record(
+        self,
+        key: str,
+        success: bool,
+        elapsed: float,
+        record: Optional[Dict] = None,
+        error: Optional[str] = None
+    ) -> None:
+        """记录一次操作结果（在负载驱动的回调中调用），error 为失败时的错误类型"""
+        self.total.record(key, success, elapsed, error)
+        self.current.record(key, success, elapsed, error)
+        if self.include_records and record is not None:
+            try:
+                self._records.put_nowait(record)
+            except asyncio.QueueFull:
+                self.dropped_records += 1
+
+    def merge(self, stats: RunStats) -> None:
+        """合并其他进程发来的区间统计"""
+        self.total.merge(stats)
+        self.current.merge(stats)
+
+    async def events(self, run: Awaitable[Dict]) -> AsyncIterator[Dict]:
+        """执行 run 并在执行过程中依次产出事件，最后产出 run 返回的汇总"""
+        loop = asyncio.get_event_loop()
+        task = asyncio.ensure_future(run)
+        started = loop.time()
+        interval_start = started
+        seq = 0
+        try:
+            while not task.done():
+                next_tick = interval_start + self.interval
+                while True:
+                    timeout = next_tick - loop.time()
+                    if timeout <= 0 or task.done():
+                        break
+                    try:
+                        record = await asyncio.wait_for(self._records.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                    yield {"type": "record", **record}
+
+                now = loop.time()
+                seq += 1
+                interval_stats, self.current = self.current, RunStats()
+                yield {
+                    "type": "interval",
+                    "seq": seq,
+                    "elapsed": now - started,
+                    "interval": interval_stats.to_dict(now - interval_start),
+                    "cumulative": self.total.to_dict(now - started),
+                    "droppedRecords": self.dropped_records
+                }
+                interval_start = now
+
+            while not self._records.empty():
+                yield {"type": "record", **self._records.get_nowait()}
+            yield {"type": "summary", **task.result()}
+        except Exception as e:
+            yield {"type": "error", "success": False, "error": str(e)}
+        finally:
+            if not task.done():
+                task.cancel()
+
+def streaming_response(
+    run_factory: Callable[[ProgressStream], Awaitable[Dict]],
+    fmt: str,
+    interval: float = 1.0,
+    include_records: bool = False
+) -> StreamingResponse:
+    """
+    创建流式响应
+    run_factory(progress) 返回执行测试的协程，测试过程中应调用 progress.record()
+    """
+    progress = ProgressStream(interval, include_records)
+
+    async def body():
+        async for event in progress.events(run_factory(progress)):
+            yield _encode(event, fmt)
+
+    return StreamingResponse(
+        body(),
+        media_type=STREAM_FORMATS[fmt],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
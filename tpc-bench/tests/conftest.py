@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# 服务代码以 tpc-bench 为根目录导入（from metrics import ...）
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from tpch.benchmark import TPCHBenchmark
+from tpch.queries import QueryRegistry
+
+class FakeConnection:
+    def __init__(self, orders):
+        self.orders = orders
+
+    async def fetch(self, sql, keys):
+        return [{"o_orderkey": key} for key in keys if key in self.orders]
+
+class FakePool:
+    def __init__(self, orders):
+        self.conn = FakeConnection(orders)
+
+    def acquire(self):
+        pool = self
+
+        class Acquire:
+            async def __aenter__(self):
+                return pool.conn
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return Acquire()
+
+@pytest.fixture
+def update_dir(tmp_path):
+    # 更新集 1、2 为 dbgen 直接生成的单个文件，更新集 3 按 -i/-d 拆分
+    for update_set, insert_key, delete_key in [(1, 9, 1), (2, 33, 2)]:
+        (tmp_path / f"orders.tbl.u{update_set}").write_text(f"{insert_key}|1|O|\n")
+        (tmp_path / f"delete.{update_set}").write_text(f"{delete_key}|\n")
+    (tmp_path / "orders.tbl.u3.1").write_text("65|1|O|\n")
+    (tmp_path / "delete.u3.1").write_text("3|\n")
+    return tmp_path
+
+def benchmark(orders, update_dir):
+    return TPCHBenchmark(FakePool(orders), QueryRegistry(), None, scale_factor=1, update_dir=update_dir)
+
+def test_reserve_skips_used_update_sets(update_dir):
+    # 更新集 1 的 RF1 已执行（订单 9 已插入），更新集 2 的 RF2 已执行（订单 2 已删除）
+    bench = benchmark({1, 3, 9}, update_dir)
+    assert asyncio.run(bench.reserve_update_sets(1)) == [3]
+    assert bench._take_update_set() == 3
+    with pytest.raises(RuntimeError):
+        bench._take_update_set()
+
+def test_reserve_fails_instead_of_reusing_update_sets(update_dir):
+    bench = benchmark({1, 2, 3}, update_dir)
+    assert asyncio.run(bench.reserve_update_sets(3)) == [1, 2, 3]
+    with pytest.raises(ValueError, match="需要 4 个，剩余 3 个"):
+        asyncio.run(bench.reserve_update_sets(4))
+
+def test_run_checks_update_sets_before_starting(update_dir):
+    bench = benchmark({1, 2, 3}, update_dir)
+    # Power 测试 1 对 + Throughput 测试 3 个查询流各 1 对
+    with pytest.raises(ValueError):
+        asyncio.run(bench.run("full", streams=3))
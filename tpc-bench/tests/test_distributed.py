@@ -0,0 +1,38 @@
+import asyncio
+
+import pytest
+
+from distributed import DriverAgent, read_message, run_on_agents, send_message, warehouse_ranges
+
+async def prepare_with(token):
+    agent = DriverAgent("secret")
+    server = await asyncio.start_server(agent.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        message = {"type": "prepare", "workload": "tpcc", "args": [], "poolSize": 1, "interval": 0}
+        if token is not None:
+            message["token"] = token
+        await send_message(writer, message)
+        reply = await read_message(reader)
+        writer.close()
+    return reply, agent
+
+@pytest.mark.parametrize("token", [None, "", "wrong"])
+def test_agent_rejects_missing_or_wrong_token(token):
+    reply, agent = asyncio.run(prepare_with(token))
+    assert reply == {"type": "error", "error": "令牌无效"}
+    assert agent.runs == 0 and not agent.busy
+
+def test_agent_requires_a_token():
+    with pytest.raises(ValueError):
+        DriverAgent("")
+
+def test_coordinator_requires_a_token():
+    with pytest.raises(ValueError):
+        asyncio.run(run_on_agents(["127.0.0.1:1"], "tpcc", [()], [1], token=""))
+
+def test_warehouse_ranges():
+    assert warehouse_ranges(10, 3) == [(1, 3), (4, 6), (7, 10)]
+    with pytest.raises(ValueError):
+        warehouse_ranges(2, 3)
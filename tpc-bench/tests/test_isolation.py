@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+from tpcc.isolation import (
+    DEFAULT_ISOLATION, TRANSACTION_TYPES, RetryPolicy, is_retryable, load_default_isolation,
+    parse_isolation, resolve_isolation
+)
+
+class FakePostgresError(Exception):
+    def __init__(self, sqlstate):
+        super().__init__(sqlstate)
+        self.sqlstate = sqlstate
+
+@pytest.mark.parametrize("level, expected", [
+    ("READ COMMITTED", "read_committed"),
+    ("repeatable_read", "repeatable_read"),
+    (" Serializable ", "serializable"),
+    ("repeatable-read", "repeatable_read"),
+])
+def test_parse_isolation(level, expected):
+    assert parse_isolation(level) == expected
+
+def test_parse_isolation_rejects_unknown_levels():
+    with pytest.raises(ValueError):
+        parse_isolation("READ UNCOMMITTED")
+
+def test_default_isolation_from_environment():
+    assert load_default_isolation({}) == {t: "read_committed" for t in TRANSACTION_TYPES}
+    isolation = load_default_isolation({
+        "TPCC_ISOLATION": "repeatable read",
+        "TPCC_ISOLATION_PAYMENT": "SERIALIZABLE",
+        # 空值时使用全局设置
+        "TPCC_ISOLATION_DELIVERY": ""
+    })
+    assert isolation["PAYMENT"] == "serializable"
+    assert isolation["DELIVERY"] == "repeatable_read"
+    assert isolation["NEW_ORDER"] == "repeatable_read"
+    with pytest.raises(ValueError):
+        load_default_isolation({"TPCC_ISOLATION_NEW_ORDER": "snapshot"})
+
+def test_resolve_isolation_applies_overrides():
+    isolation = resolve_isolation({"STOCK_LEVEL": "serializable"})
+    assert isolation["STOCK_LEVEL"] == "serializable"
+    assert {t: v for t, v in isolation.items() if t != "STOCK_LEVEL"} == {
+        t: v for t, v in DEFAULT_ISOLATION.items() if t != "STOCK_LEVEL"
+    }
+    assert resolve_isolation(None) == DEFAULT_ISOLATION
+    with pytest.raises(ValueError):
+        resolve_isolation({"REFUND": "serializable"})
+
+def test_is_retryable_follows_cause():
+    assert is_retryable(FakePostgresError("40001"))
+    assert is_retryable(FakePostgresError("40P01"))
+    assert not is_retryable(FakePostgresError("23505"))
+    wrapped = ValueError("数据库错误")
+    wrapped.__cause__ = FakePostgresError("40P01")
+    assert is_retryable(wrapped)
+
+@pytest.mark.parametrize("attempt, bound", [(1, 0.01), (2, 0.02), (4, 0.08), (8, 1.0), (30, 1.0)])
+def test_retry_delay_bounds(attempt, bound):
+    random.seed(attempt)
+    policy = RetryPolicy(max_retries=5, base_delay=0.01, max_delay=1.0)
+    delays = [policy.delay(attempt) for _ in range(2000)]
+    assert all(0 <= d <= bound for d in delays)
+    # 完全抖动：在整个区间内均匀分布
+    assert max(delays) > bound * 0.95
+    assert sum(delays) / len(delays) == pytest.approx(bound / 2, rel=0.1)
+
+def test_retry_policy_clamps_negative_retries():
+    assert RetryPolicy(max_retries=-1).max_retries == 0
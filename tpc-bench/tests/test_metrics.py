@@ -0,0 +1,102 @@
+import json
+import math
+import random
+
+import pytest
+
+from metrics import PERCENTILES, LatencyHistogram, OperationStats, RunStats
+
+def exact_percentile(values, p):
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(len(ordered) * p / 100)) - 1]
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_percentiles_within_bucket_precision(seed):
+    rng = random.Random(seed)
+    values = [rng.lognormvariate(2, 1.5) for _ in range(20000)]
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+
+    percentiles = histogram.percentiles()
+    for name, p in PERCENTILES:
+        expected = exact_percentile(values, p)
+        assert histogram.percentile(p) == pytest.approx(expected, rel=LatencyHistogram.PRECISION)
+        assert percentiles[name] == histogram.percentile(p)
+    assert percentiles["max"] == max(values)
+    assert histogram.min == min(values)
+
+def test_percentile_clamped_to_observed_range():
+    histogram = LatencyHistogram()
+    histogram.record(5.0)
+    assert histogram.percentile(50) == 5.0
+    assert histogram.percentile(99.9) == 5.0
+    assert LatencyHistogram().percentile(50) == 0
+
+def test_out_of_range_values_use_edge_buckets():
+    histogram = LatencyHistogram()
+    histogram.record(0)
+    histogram.record(LatencyHistogram.MAX_VALUE * 10)
+    assert histogram.counts[0] == 1
+    assert histogram.counts[-1] == 1
+    # 溢出桶的代表值约为 MAX_VALUE，实际最大值单独记录
+    assert histogram.percentile(100) == pytest.approx(LatencyHistogram.MAX_VALUE, rel=LatencyHistogram.PRECISION)
+    assert histogram.percentiles()["max"] == LatencyHistogram.MAX_VALUE * 10
+
+def test_merge_equals_recording_everything():
+    rng = random.Random(7)
+    values = [rng.uniform(0.1, 500) for _ in range(5000)]
+    combined, left, right = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for i, value in enumerate(values):
+        combined.record(value)
+        (left if i % 2 else right).record(value)
+
+    left.merge(right)
+    assert left.counts == combined.counts
+    assert (left.count, left.min, left.max) == (combined.count, combined.min, combined.max)
+    assert left.percentiles() == combined.percentiles()
+
+def build_run(seed):
+    rng = random.Random(seed)
+    stats = RunStats()
+    for _ in range(1000):
+        key = rng.choice(["NEW_ORDER", "PAYMENT", "DELIVERY"])
+        success = rng.random() > 0.05
+        stats.record(key, success, rng.uniform(1, 100), None if success else rng.choice(["DeadlockDetectedError", "Timeout"]))
+    return stats
+
+def test_run_stats_merge():
+    left, right = build_run(1), build_run(2)
+    merged = RunStats()
+    merged.merge(left)
+    merged.merge(right)
+
+    assert merged.overall.total == left.overall.total + right.overall.total
+    for key in set(left.by_key) | set(right.by_key):
+        parts = [s.by_key[key] for s in (left, right) if key in s.by_key]
+        assert merged.by_key[key].successful == sum(p.successful for p in parts)
+        assert merged.by_key[key].total_time == pytest.approx(sum(p.total_time for p in parts))
+    for error in set(left.overall.errors) | set(right.overall.errors):
+        assert merged.overall.errors[error] == left.overall.errors.get(error, 0) + right.overall.errors.get(error, 0)
+
+def test_state_round_trip_through_json():
+    stats = build_run(3)
+    restored = RunStats.from_state(json.loads(json.dumps(stats.to_state())))
+    assert restored.to_dict(60) == stats.to_dict(60)
+    assert restored.overall.histogram.counts == stats.overall.histogram.counts
+
+def test_merging_restored_states_matches_direct_merge():
+    runs = [build_run(seed) for seed in range(4)]
+    direct, via_state = RunStats(), RunStats()
+    for run in runs:
+        direct.merge(run)
+        via_state.merge(RunStats.from_state(json.loads(json.dumps(run.to_state()))))
+    assert via_state.to_dict(30) == direct.to_dict(30)
+
+def test_failed_operations_do_not_affect_latency():
+    stats = OperationStats()
+    stats.record(True, 10)
+    stats.record(False, 1000, "Timeout")
+    assert stats.histogram.count == 1
+    assert stats.to_dict(1)["maxResponseTime"] == 10
+    assert stats.errors == {"Timeout": 1}
@@ -0,0 +1,103 @@
+import random
+import re
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from tpch.queries import PARAMETER_SPECS, QUERY_IDS, QueryRegistry, Statement, _to_bind_params, parse_template
+
+@pytest.fixture(scope="module")
+def registry():
+    return QueryRegistry()
+
+def test_all_templates_parse(registry):
+    assert sorted(registry.queries, key=lambda q: int(q[1:])) == QUERY_IDS
+    for query_id, query in registry.queries.items():
+        # 绑定参数的语句中不应残留 qgen 的 :N 参数或指令（DDL 在执行时替换为字面量）
+        for statement in query.setup + [query.main] + query.teardown:
+            if statement.bind:
+                assert not re.search(r"(?<!:):[0-9a-z]\b", statement.sql), query_id
+        # Q15 的参数只出现在视图定义中
+        if query_id != "Q15":
+            assert sorted(query.main.param_order) == list(range(1, len(PARAMETER_SPECS[query_id]) + 1)), query_id
+
+def test_bind_parameter_rewriting():
+    sql, order = _to_bind_params(
+        "select * from t where d <= date '1998-12-01' - interval ':1' day (3) "
+        "and p like '%:2' and n = ':3' and x = :2 and s >= date ':4'"
+    )
+    assert order == [1, 2, 3, 4]
+    assert "($1::integer * interval '1 day')" in sql
+    assert "('%' || $2::text)" in sql
+    assert "n = $3" in sql
+    assert "x = $2" in sql
+    assert "$4::date" in sql
+
+def test_repeated_parameters_share_a_slot(registry):
+    # Q19 的数量参数 :4~:6 在模板中与品牌参数交错出现
+    statement = registry.get("Q19").main
+    assert statement.param_order == [1, 4, 2, 5, 3, 6]
+    _, params = statement.render(["b1", "b2", "b3", 1, 10, 20])
+    assert params == ["b1", 1, "b2", 10, "b3", 20]
+
+def test_q15_view_is_temporary_and_rendered_literally(registry):
+    query = registry.get("Q15")
+    assert query.multi_statement
+    assert len(query.setup) == 1 and not query.setup[0].bind
+    assert query.setup[0].sql.lower().startswith("create temporary view revenue0")
+    assert query.teardown[0].sql.lower() == "drop view revenue0"
+    sql, params = query.setup[0].render([date(1996, 1, 1)])
+    assert "1996-01-01" in sql and params == []
+
+def test_stream_number_substituted_in_view_name():
+    template = "create view revenue:s as select 1;\n:o\nselect * from revenue:s;\ndrop view revenue:s;"
+    query = parse_template("Q15", template, stream=3)
+    assert "revenue3" in query.setup[0].sql
+    assert query.main.sql == "select * from revenue3"
+
+def test_literal_render_escapes_quotes():
+    sql, _ = Statement("select ':1'", bind=False).render(["O'Brien"])
+    assert sql == "select 'O''Brien'"
+
+def test_stream_zero_order(registry):
+    assert registry.stream_order(0)[:6] == ["Q14", "Q2", "Q9", "Q20", "Q6", "Q17"]
+    for stream in range(len(registry.permutations)):
+        assert sorted(registry.stream_order(stream)) == sorted(QUERY_IDS)
+
+@pytest.mark.parametrize("seed", range(50))
+def test_generated_params_within_qgen_ranges(registry, seed):
+    rng = random.Random(seed)
+    p = {qid: registry.generate_params(qid, rng) for qid in QUERY_IDS}
+
+    assert 60 <= p["Q1"][0] <= 120
+    assert 1 <= p["Q2"][0] <= 50 and p["Q2"][1] in registry.options["p_type_s3"] and p["Q2"][2] in registry.regions
+    assert p["Q3"][0] in registry.options["msegmnt"] and date(1995, 3, 1) <= p["Q3"][1] <= date(1995, 3, 31)
+    for qid in ("Q4", "Q15"):
+        assert p[qid][0].day == 1 and date(1993, 1, 1) <= p[qid][0] <= date(1997, 10, 1)
+    assert p["Q5"][1].month == 1 and 1993 <= p["Q5"][1].year <= 1997
+    assert Decimal("0.02") <= p["Q6"][1] <= Decimal("0.09") and p["Q6"][2] in (24, 25)
+    assert p["Q7"][0] != p["Q7"][1]
+    assert registry.nation_region[p["Q8"][0]] == p["Q8"][1]
+    assert date(1993, 2, 1) <= p["Q10"][0] <= date(1995, 1, 1)
+    assert p["Q11"][1] == Decimal("0.0001") / Decimal(str(registry.scale_factor))
+    assert p["Q12"][0] != p["Q12"][1] and set(p["Q12"][:2]) <= set(registry.options["smode"])
+    assert date(1993, 1, 1) <= p["Q14"][0] <= date(1997, 12, 1)
+    assert re.fullmatch(r"Brand#[1-5][1-5]", p["Q16"][0])
+    assert len(set(p["Q16"][2:])) == 8 and all(1 <= size <= 50 for size in p["Q16"][2:])
+    assert p["Q17"][1] in registry.options["p_cntr"]
+    assert 312 <= p["Q18"][0] <= 315
+    assert 1 <= p["Q19"][3] <= 10 and 10 <= p["Q19"][4] <= 20 and 20 <= p["Q19"][5] <= 30
+    assert p["Q20"][0] in registry.options["colors"]
+    codes = [int(code) for code in p["Q22"]]
+    assert len(set(codes)) == 7 and all(10 <= code <= 34 for code in codes)
+
+def test_params_are_reproducible_for_a_seed(registry):
+    first = [registry.generate_params(qid, random.Random(42)) for qid in QUERY_IDS]
+    second = [registry.generate_params(qid, random.Random(42)) for qid in QUERY_IDS]
+    assert first == second
+
+def test_resolve_params_overrides_and_coerces(registry):
+    assert registry.resolve_params("Q1") == [90]
+    assert registry.resolve_params("Q3", {"date": "1995-03-20"}) == ["BUILDING", date(1995, 3, 20)]
+    assert registry.resolve_params("Q6", ["1995-01-01"])[0] == date(1995, 1, 1)
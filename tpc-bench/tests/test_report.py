@@ -0,0 +1,64 @@
+import pytest
+
+from metrics import RunStats
+from tpcc.report import build_tpcc_report
+
+# 每 100 个事务中各类型的次数（规范的最低比例）
+SPEC_MIX = {"NEW_ORDER": 45, "PAYMENT": 43, "ORDER_STATUS": 4, "DELIVERY": 4, "STOCK_LEVEL": 4}
+
+def run_stats(counts=SPEC_MIX, elapsed=10.0, failures=None):
+    stats = RunStats()
+    for transaction_type, count in counts.items():
+        for _ in range(count):
+            stats.record(transaction_type, True, elapsed)
+    for transaction_type, count in (failures or {}).items():
+        for _ in range(count):
+            stats.record(transaction_type, False, elapsed, "DeadlockDetectedError")
+    return stats
+
+def test_tpmc_counts_committed_new_orders_per_minute():
+    counts = {k: v * 10 for k, v in SPEC_MIX.items()}
+    report = build_tpcc_report(run_stats(counts, failures={"NEW_ORDER": 5}), 120, {"NEW_ORDER": 4})
+    # (450 个成功的新订单 - 4 个回滚) / 2 分钟，失败的新订单不计入
+    assert report["tpmC"] == pytest.approx((450 - 4) / 2)
+    assert report["newOrdersCommitted"] == 446
+    assert report["newOrderRollbackRate"] == pytest.approx(4 / 455 * 100)
+    assert report["aborts"] == 5
+    assert report["transactions"]["NEW_ORDER"]["aborted"] == 5
+    assert report["transactions"]["NEW_ORDER"]["errors"] == {"DeadlockDetectedError": 5}
+
+def test_spec_mix_passes():
+    report = build_tpcc_report(run_stats(), 60, {})
+    assert report["passed"] and report["violations"] == []
+    assert report["transactions"]["PAYMENT"]["mix"] == pytest.approx(43)
+
+def test_mix_violation():
+    counts = dict(SPEC_MIX, PAYMENT=40, NEW_ORDER=48)
+    report = build_tpcc_report(run_stats(counts), 60, {})
+    assert not report["passed"]
+    assert not report["transactions"]["PAYMENT"]["mixOk"]
+    assert report["violations"] == ["PAYMENT 比例 40.00% 低于 43.0%"]
+
+def test_response_time_violation():
+    stats = RunStats()
+    # STOCK_LEVEL 的上限为 20 秒，其他类型为 5 秒
+    for transaction_type, count in SPEC_MIX.items():
+        for _ in range(count):
+            stats.record(transaction_type, True, 6000 if transaction_type in ("PAYMENT", "STOCK_LEVEL") else 10)
+    report = build_tpcc_report(stats, 60, {})
+    assert report["transactions"]["STOCK_LEVEL"]["responseTimeOk"]
+    assert not report["transactions"]["PAYMENT"]["responseTimeOk"]
+    assert len(report["violations"]) == 1 and report["violations"][0].startswith("PAYMENT 第 90 百分位响应时间")
+
+def test_deferred_delivery_violation():
+    queue = {"completionTime": {"p90": 81000}, "drained": True}
+    report = build_tpcc_report(run_stats(), 60, {}, delivery_queue=queue)
+    assert not report["deferredDelivery"]["completionTimeOk"]
+    assert not report["passed"]
+    undrained = build_tpcc_report(run_stats(), 60, {}, delivery_queue={"completionTime": {"p90": 1}, "drained": False})
+    assert not undrained["deferredDelivery"]["completionTimeOk"]
+
+def test_empty_run_does_not_pass():
+    report = build_tpcc_report(RunStats(), 0, {})
+    assert report["tpmC"] == 0
+    assert not report["passed"]
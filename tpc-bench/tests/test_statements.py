@@ -0,0 +1,78 @@
+import asyncio
+
+import asyncpg
+import pytest
+
+from statements import StatementRegistry
+
+class FakeConnection:
+    """记录调用的假连接：prepare 耗时 10ms，执行耗时 1ms"""
+
+    def __init__(self, broken=()):
+        self.prepared_statements = set()
+        self.broken = set(broken)
+        self.calls = []
+
+    async def prepare(self, sql):
+        self.calls.append(("prepare", sql))
+        await asyncio.sleep(0.01)
+        if sql in self.broken:
+            raise asyncpg.UndefinedTableError("relation does not exist")
+
+    async def executemany(self, sql, args):
+        self.calls.append(("cache", sql))
+
+    async def fetchval(self, sql, *args, timeout=None):
+        self.calls.append(("execute", sql))
+        await asyncio.sleep(0.001)
+        return 1
+
+def registry():
+    statements = StatementRegistry()
+    statements.register("a", "select $1::integer")
+    statements.register("b", "select * from missing")
+    return statements
+
+def test_prepare_all_prepares_every_statement_on_connect():
+    statements, conn = registry(), FakeConnection()
+    asyncio.run(statements.prepare_all(conn))
+    assert conn.prepared_statements == {"a", "b"}
+    assert conn.calls == [
+        ("prepare", "select $1::integer"), ("cache", "select $1::integer"),
+        ("prepare", "select * from missing"), ("cache", "select * from missing")
+    ]
+
+def test_prepare_and_execute_times_are_separate():
+    statements, conn = registry(), FakeConnection()
+
+    async def run():
+        await statements.prepare_all(conn)
+        for _ in range(3):
+            await statements.fetchval(conn, "a", 1)
+
+    asyncio.run(run())
+    stats = statements.get_stats()["statements"]["a"]
+    assert stats["prepares"] == 1 and stats["executions"] == 3
+    assert stats["avgPrepareTime"] >= 10
+    assert stats["avgExecuteTime"] < 10
+    # 执行时不再准备
+    assert [call for call, _ in conn.calls].count("prepare") == 2
+
+def test_failed_prepare_is_retried_on_first_use():
+    statements, conn = registry(), FakeConnection(broken={"select * from missing"})
+    asyncio.run(statements.prepare_all(conn))
+    assert conn.prepared_statements == {"a"}
+    stats = statements.get_stats()["statements"]["b"]
+    assert stats["prepareErrors"] == 1 and stats["lastError"] == "relation does not exist"
+
+    with pytest.raises(asyncpg.UndefinedTableError):
+        asyncio.run(statements.fetchval(conn, "b"))
+    assert statements.get_stats()["statements"]["b"]["prepareErrors"] == 2
+    assert statements.get_stats()["statements"]["b"]["executions"] == 0
+
+def test_lazy_prepare_without_prepare_on_connect():
+    statements, conn = registry(), FakeConnection()
+    assert asyncio.run(statements.fetchval(conn, "a", 1)) == 1
+    assert [call for call, _ in conn.calls] == ["prepare", "cache", "execute"]
+    stats = statements.get_stats()["statements"]["a"]
+    assert stats["prepares"] == 1 and stats["executions"] == 1
@@ -0,0 +1,43 @@
+import re
+
+import pytest
+
+from tpcc.api import ConcurrentTestRequest
+from tpcc.distributions import SYLLABLES
+from tpcc.terminal import build_terminals
+
+def params_of(terminal, build, count=20000):
+    return [build(terminal) for _ in range(count)]
+
+def test_payment_customer_selection_rates():
+    terminal = build_terminals(1, warehouses=5, seed=1)[0]
+    params = params_of(terminal, lambda t: t.payment_params())
+    by_last_name = sum(1 for p in params if p.get("c_last")) / len(params)
+    remote = sum(1 for p in params if p["c_w_id"] != p["w_id"]) / len(params)
+    assert by_last_name == pytest.approx(0.6, abs=0.02)
+    assert remote == pytest.approx(0.15, abs=0.02)
+    for p in params:
+        # 按姓氏或按ID二选一
+        assert (p["c_id"] is None) != (p.get("c_last") is None)
+        if p["c_w_id"] == p["w_id"]:
+            assert p["c_d_id"] == p["d_id"]
+        assert 1 <= p["c_w_id"] <= 5 and 1 <= p["c_d_id"] <= 10
+
+def test_single_warehouse_payments_are_local():
+    terminal = build_terminals(1, warehouses=1, seed=1)[0]
+    assert all(p["c_w_id"] == 1 for p in params_of(terminal, lambda t: t.payment_params(), 2000))
+
+def test_order_status_customer_selection():
+    terminal = build_terminals(1, warehouses=2, seed=2)[0]
+    params = params_of(terminal, lambda t: t.order_status_params())
+    by_last_name = [p["c_last"] for p in params if "c_last" in p]
+    assert len(by_last_name) / len(params) == pytest.approx(0.6, abs=0.02)
+    assert all("c_id" not in p and p["w_id"] == terminal.w_id for p in params if "c_last" in p)
+    # 姓氏由三个音节组成
+    syllables = "|".join(SYLLABLES)
+    assert all(re.fullmatch(f"(?:{syllables}){{3}}", name) for name in by_last_name)
+
+def test_concurrent_request_ignores_params():
+    # 旧客户端仍会发送 params，与其他未知字段一样忽略
+    request = ConcurrentTestRequest(concurrency=1, duration=1, params={"PAYMENT": {"c_id": 1}})
+    assert not hasattr(request, "params")
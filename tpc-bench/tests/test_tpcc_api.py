@@ -0,0 +1,39 @@
+import asyncio
+
+import pydantic
+import pytest
+from fastapi import HTTPException
+
+from tpcc import api
+from tpcc.api import ConcurrentTestRequest
+
+@pytest.mark.parametrize("field, value", [
+    ("concurrency", 0), ("duration", -5), ("interval", 0), ("processes", 0), ("warehouses", 0),
+    ("think_time", -1), ("keying_time", -0.5), ("ramp_up", -1), ("max_retries", -1),
+])
+def test_concurrent_request_rejects_invalid_values(field, value):
+    body = {"concurrency": 1, "duration": 1, field: value}
+    with pytest.raises(pydantic.ValidationError):
+        ConcurrentTestRequest(**body)
+
+def test_concurrent_request_defaults():
+    request = ConcurrentTestRequest(concurrency=4, duration=10, think_time=0, ramp_up=0, max_retries=0)
+    assert request.processes == 1 and request.interval == 1.0 and request.warehouses is None
+
+@pytest.fixture
+def loaded_warehouses(monkeypatch):
+    async def get_pool():
+        return object()
+
+    async def count_warehouses(pool):
+        return 2
+
+    monkeypatch.setattr(api, "get_pool", get_pool)
+    monkeypatch.setattr(api, "count_warehouses", count_warehouses)
+
+def test_concurrent_rejects_more_warehouses_than_loaded(loaded_warehouses):
+    request = ConcurrentTestRequest(concurrency=4, duration=10, warehouses=3)
+    with pytest.raises(HTTPException) as info:
+        asyncio.run(api.concurrent_test(request))
+    assert info.value.status_code == 400
+    assert "超过已装载的仓库数 2" in info.value.detail
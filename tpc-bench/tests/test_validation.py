@@ -0,0 +1,86 @@
+from decimal import Decimal
+
+import pytest
+
+from tpch.validation import AnswerValidator, compare_value, load_answer, load_col_precision
+
+@pytest.fixture(scope="module")
+def q1_answer():
+    return load_answer("Q1")
+
+def q1_rows(answer):
+    """将答案行转换为查询返回的结果行（数值列为 Decimal / int）"""
+    names = ["l_returnflag", "l_linestatus", "sum_qty", "sum_base_price", "sum_disc_price",
+             "sum_charge", "avg_qty", "avg_price", "avg_disc", "count_order"]
+    rows = []
+    for values in answer:
+        row = dict(zip(names, [v.strip() for v in values]))
+        for name in names[2:9]:
+            row[name] = Decimal(row[name])
+        row["count_order"] = int(row["count_order"])
+        rows.append(row)
+    return rows
+
+def test_q1_column_kinds():
+    assert load_col_precision()["Q1"] == ["str", "str", "sum", "sum", "sum", "sum", "avg", "avg", "avg", "cnt"]
+
+def test_q1_answer_matches_itself(q1_answer):
+    result = AnswerValidator().compare("Q1", q1_rows(q1_answer))
+    assert result["valid"], result["mismatches"]
+    assert result["rowCount"] == result["expectedRowCount"] == 4
+
+@pytest.mark.parametrize("column, delta, valid", [
+    # sum：相差不超过 100
+    ("sum_qty", Decimal("100"), True),
+    ("sum_base_price", Decimal("-99.99"), True),
+    ("sum_charge", Decimal("100.01"), False),
+    # avg：相对误差不超过 1%（avg_price 为 38273.13）
+    ("avg_price", Decimal("382.73"), True),
+    ("avg_price", Decimal("382.74"), False),
+    # avg_disc 为 0.05，四舍五入到两位小数后比较
+    ("avg_disc", Decimal("0.004"), True),
+    ("avg_disc", Decimal("0.01"), False),
+    # cnt：完全一致
+    ("count_order", 1, False),
+])
+def test_q1_column_tolerances(q1_answer, column, delta, valid):
+    rows = q1_rows(q1_answer)
+    rows[0][column] += delta
+    result = AnswerValidator().compare("Q1", rows)
+    assert result["valid"] is valid
+    if not valid:
+        assert result["mismatches"][0]["row"] == 1
+        assert result["mismatches"][0]["expected"] == q1_answer[0][list(rows[0]).index(column)].strip()
+
+def test_q1_string_columns_ignore_trailing_spaces(q1_answer):
+    rows = q1_rows(q1_answer)
+    rows[1]["l_returnflag"] = "N   "
+    assert AnswerValidator().compare("Q1", rows)["valid"]
+    rows[1]["l_returnflag"] = "R"
+    result = AnswerValidator().compare("Q1", rows)
+    assert not result["valid"]
+    assert result["mismatches"] == [{"row": 2, "column": 1, "type": "str", "actual": "R", "expected": "N"}]
+
+def test_q1_missing_row_is_invalid(q1_answer):
+    result = AnswerValidator().compare("Q1", q1_rows(q1_answer)[:3])
+    assert not result["valid"]
+    assert result["mismatchCount"] == 0 and result["rowCount"] == 3
+
+@pytest.mark.parametrize("kind, actual, expected, valid", [
+    ("int", "42", "42", True),
+    ("int", "42", "   42", True),
+    ("int", "43", "42", False),
+    ("int", "abc", "42", False),
+    ("num", "1.005", "1.01", True),
+    ("num", "1.02", "1.01", False),
+    ("rat", "0.99", "1.00", True),
+    ("rat", "0.98", "1.00", False),
+    ("rat", "0", "0.00", True),
+    ("rat", "0.01", "0.00", False),
+])
+def test_compare_value(kind, actual, expected, valid):
+    assert compare_value(kind, actual, expected) is valid
+
+def test_unknown_column_kind():
+    with pytest.raises(ValueError):
+        compare_value("float", "1", "1")
@@ -1,52 +1,35 @@
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import List, Dict, Optional
+from pydantic import BaseModel, Field
+from typing import Callable, List, Dict, Optional, Tuple
 import asyncpg
-from .transactions import TPCCTransaction
-import traceback
+from .delivery import DELIVERY_QUEUE, DeliveryQueue
+from .isolation import RetryPolicy, isolation_name, resolve_isolation
+from .report import build_tpcc_report
+from .terminal import TRANSACTION_MIX, Terminal, build_terminals, keying, think
+from .transactions import InvalidItemError, TPCCTransaction
 from fastapi.responses import JSONResponse
+import random
 import asyncio
 from datetime import datetime
-import json
+from db import get_pool as get_shared_pool
+from distributed import run_on_agents, warehouse_ranges
+from driver import run_closed_loop
+from loadgen import merge_results, run_processes, split_workers
+from logs import error_type, get_logger
+from metrics import RunStats
+from streaming import STREAM_FORMATS, ProgressStream, streaming_response
 
 router = APIRouter()
 
-# 数据库连接池
-pool = None
-
-# 读取数据库配置
-def get_db_config():
-    try:
-        with open("config/database.json", "r") as f:
-            config = json.load(f)
-            return {
-                "user": config["username"],
-                "password": config["password"],
-                "database": config["database"],
-                "host": config["host"],
-                "port": config["port"]
-            }
-    except:
-        # 如果配置文件不存在，使用默认配置
-        return {
-            "user": "tpc_user",
-            "password": "tpc_password",
-            "database": "tpc_db",
-            "host": "localhost",
-            "port": 5432
-        }
+log = get_logger("tpcc.api")
 
 async def get_pool():
-    global pool
-    if pool is None:
-        try:
-            config = get_db_config()
-            pool = await asyncpg.create_pool(**config)
-        except Exception as e:
-            print(f"数据库连接错误: {str(e)}")
-            print(f"错误详情: {traceback.format_exc()}")
-            raise HTTPException(status_code=500, detail=f"数据库连接错误: {str(e)}")
-    return pool
+    """获取应用共享的数据库连接池"""
+    try:
+        return await get_shared_pool()
+    except Exception as e:
+        log.error("pool_unavailable", exc=e)
+        raise HTTPException(status_code=500, detail=f"数据库连接错误: {str(e)}")
 
 # 请求模型
 class NewOrderRequest(BaseModel):
@@ -54,29 +37,35 @@ class NewOrderRequest(BaseModel):
     d_id: int
     c_id: int
     items: List[Dict]
-    o_id: int
+    o_id: Optional[int] = None  # 不指定时由服务端分配
 
 class PaymentRequest(BaseModel):
     w_id: int
     d_id: int
-    c_id: int
+    c_id: Optional[int] = None  # 与 c_last 二选一
+    c_last: Optional[str] = None  # 按姓氏选择客户（同姓客户按 c_first 排序后取中间一个）
+    c_w_id: Optional[int] = None  # 客户所属仓库，默认为 w_id
+    c_d_id: Optional[int] = None  # 客户所属地区，默认为 d_id
     amount: float
 
 class OrderStatusRequest(BaseModel):
     w_id: int
     d_id: int
-    c_id: int
+    c_id: Optional[int] = None  # 与 c_last 二选一
+    c_last: Optional[str] = None
 
 class DeliveryRequest(BaseModel):
     w_id: int
-    d_id: int
-    o_id: int
     carrier_id: int
+    d_id: Optional[int] = None  # 与 o_id 同时指定时只配送该订单，否则配送仓库全部地区最早的未配送订单
+    o_id: Optional[int] = None
+    deferred: bool = False  # 提交到后台队列后立即返回
 
 class StockLevelRequest(BaseModel):
     w_id: int
     d_id: int
     threshold: int
+    detailed: bool = False  # 是否返回每个商品的库存明细（默认只返回低库存商品数）
 
 class MaxOrderIdRequest(BaseModel):
     w_id: int
@@ -84,10 +73,23 @@ class MaxOrderIdRequest(BaseModel):
 
 # 添加并发测试请求模型
 class ConcurrentTestRequest(BaseModel):
-    transaction_types: List[str]  # 要测试的事务类型列表
-    concurrency: int  # 并发数
-    duration: int  # 测试持续时间（秒）
-    params: Dict  # 测试参数
+    transaction_types: List[str] = []  # 参与测试的事务类型（按规范比例混合），为空时使用全部五种
+    concurrency: int = Field(gt=0)  # 终端数，终端依次绑定到各仓库的各地区
+    duration: int = Field(gt=0)  # 测量时长（秒）
+    warehouses: Optional[int] = Field(default=None, gt=0)  # 参与测试的仓库数，默认为 tpcc_warehouse 中的仓库数，不能超过已装载的仓库数
+    seed: Optional[int] = None  # 终端随机数种子，指定时输入序列可复现
+    load_seed: int = 0  # 生成数据时使用的种子，用于推算 NURand 的运行常数
+    keying_time: float = Field(default=0, ge=0)  # 录入时间相对规范值的倍数，0 为不模拟
+    think_time: float = Field(default=0, ge=0)  # 思考时间相对规范值的倍数，0 为不模拟
+    ramp_up: float = Field(default=0, ge=0)  # 预热时间（秒），期间结果不计入统计
+    stream: Optional[str] = None  # "ndjson" 或 "sse"：运行期间流式输出进度
+    interval: float = Field(default=1.0, gt=0)  # 流式输出的统计间隔（秒）
+    include_records: bool = False  # 流式输出时是否附带每个事务的记录
+    deferred_delivery: bool = False  # 配送事务提交到后台队列执行，响应时间为入队时间
+    processes: int = Field(default=1, gt=0)  # 负载生成进程数，大于 1 时终端分配到多个子进程执行（各自的事件循环和连接池）
+    agents: List[str] = []  # 分布式驱动代理地址（host:port），指定时按仓库区间将终端分配给各代理执行
+    isolation: Dict[str, str] = {}  # 按事务类型的隔离级别，如 {"PAYMENT": "SERIALIZABLE"}，未指定的类型使用环境变量配置
+    max_retries: Optional[int] = Field(default=None, ge=0)  # 序列化失败和死锁的最大重试次数，默认为 TPCC_MAX_RETRIES
 
 # 路由处理函数
 @router.post("/new-order")
@@ -104,16 +106,13 @@ async def new_order(request: NewOrderRequest):
         )
         return {"success": True, "data": result}
     except asyncpg.PostgresError as e:
-        print(f"数据库错误: {str(e)}")
-        print(f"错误详情: {traceback.format_exc()}")
+        log.warning("new_order_failed", exc=e)
         raise HTTPException(status_code=400, detail=f"数据库错误: {str(e)}")
     except ValueError as e:
-        print(f"业务逻辑错误: {str(e)}")
-        print(f"错误详情: {traceback.format_exc()}")
+        log.warning("new_order_failed", exc=e)
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        print(f"未知错误: {str(e)}")
-        print(f"错误详情: {traceback.format_exc()}")
+        log.warning("new_order_failed", exc=e)
         raise HTTPException(status_code=500, detail=f"服务器内部错误: {str(e)}")
 
 @router.post("/payment")
@@ -125,20 +124,20 @@ async def payment(request: PaymentRequest):
             request.w_id,
             request.d_id,
             request.c_id,
-            request.amount
+            request.amount,
+            request.c_last,
+            request.c_w_id,
+            request.c_d_id
         )
         return {"success": True, "data": result}
     except asyncpg.PostgresError as e:
-        print(f"数据库错误: {str(e)}")
-        print(f"错误详情: {traceback.format_exc()}")
+        log.warning("payment_failed", exc=e)
         raise HTTPException(status_code=400, detail=f"数据库错误: {str(e)}")
     except ValueError as e:
-        print(f"业务逻辑错误: {str(e)}")
-        print(f"错误详情: {traceback.format_exc()}")
+        log.warning("payment_failed", exc=e)
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        print(f"未知错误: {str(e)}")
-        print(f"错误详情: {traceback.format_exc()}")
+        log.warning("payment_failed", exc=e)
         raise HTTPException(status_code=500, detail=f"服务器内部错误: {str(e)}")
 
 @router.post("/order-status")
@@ -149,45 +148,42 @@ async def order_status(request: OrderStatusRequest):
         result = await tpcc.order_status(
             request.w_id,
             request.d_id,
-            request.c_id
+            request.c_id,
+            request.c_last
         )
         return {"success": True, "data": result}
     except asyncpg.PostgresError as e:
-        print(f"数据库错误: {str(e)}")
-        print(f"错误详情: {traceback.format_exc()}")
+        log.warning("order_status_failed", exc=e)
         raise HTTPException(status_code=400, detail=f"数据库错误: {str(e)}")
     except ValueError as e:
-        print(f"业务逻辑错误: {str(e)}")
-        print(f"错误详情: {traceback.format_exc()}")
+        log.warning("order_status_failed", exc=e)
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        print(f"未知错误: {str(e)}")
-        print(f"错误详情: {traceback.format_exc()}")
+        log.warning("order_status_failed", exc=e)
         raise HTTPException(status_code=500, detail=f"服务器内部错误: {str(e)}")
 
 @router.post("/delivery")
 async def delivery(request: DeliveryRequest):
     try:
+        if request.deferred and request.o_id is None:
+            return {"success": True, "data": await DELIVERY_QUEUE.submit(request.w_id, request.carrier_id)}
         pool = await get_pool()
         tpcc = TPCCTransaction(pool)
         result = await tpcc.delivery(
             request.w_id,
+            request.carrier_id,
             request.d_id,
-            request.o_id,
-            request.carrier_id
+            request.o_id
         )
         return {"success": True, "data": result}
     except asyncpg.PostgresError as e:
-        print(f"数据库错误: {str(e)}")
-        print(f"错误详情: {traceback.format_exc()}")
+        log.warning("delivery_failed", exc=e)
         raise HTTPException(status_code=400, detail=f"数据库错误: {str(e)}")
     except ValueError as e:
-        print(f"业务逻辑错误: {str(e)}")
-        print(f"错误详情: {traceback.format_exc()}")
+        log.warning("delivery_failed", exc=e)
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        print(f"未知错误: {str(e)}")
-        print(f"错误详情: {traceback.format_exc()}")
+        log.warning("delivery_failed", exc=e)
         raise HTTPException(status_code=500, detail=f"服务器内部错误: {str(e)}")
 
 @router.post("/stock-level")
@@ -198,22 +194,25 @@ async def stock_level(request: StockLevelRequest):
         result = await tpcc.stock_level(
             request.w_id,
             request.d_id,
-            request.threshold
+            request.threshold,
+            request.detailed
         )
         return {"success": True, "data": result}
     except asyncpg.PostgresError as e:
-        print(f"数据库错误: {str(e)}")
-        print(f"错误详情: {traceback.format_exc()}")
+        log.warning("stock_level_failed", exc=e)
         raise HTTPException(status_code=400, detail=f"数据库错误: {str(e)}")
     except ValueError as e:
-        print(f"业务逻辑错误: {str(e)}")
-        print(f"错误详情: {traceback.format_exc()}")
+        log.warning("stock_level_failed", exc=e)
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        print(f"未知错误: {str(e)}")
-        print(f"错误详情: {traceback.format_exc()}")
+        log.warning("stock_level_failed", exc=e)
         raise HTTPException(status_code=500, detail=f"服务器内部错误: {str(e)}")
 
+@router.get("/delivery-queue")
+async def delivery_queue_stats():
+    """延迟配送队列的深度、排队时间和完成时间"""
+    return {"success": True, "data": DELIVERY_QUEUE.get_stats()}
+
 @router.post("/max-order-id")
 async def get_max_order_id(request: MaxOrderIdRequest):
     try:
@@ -233,172 +232,290 @@ async def get_max_order_id(request: MaxOrderIdRequest):
                 }
             }
     except Exception as e:
-        print(f"获取最大订单ID失败: {str(e)}")
-        print(traceback.format_exc())
+        log.warning("max_order_id_failed", exc=e)
         return JSONResponse(
             status_code=400,
             content={"success": False, "error": str(e)}
         )
 
+async def execute_transaction(
+    tpcc: TPCCTransaction,
+    transaction_type: str,
+    params: Dict,
+    delivery_queue: Optional[DeliveryQueue] = None
+) -> Dict:
+    """执行一次事务并返回带耗时的结果记录；指定 delivery_queue 时配送事务只入队"""
+    handlers = {
+        "NEW_ORDER": tpcc.new_order,
+        "PAYMENT": tpcc.payment,
+        "ORDER_STATUS": tpcc.order_status,
+        "DELIVERY": delivery_queue.submit if delivery_queue is not None else tpcc.delivery,
+        "STOCK_LEVEL": tpcc.stock_level
+    }
+    handler = handlers.get(transaction_type, tpcc.stock_level)
+
+    if log.debug_enabled:
+        log.debug("transaction_start", transaction_type=transaction_type, params=params)
+
+    tpcc.last_retries = 0
+    start_time = asyncio.get_event_loop().time()
+    try:
+        result = await handler(**params)
+    except InvalidItemError as e:
+        # 包含不存在商品的新订单按规范回滚，属于正常完成
+        result = {"success": True, "rolled_back": True, "message": str(e)}
+    except Exception as e:
+        # 抛出异常的事务记为失败（错误已由事务记录），错误类型取原始异常
+        result = {
+            "success": False,
+            "message": str(e),
+            "error_type": error_type(e.__cause__ or e)
+        }
+    execution_time = (asyncio.get_event_loop().time() - start_time) * 1000
+    success = result.get("success", True)
+    return {
+        "transaction_type": transaction_type,
+        "success": success,
+        "data": result.get("data"),
+        "message": result.get("message"),
+        "errorType": None if success else result.get("error_type", "TransactionFailed"),
+        "rolledBack": result.get("rolled_back", False),
+        "retries": tpcc.last_retries,
+        "executionTime": execution_time,
+        "timestamp": datetime.now().isoformat()
+    }
+
+def build_tpcc_summary(stats: RunStats, total_time: float) -> Dict:
+    """根据运行统计生成并发测试汇总"""
+    overall = stats.overall.to_dict(total_time)
+    return {
+        "totalTransactions": overall["total"],
+        "successfulTransactions": overall["successful"],
+        "failedTransactions": overall["failed"],
+        "throughput": overall["throughput"],
+        "errorRate": overall["errorRate"],
+        "errors": overall["errors"],
+        "avgResponseTime": overall["avgResponseTime"],
+        "percentiles": overall["percentiles"],
+        "duration": total_time,
+        "byType": {t: tstats.to_dict(total_time) for t, tstats in stats.by_key.items()}
+    }
+
+# 并发测试结束后等待延迟配送执行完的最长时间（秒）
+DELIVERY_DRAIN_TIMEOUT = 60
+
+async def count_warehouses(pool) -> int:
+    async with pool.acquire() as conn:
+        return await conn.fetchval("SELECT COALESCE(MAX(w_id), 0) FROM tpcc_warehouse")
+
+async def drive_terminals(
+    pool,
+    request: ConcurrentTestRequest,
+    terminals: List[Terminal],
+    on_record: Callable[[Dict], None]
+) -> Tuple[float, Optional[DeliveryQueue]]:
+    """
+    各终端按规范的事务比例和输入分布闭环执行事务，测量区间内的记录通过 on_record 回调；
+    返回测量区间时长和（延迟配送时）已执行完的配送队列
+    """
+    isolation = resolve_isolation(request.isolation)
+    retry = RetryPolicy(request.max_retries) if request.max_retries is not None else RetryPolicy()
+    # 每个终端使用自己的实例，以便读取单个事务的重试次数
+    transactions = [TPCCTransaction(pool, isolation, retry) for _ in terminals]
+    delivery_queue = DeliveryQueue(pool, isolation=isolation, retry=retry) if request.deferred_delivery else None
+    loop = asyncio.get_event_loop()
+    deadline = loop.time() + request.ramp_up + request.duration
+
+    async def operation(worker_id: int, iteration: int) -> Optional[Dict]:
+        terminal = terminals[worker_id]
+        # 上一个事务的思考时间，然后是本事务的录入时间
+        if terminal.last_type is not None:
+            await think(terminal.last_type, request.think_time, deadline)
+        transaction_type, params = terminal.next_transaction()
+        terminal.last_type = transaction_type
+        await keying(transaction_type, request.keying_time, deadline)
+        if loop.time() >= deadline:
+            return None
+        return await execute_transaction(transactions[worker_id], transaction_type, params, delivery_queue)
+
+    def collect(record: Optional[Dict], measured: bool):
+        if record is not None and measured:
+            on_record(record)
+
+    total_time = await run_closed_loop(
+        operation,
+        concurrency=len(terminals),
+        duration=request.duration,
+        ramp_up=request.ramp_up,
+        on_result=collect
+    )
+
+    if delivery_queue is not None:
+        # 等待已入队的配送执行完（不计入测试时长）
+        await delivery_queue.drain(DELIVERY_DRAIN_TIMEOUT)
+        await delivery_queue.stop()
+    return total_time, delivery_queue
+
+def count_outcome(rollbacks: Dict[str, int], retries: Dict[str, int], record: Dict) -> None:
+    """按事务类型累计回滚次数和重试次数"""
+    transaction_type = record["transaction_type"]
+    if record["rolledBack"]:
+        rollbacks[transaction_type] = rollbacks.get(transaction_type, 0) + 1
+    if record["retries"]:
+        retries[transaction_type] = retries.get(transaction_type, 0) + record["retries"]
+
+def merge_counts(target: Dict[str, int], source: Dict[str, int]) -> None:
+    for key, count in source.items():
+        target[key] = target.get(key, 0) + count
+
+async def run_terminal_process(pool, recorder, request_data: Dict, warehouses: int, terminal_ids: List[int]) -> Dict:
+    """多进程负载时在子进程中执行：运行编号为 terminal_ids 的终端"""
+    request = ConcurrentTestRequest(**request_data)
+    terminals = build_terminals(
+        request.concurrency, warehouses, request.seed, request.load_seed, request.transaction_types or None
+    )
+    rollbacks: Dict[str, int] = {}
+    retries: Dict[str, int] = {}
+
+    def on_record(record: Dict):
+        recorder.record(record["transaction_type"], record["success"], record["executionTime"], record["errorType"])
+        count_outcome(rollbacks, retries, record)
+
+    total_time, delivery_queue = await drive_terminals(
+        pool, request, [terminals[i] for i in terminal_ids], on_record
+    )
+    return {"totalTime": total_time, "rollbacks": rollbacks, "retries": retries, "deliveryQueue": delivery_queue}
+
+async def run_concurrent_test(
+    pool,
+    request: ConcurrentTestRequest,
+    on_result: Callable[[Dict], None],
+    progress: Optional[ProgressStream] = None
+) -> Dict:
+    """
+    执行并发测试，每个测量区间内的结果通过 on_result 回调，返回汇总。
+    processes > 1 时终端分配到多个子进程、指定 agents 时分配到各驱动代理执行，不回调单个结果，
+    流式输出的区间统计由子进程或代理合并到 progress
+    """
+    warehouses = request.warehouses or await count_warehouses(pool)
+    if warehouses <= 0:
+        raise ValueError("没有仓库数据，请先生成 TPC-C 数据")
+
+    rollbacks: Dict[str, int] = {}
+    retries: Dict[str, int] = {}
+    agents = None
+    if request.agents or request.processes > 1:
+        if request.agents:
+            # 各代理负责一个连续的仓库区间，执行绑定到这些仓库的终端
+            ranges = warehouse_ranges(warehouses, len(request.agents))
+            assignments = [
+                [i for i in range(request.concurrency) if low <= i % warehouses + 1 <= high]
+                for low, high in ranges
+            ]
+            agents = [
+                {"agent": agent, "warehouses": [low, high], "terminals": len(terminal_ids)}
+                for agent, (low, high), terminal_ids in zip(request.agents, ranges, assignments)
+                if terminal_ids
+            ]
+            assignments = [terminal_ids for terminal_ids in assignments if terminal_ids]
+            results = await run_on_agents(
+                [agent["agent"] for agent in agents],
+                "tpcc",
+                [(request.dict(), warehouses, terminal_ids) for terminal_ids in assignments],
+                [len(terminal_ids) for terminal_ids in assignments],
+                progress
+            )
+        else:
+            assignments = split_workers(request.concurrency, request.processes)
+            results = await run_processes(
+                run_terminal_process,
+                [(request.dict(), warehouses, terminal_ids) for terminal_ids in assignments],
+                [len(terminal_ids) for terminal_ids in assignments],
+                progress
+            )
+        stats, total_time = merge_results(results)
+        for result in results:
+            merge_counts(rollbacks, result["rollbacks"])
+            merge_counts(retries, result["retries"])
+        queues = [result["deliveryQueue"] for result in results if result["deliveryQueue"] is not None]
+        delivery_queue = queues[0] if queues else None
+        for queue in queues[1:]:
+            delivery_queue.merge(queue)
+    else:
+        terminals = build_terminals(
+            request.concurrency, warehouses, request.seed, request.load_seed, request.transaction_types or None
+        )
+        stats = RunStats()
+
+        def on_record(record: Dict):
+            stats.record(record["transaction_type"], record["success"], record["executionTime"], record["errorType"])
+            count_outcome(rollbacks, retries, record)
+            on_result(record)
+
+        total_time, delivery_queue = await drive_terminals(pool, request, terminals, on_record)
+
+    summary = build_tpcc_summary(stats, total_time)
+    summary["warehouses"] = warehouses
+    summary["terminals"] = request.concurrency
+    if agents is not None:
+        summary["agents"] = agents
+    else:
+        summary["processes"] = max(1, min(request.processes, request.concurrency))
+    if delivery_queue is not None:
+        summary["deliveryQueue"] = delivery_queue.get_stats()
+    summary["isolation"] = {t: isolation_name(level) for t, level in resolve_isolation(request.isolation).items()}
+    summary["report"] = build_tpcc_report(stats, total_time, rollbacks, summary.get("deliveryQueue"), retries)
+    return {
+        "success": True,
+        "summary": summary
+    }
+
 # 添加并发测试路由
 @router.post("/concurrent")
 async def concurrent_test(request: ConcurrentTestRequest):
     try:
+        if request.stream is not None and request.stream not in STREAM_FORMATS:
+            raise HTTPException(status_code=400, detail=f"不支持的流式格式: {request.stream}")
+        invalid = [t for t in request.transaction_types if t not in TRANSACTION_MIX]
+        if invalid:
+            raise HTTPException(status_code=400, detail=f"不支持的事务类型: {', '.join(invalid)}")
+        try:
+            resolve_isolation(request.isolation)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
         pool = await get_pool()
-        tpcc = TPCCTransaction(pool)
-        
-        # 记录开始时间
-        start_time = asyncio.get_event_loop().time()
-        end_time = start_time + request.duration
+        loaded = await count_warehouses(pool)
+        if loaded <= 0:
+            raise HTTPException(status_code=400, detail="没有仓库数据，请先生成 TPC-C 数据")
+        if request.warehouses is not None and request.warehouses > loaded:
+            raise HTTPException(status_code=400, detail=f"warehouses={request.warehouses} 超过已装载的仓库数 {loaded}")
+
+        if request.stream:
+            # 流式模式：运行期间输出区间统计和（可选的）不含结果数据的事务记录
+            def run_streaming(progress: ProgressStream):
+                def on_result(record: Dict):
+                    progress.record(
+                        record["transaction_type"],
+                        record["success"],
+                        record["executionTime"],
+                        {k: v for k, v in record.items() if k != "data"},
+                        record["errorType"]
+                    )
+                return run_concurrent_test(pool, request, on_result, progress)
+
+            return streaming_response(run_streaming, request.stream, request.interval, request.include_records)
+
         results = []
-        
-        # 执行并发测试
-        while asyncio.get_event_loop().time() < end_time:
-            tasks = []
-            for i in range(request.concurrency):
-                # 随机选择一个事务类型
-                transaction_type = request.transaction_types[i % len(request.transaction_types)]
-                
-                # 根据事务类型准备参数
-                if transaction_type == "NEW_ORDER":
-                    # 获取最大订单ID
-                    max_order_id = await pool.fetchval("""
-                        SELECT COALESCE(MAX(o_id), 0)
-                        FROM tpcc_orders
-                        WHERE o_w_id = $1 AND o_d_id = $2
-                    """, 1, 1)  # 使用默认的仓库和区域ID
-                    
-                    params = {
-                        "w_id": 1,
-                        "d_id": 1,
-                        "c_id": 1,
-                        "o_id": max_order_id + 1,
-                        "items": [{"i_id": 1, "quantity": 1}]
-                    }
-                elif transaction_type == "PAYMENT":
-                    params = {
-                        "w_id": 1,
-                        "d_id": 1,
-                        "c_id": 1,
-                        "amount": 100.0
-                    }
-                elif transaction_type == "ORDER_STATUS":
-                    params = {
-                        "w_id": 1,
-                        "d_id": 1,
-                        "c_id": 1
-                    }
-                elif transaction_type == "DELIVERY":
-                    params = {
-                        "w_id": 1,
-                        "d_id": 1,
-                        "o_id": 1,
-                        "carrier_id": 1
-                    }
-                else:  # STOCK_LEVEL
-                    params = {
-                        "w_id": 1,
-                        "d_id": 1,
-                        "threshold": 10
-                    }
-                
-                # 创建任务
-                if transaction_type == "NEW_ORDER":
-                    start_time = asyncio.get_event_loop().time()
-                    result = await tpcc.new_order(**params)
-                    execution_time = (asyncio.get_event_loop().time() - start_time) * 1000
-                    results.append({
-                        "transaction_type": transaction_type,
-                        "success": result.get("success", True),
-                        "data": result.get("data"),
-                        "message": result.get("message"),
-                        "executionTime": execution_time,
-                        "timestamp": datetime.now().isoformat()
-                    })
-                elif transaction_type == "PAYMENT":
-                    start_time = asyncio.get_event_loop().time()
-                    result = await tpcc.payment(**params)
-                    execution_time = (asyncio.get_event_loop().time() - start_time) * 1000
-                    results.append({
-                        "transaction_type": transaction_type,
-                        "success": result.get("success", True),
-                        "data": result.get("data"),
-                        "message": result.get("message"),
-                        "executionTime": execution_time,
-                        "timestamp": datetime.now().isoformat()
-                    })
-                elif transaction_type == "ORDER_STATUS":
-                    start_time = asyncio.get_event_loop().time()
-                    result = await tpcc.order_status(**params)
-                    execution_time = (asyncio.get_event_loop().time() - start_time) * 1000
-                    results.append({
-                        "transaction_type": transaction_type,
-                        "success": result.get("success", True),
-                        "data": result.get("data"),
-                        "message": result.get("message"),
-                        "executionTime": execution_time,
-                        "timestamp": datetime.now().isoformat()
-                    })
-                elif transaction_type == "DELIVERY":
-                    start_time = asyncio.get_event_loop().time()
-                    result = await tpcc.delivery(**params)
-                    execution_time = (asyncio.get_event_loop().time() - start_time) * 1000
-                    results.append({
-                        "transaction_type": transaction_type,
-                        "success": result.get("success", True),
-                        "data": result.get("data"),
-                        "message": result.get("message"),
-                        "executionTime": execution_time,
-                        "timestamp": datetime.now().isoformat()
-                    })
-                else:  # STOCK_LEVEL
-                    start_time = asyncio.get_event_loop().time()
-                    result = await tpcc.stock_level(**params)
-                    execution_time = (asyncio.get_event_loop().time() - start_time) * 1000
-                    results.append({
-                        "transaction_type": transaction_type,
-                        "success": result.get("success", True),
-                        "data": result.get("data"),
-                        "message": result.get("message"),
-                        "executionTime": execution_time,
-                        "timestamp": datetime.now().isoformat()
-                    })
-            
-            # 短暂休眠以避免过度消耗资源
-            await asyncio.sleep(0.1)
-        
-        # 计算统计信息
-        successful_transactions = [r for r in results if r["success"]]
-        failed_transactions = [r for r in results if not r["success"]]
-        
-        total_time = asyncio.get_event_loop().time() - start_time
-        throughput = len(successful_transactions) / total_time if total_time > 0 else 0
-        error_rate = len(failed_transactions) / len(results) * 100 if results else 0
-        
-        # 计算平均响应时间
-        avg_response_time = 0
-        if successful_transactions:
-            total_response_time = sum(r.get("executionTime", 0) for r in successful_transactions)
-            avg_response_time = total_response_time / len(successful_transactions)
-        
-        return {
-            "success": True,
-            "summary": {
-                "totalTransactions": len(results),
-                "successfulTransactions": len(successful_transactions),
-                "failedTransactions": len(failed_transactions),
-                "throughput": throughput,
-                "errorRate": error_rate,
-                "avgResponseTime": avg_response_time,
-                "duration": total_time
-            },
-            "results": results
-        }
-        
+        response = await run_concurrent_test(pool, request, results.append)
+        response["results"] = results
+        return response
+
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"并发测试执行失败: {str(e)}")
-        print(traceback.format_exc())
+        log.error("concurrent_failed", exc=e)
         return JSONResponse(
             status_code=500,
             content={"success": False, "error": str(e)}
-        ) 
\ No newline at end of file
+        )
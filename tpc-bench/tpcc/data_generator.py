@@ -1,163 +1,401 @@
 import asyncio
 import random
+import argparse
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 import asyncpg
-from typing import List, Dict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from db import get_db_config
+from tpcc.distributions import NURandConstants, TPCCRandom, last_name
+
+# 每张表的列顺序（与生成的记录元组一致）
+WAREHOUSE_COLUMNS = ["w_id", "w_name", "w_street_1", "w_street_2", "w_city", "w_state", "w_zip", "w_tax", "w_ytd"]
+DISTRICT_COLUMNS = ["d_id", "d_w_id", "d_name", "d_street_1", "d_street_2", "d_city", "d_state", "d_zip", "d_tax", "d_ytd", "d_next_o_id"]
+CUSTOMER_COLUMNS = [
+    "c_id", "c_d_id", "c_w_id", "c_first", "c_middle", "c_last", "c_street_1", "c_street_2", "c_city", "c_state",
+    "c_zip", "c_phone", "c_since", "c_credit", "c_credit_lim", "c_discount", "c_balance", "c_ytd_payment",
+    "c_payment_cnt", "c_delivery_cnt", "c_data"
+]
+ITEM_COLUMNS = ["i_id", "i_im_id", "i_name", "i_price", "i_data"]
+STOCK_COLUMNS = [
+    "s_i_id", "s_w_id", "s_quantity", "s_dist_01", "s_dist_02", "s_dist_03", "s_dist_04", "s_dist_05",
+    "s_dist_06", "s_dist_07", "s_dist_08", "s_dist_09", "s_dist_10", "s_ytd", "s_order_cnt", "s_remote_cnt", "s_data"
+]
+
+HISTORY_COLUMNS = ["h_c_id", "h_c_d_id", "h_c_w_id", "h_d_id", "h_w_id", "h_date", "h_amount", "h_data"]
+ORDER_COLUMNS = ["o_id", "o_d_id", "o_w_id", "o_c_id", "o_entry_d", "o_carrier_id", "o_ol_cnt", "o_all_local"]
+ORDER_LINE_COLUMNS = [
+    "ol_o_id", "ol_d_id", "ol_w_id", "ol_number", "ol_i_id", "ol_supply_w_id", "ol_delivery_d",
+    "ol_quantity", "ol_amount", "ol_dist_info"
+]
+NEW_ORDER_COLUMNS = ["no_o_id", "no_d_id", "no_w_id"]
+
+# 规范规定的基数
+ITEMS = 100000
+DISTRICTS_PER_WAREHOUSE = 10
+CUSTOMERS_PER_DISTRICT = 3000
+ORDERS_PER_DISTRICT = 3000
+# 每个地区最后 900 个订单未配送，同时写入 tpcc_new_order
+NEW_ORDERS_PER_DISTRICT = 900
+FIRST_NEW_ORDER_ID = ORDERS_PER_DISTRICT - NEW_ORDERS_PER_DISTRICT + 1
+
+# 进度回调的粒度（行）
+PROGRESS_INTERVAL = 10000
+
+# 进度回调：on_progress(表名, 已导入行数, 总行数)
+ProgressCallback = Callable[[str, int, int], None]
+
+# 一个地区的初始订单：每个订单的 (o_c_id, o_ol_cnt)，o_id 为下标 + 1
+OrderLayout = List[Tuple[int, int]]
 
 class TPCCDataGenerator:
-    def __init__(self, pool: asyncpg.Pool):
+    """
+    TPC-C 测试数据生成器
+    按规范 4.3.3 的分布生成数据，按表批量生成记录，通过 copy_records_to_table 流式写入（COPY 二进制协议）。
+    并行写入的表各自使用由 rng 派生的生成器，同一种子生成的数据与写入调度顺序无关
+    """
+
+    def __init__(
+        self,
+        pool: asyncpg.Pool,
+        rng: Optional[TPCCRandom] = None,
+        on_progress: Optional[ProgressCallback] = None,
+        constants: Optional[NURandConstants] = None
+    ):
         self.pool = pool
+        self.rng = rng or TPCCRandom()
+        self.on_progress = on_progress
+        self.constants = constants or NURandConstants.for_load(self.rng)
 
-    async def generate_warehouse(self, w_id: int) -> None:
+    def warehouse_row(self, w_id: int) -> Tuple:
         """生成仓库数据"""
-        await self.pool.execute(
-            """
-            INSERT INTO tpcc_warehouse (w_id, w_name, w_street_1, w_street_2, w_city, w_state, w_zip, w_tax, w_ytd)
-            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-            """,
+        rng = self.rng
+        return (
             w_id,
-            f"WAREHOUSE{w_id}",
-            f"Street {w_id}",
-            None,
-            f"City {w_id}",
-            "ST",
-            f"{w_id:05d}",
-            random.uniform(0.1, 0.2),
+            rng.a_string(6, 10),
+            rng.a_string(10, 20),
+            rng.a_string(10, 20),
+            rng.a_string(10, 20),
+            rng.state(),
+            rng.zip_code(),
+            rng.tax(),
             300000.00
         )
 
-    async def generate_district(self, w_id: int, d_id: int) -> None:
+    def district_row(self, w_id: int, d_id: int) -> Tuple:
         """生成地区数据"""
-        await self.pool.execute(
-            """
-            INSERT INTO tpcc_district (d_id, d_w_id, d_name, d_street_1, d_street_2, d_city, d_state, d_zip, d_tax, d_ytd, d_next_o_id)
-            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)
-            """,
+        rng = self.rng
+        return (
             d_id,
             w_id,
-            f"DISTRICT{d_id}",
-            f"Street {d_id}",
-            None,
-            f"City {d_id}",
-            "ST",
-            f"{d_id:05d}",
-            random.uniform(0.1, 0.2),
+            rng.a_string(6, 10),
+            rng.a_string(10, 20),
+            rng.a_string(10, 20),
+            rng.a_string(10, 20),
+            rng.state(),
+            rng.zip_code(),
+            rng.tax(),
             30000.00,
-            3001
+            ORDERS_PER_DISTRICT + 1
         )
 
-    async def generate_customer(self, w_id: int, d_id: int, c_id: int) -> None:
-        """生成客户数据"""
-        await self.pool.execute(
-            """
-            INSERT INTO tpcc_customer (c_id, c_d_id, c_w_id, c_first, c_middle, c_last, c_street_1, c_street_2, c_city, c_state, c_zip, c_phone, c_since, c_credit, c_credit_lim, c_discount, c_balance, c_ytd_payment, c_payment_cnt, c_delivery_cnt, c_data)
-            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17, $18, $19, $20, $21)
-            """,
-            c_id,
-            d_id,
-            w_id,
-            f"First{c_id}",
-            "OE",
-            f"Last{c_id}",
-            f"Street {c_id}",
-            None,
-            f"City {c_id}",
-            "ST",
-            f"{c_id:05d}",
-            f"{c_id:010d}",
-            datetime.now(),
-            "GC",
-            50000.00,
-            random.uniform(0.0, 0.5),
-            0.00,
-            0.00,
-            0,
-            0,
-            f"Customer data for {c_id}"
-        )
+    def customer_last_name(self, rng: TPCCRandom, c_id: int) -> str:
+        """前 1000 个客户按编号依次取名，其余按 NURand(255, 0, 999) 取名"""
+        if c_id <= 1000:
+            return last_name(c_id - 1)
+        return last_name(rng.nurand(255, 0, 999, self.constants.c_last))
 
-    async def generate_item(self, i_id: int) -> None:
+    def customer_rows(self, rng: TPCCRandom, w_id: int, since: datetime) -> Iterator[Tuple]:
+        """生成一个仓库全部地区的客户数据"""
+        for d_id in range(1, DISTRICTS_PER_WAREHOUSE + 1):
+            for c_id in range(1, CUSTOMERS_PER_DISTRICT + 1):
+                yield (
+                    c_id,
+                    d_id,
+                    w_id,
+                    rng.a_string(8, 16),
+                    "OE",
+                    self.customer_last_name(rng, c_id),
+                    rng.a_string(10, 20),
+                    rng.a_string(10, 20),
+                    rng.a_string(10, 20),
+                    rng.state(),
+                    rng.zip_code(),
+                    rng.n_string(16, 16),
+                    since,
+                    "BC" if rng.random() < 0.1 else "GC",
+                    50000.00,
+                    rng.number(0, 5000) / 10000,
+                    -10.00,
+                    10.00,
+                    1,
+                    0,
+                    rng.a_string(300, 500)
+                )
+
+    def history_rows(self, rng: TPCCRandom, w_id: int, since: datetime) -> Iterator[Tuple]:
+        """每个客户一条初始历史记录"""
+        for d_id in range(1, DISTRICTS_PER_WAREHOUSE + 1):
+            for c_id in range(1, CUSTOMERS_PER_DISTRICT + 1):
+                yield (c_id, d_id, w_id, d_id, w_id, since, 10.00, rng.a_string(12, 24))
+
+    def item_rows(self, rng: TPCCRandom) -> Iterator[Tuple]:
         """生成商品数据"""
-        await self.pool.execute(
-            """
-            INSERT INTO tpcc_item (i_id, i_im_id, i_name, i_price, i_data)
-            VALUES ($1, $2, $3, $4, $5)
-            """,
-            i_id,
-            random.randint(1, 10000),
-            f"Item {i_id}",
-            random.uniform(1.00, 100.00),
-            f"Item data for {i_id}"
+        for i_id in range(1, ITEMS + 1):
+            yield (
+                i_id,
+                rng.number(1, 10000),
+                rng.a_string(14, 24),
+                rng.number(100, 10000) / 100,
+                rng.data_string()
+            )
+
+    def stock_rows(self, rng: TPCCRandom, w_id: int) -> Iterator[Tuple]:
+        """生成一个仓库的库存数据"""
+        a_string = rng.a_string
+        for i_id in range(1, ITEMS + 1):
+            yield (
+                i_id,
+                w_id,
+                rng.number(10, 100),
+                a_string(24, 24), a_string(24, 24), a_string(24, 24), a_string(24, 24), a_string(24, 24),
+                a_string(24, 24), a_string(24, 24), a_string(24, 24), a_string(24, 24), a_string(24, 24),
+                0,
+                0,
+                0,
+                rng.data_string()
+            )
+
+    def order_layout(self) -> List[OrderLayout]:
+        """每个地区的初始订单：o_c_id 取 1~3000 的随机排列，o_ol_cnt 在 [5, 15] 内"""
+        rng = self.rng
+        layouts = []
+        for _ in range(DISTRICTS_PER_WAREHOUSE):
+            c_ids = list(range(1, CUSTOMERS_PER_DISTRICT + 1))
+            rng.shuffle(c_ids)
+            layouts.append([(c_id, rng.number(5, 15)) for c_id in c_ids[:ORDERS_PER_DISTRICT]])
+        return layouts
+
+    def order_rows(self, rng: TPCCRandom, w_id: int, layouts: List[OrderLayout], entry_d: datetime) -> Iterator[Tuple]:
+        for d_id, layout in enumerate(layouts, 1):
+            for o_id, (c_id, ol_cnt) in enumerate(layout, 1):
+                carrier_id = rng.number(1, 10) if o_id < FIRST_NEW_ORDER_ID else None
+                yield (o_id, d_id, w_id, c_id, entry_d, carrier_id, ol_cnt, 1)
+
+    def order_line_rows(self, rng: TPCCRandom, w_id: int, layouts: List[OrderLayout], entry_d: datetime) -> Iterator[Tuple]:
+        """已配送订单的明细金额为 0，未配送订单的金额在 [0.01, 9999.99] 内"""
+        for d_id, layout in enumerate(layouts, 1):
+            for o_id, (_, ol_cnt) in enumerate(layout, 1):
+                delivered = o_id < FIRST_NEW_ORDER_ID
+                for ol_number in range(1, ol_cnt + 1):
+                    yield (
+                        o_id,
+                        d_id,
+                        w_id,
+                        ol_number,
+                        rng.number(1, ITEMS),
+                        w_id,
+                        entry_d if delivered else None,
+                        5,
+                        0.00 if delivered else rng.number(1, 999999) / 100,
+                        rng.a_string(24, 24)
+                    )
+
+    def new_order_rows(self, w_id: int) -> Iterator[Tuple]:
+        for d_id in range(1, DISTRICTS_PER_WAREHOUSE + 1):
+            for o_id in range(FIRST_NEW_ORDER_ID, ORDERS_PER_DISTRICT + 1):
+                yield (o_id, d_id, w_id)
+
+    def _report(self, table: str, records: Iterable[Tuple], total: int) -> Iterator[Tuple]:
+        """在迭代记录的同时按 PROGRESS_INTERVAL 行调用进度回调"""
+        if self.on_progress is None:
+            yield from records
+            return
+        count = 0
+        for record in records:
+            yield record
+            count += 1
+            if count % PROGRESS_INTERVAL == 0:
+                self.on_progress(table, count, total)
+        if count % PROGRESS_INTERVAL:
+            self.on_progress(table, count, total)
+
+    async def copy(self, table: str, columns: List[str], records: Iterable[Tuple], total: int) -> int:
+        """以 COPY 流式写入一张表（记录按需生成，不在内存中整体保存），返回写入的行数"""
+        async with self.pool.acquire() as conn:
+            status = await conn.copy_records_to_table(table, records=self._report(table, records, total), columns=columns)
+        # 命令状态形如 "COPY 100000"
+        return int(status.split()[-1])
+
+    async def generate_items(self) -> int:
+        """生成商品（与仓库数量无关，只生成一次）"""
+        return await self.copy("tpcc_item", ITEM_COLUMNS, self.item_rows(self.rng.fork()), ITEMS)
+
+    async def generate_warehouse(self, w_id: int) -> int:
+        """生成一个仓库及其地区、客户、历史、库存和初始订单，返回写入的行数"""
+        now = datetime.now()
+        customers = DISTRICTS_PER_WAREHOUSE * CUSTOMERS_PER_DISTRICT
+        orders = DISTRICTS_PER_WAREHOUSE * ORDERS_PER_DISTRICT
+        rows = await self.copy("tpcc_warehouse", WAREHOUSE_COLUMNS, [self.warehouse_row(w_id)], 1)
+        rows += await self.copy(
+            "tpcc_district", DISTRICT_COLUMNS,
+            [self.district_row(w_id, d_id) for d_id in range(1, DISTRICTS_PER_WAREHOUSE + 1)],
+            DISTRICTS_PER_WAREHOUSE
         )
+        # 并行写入的表各自使用派生的生成器，派生顺序固定
+        customer_rng, history_rng, stock_rng, order_rng, order_line_rng = (self.rng.fork() for _ in range(5))
+        layouts = self.order_layout()
+        order_lines = sum(ol_cnt for layout in layouts for _, ol_cnt in layout)
 
-    async def generate_stock(self, w_id: int, i_id: int) -> None:
-        """生成库存数据"""
-        await self.pool.execute(
-            """
-            INSERT INTO tpcc_stock (s_i_id, s_w_id, s_quantity, s_dist_01, s_dist_02, s_dist_03, s_dist_04, s_dist_05, s_dist_06, s_dist_07, s_dist_08, s_dist_09, s_dist_10, s_ytd, s_order_cnt, s_remote_cnt, s_data)
-            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17)
-            """,
-            i_id,
-            w_id,
-            random.randint(10, 100),
-            f"Dist {w_id}-1",
-            f"Dist {w_id}-2",
-            f"Dist {w_id}-3",
-            f"Dist {w_id}-4",
-            f"Dist {w_id}-5",
-            f"Dist {w_id}-6",
-            f"Dist {w_id}-7",
-            f"Dist {w_id}-8",
-            f"Dist {w_id}-9",
-            f"Dist {w_id}-10",
-            0,
-            0,
-            0,
-            f"Stock data for {w_id}-{i_id}"
+        # 按外键依赖分批，同一批内的表通过不同连接并行写入
+        counts = await asyncio.gather(
+            self.copy("tpcc_customer", CUSTOMER_COLUMNS, self.customer_rows(customer_rng, w_id, now), customers),
+            self.copy("tpcc_stock", STOCK_COLUMNS, self.stock_rows(stock_rng, w_id), ITEMS)
+        )
+        counts += await asyncio.gather(
+            self.copy("tpcc_history", HISTORY_COLUMNS, self.history_rows(history_rng, w_id, now), customers),
+            self.copy("tpcc_orders", ORDER_COLUMNS, self.order_rows(order_rng, w_id, layouts, now), orders)
         )
+        counts += await asyncio.gather(
+            self.copy("tpcc_order_line", ORDER_LINE_COLUMNS, self.order_line_rows(order_line_rng, w_id, layouts, now), order_lines),
+            self.copy("tpcc_new_order", NEW_ORDER_COLUMNS, self.new_order_rows(w_id), DISTRICTS_PER_WAREHOUSE * NEW_ORDERS_PER_DISTRICT)
+        )
+        return rows + sum(counts)
 
-    async def generate_data(self, num_warehouses: int = 1) -> None:
-        """生成完整的 TPC-C 测试数据"""
-        # 生成仓库
+    async def generate_data(self, num_warehouses: int = 1) -> int:
+        """在当前进程中生成完整的 TPC-C 测试数据（多进程生成见 generate_parallel）"""
+        # 库存引用商品，先生成商品
+        rows = await self.generate_items()
         for w_id in range(1, num_warehouses + 1):
-            await self.generate_warehouse(w_id)
-            
-            # 生成地区
-            for d_id in range(1, 11):
-                await self.generate_district(w_id, d_id)
-                
-                # 生成客户
-                for c_id in range(1, 3001):
-                    await self.generate_customer(w_id, d_id, c_id)
-
-        # 生成商品
-        for i_id in range(1, 100001):
-            await self.generate_item(i_id)
-            
-            # 生成库存
-            for w_id in range(1, num_warehouses + 1):
-                await self.generate_stock(w_id, i_id)
-
-async def main():
-    # 创建数据库连接池
-    pool = await asyncpg.create_pool(
-        user="tpc_user",
-        password="tpc_password",
-        database="tpc_db",
-        host="localhost",
-        port=5432
+            rows += await self.generate_warehouse(w_id)
+        return rows
+
+def item_rng(seed) -> TPCCRandom:
+    """商品数据使用的随机数生成器"""
+    return TPCCRandom(f"{seed}:item")
+
+def warehouse_rng(seed, w_id: int) -> TPCCRandom:
+    """
+    每个仓库使用独立的随机数生成器，种子由 (seed, w_id) 确定，
+    因此同一种子下生成的数据与 worker 数量和仓库分配方式无关
+    """
+    return TPCCRandom(f"{seed}:warehouse:{w_id}")
+
+def load_constants(seed) -> NURandConstants:
+    """装载时使用的 NURand 常数，由种子确定（各进程一致，运行时可据此推算 C_LAST 的运行值）"""
+    return NURandConstants.for_load(random.Random(f"{seed}:nurand"))
+
+async def create_generator_pool(size: int) -> asyncpg.Pool:
+    return await asyncpg.create_pool(
+        **get_db_config(),
+        min_size=size,
+        max_size=size,
+        server_settings={"search_path": "tpc, public"}
     )
 
-    # 创建数据生成器
-    generator = TPCCDataGenerator(pool)
+async def _generate_warehouses(w_ids: List[int], seed, progress_queue) -> int:
+    pool = await create_generator_pool(2)
+    rows = 0
+    try:
+        for w_id in w_ids:
+            on_progress = None
+            if progress_queue is not None:
+                on_progress = lambda table, loaded, total, w_id=w_id: progress_queue.put((w_id, table, loaded, total))
+            generator = TPCCDataGenerator(pool, warehouse_rng(seed, w_id), on_progress, load_constants(seed))
+            rows += await generator.generate_warehouse(w_id)
+    finally:
+        await pool.close()
+    return rows
 
-    # 生成数据
-    print("开始生成 TPC-C 测试数据...")
-    await generator.generate_data(num_warehouses=1)
-    print("数据生成完成！")
+def _worker(w_ids: List[int], seed, progress_queue) -> int:
+    """worker 进程入口：使用自己的连接生成分配到的仓库，返回写入的行数"""
+    return asyncio.run(_generate_warehouses(w_ids, seed, progress_queue))
+
+async def generate_parallel(
+    num_warehouses: int = 1,
+    workers: int = 1,
+    seed=0,
+    on_progress: Optional[ProgressCallback] = None
+) -> Dict:
+    """
+    多进程生成 TPC-C 测试数据
+    商品只在主进程中生成一次，仓库按 w_id 轮流分配给 worker 进程，每个进程使用独立的数据库连接
+    """
+    loop = asyncio.get_event_loop()
+    start = loop.time()
 
-    # 关闭连接池
-    await pool.close()
+    # 库存引用商品，先生成商品
+    pool = await create_generator_pool(1)
+    try:
+        items = await TPCCDataGenerator(pool, item_rng(seed), on_progress, load_constants(seed)).generate_items()
+    finally:
+        await pool.close()
+
+    workers = max(1, min(workers, num_warehouses))
+    assignments = [list(range(w + 1, num_warehouses + 1, workers)) for w in range(workers)]
+
+    ctx = multiprocessing.get_context("spawn")
+    manager = ctx.Manager() if on_progress is not None else None
+    progress_queue = manager.Queue() if manager is not None else None
+
+    def relay_progress():
+        # 在主进程中转发 worker 的进度
+        while True:
+            message = progress_queue.get()
+            if message is None:
+                break
+            w_id, table, loaded, total = message
+            on_progress(f"{table}[w{w_id}]", loaded, total)
+
+    relay = None
+    if progress_queue is not None:
+        relay = threading.Thread(target=relay_progress, daemon=True)
+        relay.start()
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as executor:
+            rows = await asyncio.gather(*(
+                loop.run_in_executor(executor, _worker, w_ids, seed, progress_queue)
+                for w_ids in assignments
+            ))
+    finally:
+        if relay is not None:
+            progress_queue.put(None)
+            relay.join()
+            manager.shutdown()
+
+    elapsed = loop.time() - start
+    total_rows = items + sum(rows)
+    return {
+        "warehouses": num_warehouses,
+        "workers": workers,
+        "seed": seed,
+        "nurand": load_constants(seed).to_dict(),
+        "rows": total_rows,
+        "elapsed": elapsed,
+        "rowsPerSecond": total_rows / elapsed if elapsed > 0 else 0
+    }
+
+def print_progress(table: str, loaded: int, total: int) -> None:
+    print(f"  {table}: {loaded}/{total}")
+
+async def main(warehouses: int = 1, workers: int = 1, seed=0):
+    # 生成数据
+    print(f"开始生成 TPC-C 测试数据（{warehouses} 个仓库，{workers} 个进程，种子 {seed}）...")
+    result = await generate_parallel(warehouses, workers, seed, on_progress=print_progress)
+    print(
+        f"数据生成完成！{result['rows']} 行，耗时: {result['elapsed']:.2f} 秒，"
+        f"{result['rowsPerSecond']:.0f} 行/秒"
+    )
+    return result
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="生成 TPC-C 测试数据")
+    parser.add_argument("--warehouses", type=int, default=1, help="仓库数量")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(), help="生成数据的进程数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子，相同种子生成相同的数据")
+    args = parser.parse_args()
+    asyncio.run(main(args.warehouses, args.workers, args.seed))
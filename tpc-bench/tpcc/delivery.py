@@ -0,0 +1,215 @@
+"""
+延迟执行的配送事务（TPC-C 规范 2.7.2）
+终端提交配送请求后立即返回，由后台 worker 从队列中取出并执行；
+记录队列深度、排队时间和完成时间（从提交到执行完成）。
+"""
+import os
+import asyncio
+from typing import Dict, List, Optional
+
+import asyncpg
+
+from db import get_pool
+from logs import error_type, get_logger
+from metrics import LatencyHistogram, OperationStats
+from .isolation import RetryPolicy
+from .transactions import TPCCTransaction
+
+log = get_logger("tpcc.delivery")
+
+# 后台执行配送事务的 worker 数
+DELIVERY_WORKERS = int(os.getenv("TPCC_DELIVERY_WORKERS", "1"))
+# 等待执行的配送请求上限，队列满时提交失败
+DELIVERY_QUEUE_SIZE = int(os.getenv("TPCC_DELIVERY_QUEUE_SIZE", "1000"))
+
+class DeliveryQueue:
+    """配送请求队列和后台 worker（在首次提交时启动）"""
+
+    def __init__(
+        self,
+        pool: Optional[asyncpg.Pool] = None,
+        workers: int = DELIVERY_WORKERS,
+        max_size: int = DELIVERY_QUEUE_SIZE,
+        isolation: Optional[Dict[str, str]] = None,
+        retry: Optional[RetryPolicy] = None
+    ):
+        self.pool = pool
+        self.isolation = isolation
+        self.retry = retry
+        self.workers = max(1, workers)
+        self.max_size = max_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self.submitted = 0
+        self.rejected = 0
+        self.max_depth = 0
+        self.delivered_orders = 0
+        self.skipped_districts = 0
+        # 序列化失败和死锁的重试次数
+        self.retries = 0
+        # 最近一次 drain 是否在超时前执行完
+        self.drained = True
+        # 完成时间（提交到执行完成，毫秒），按成功/失败计数
+        self.completion = OperationStats()
+        # 排队时间（提交到开始执行，毫秒）
+        self.queue_time = LatencyHistogram()
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _ensure_started(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_size)
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def submit(self, w_id: int, carrier_id: int) -> Dict:
+        """提交配送请求，立即返回（结果格式与事务一致）"""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((asyncio.get_event_loop().time(), w_id, carrier_id))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return {
+                "success": False,
+                "message": "配送队列已满",
+                "error_type": "DeliveryQueueFull",
+                "data": None
+            }
+        self.submitted += 1
+        depth = self._queue.qsize()
+        self.max_depth = max(self.max_depth, depth)
+        return {
+            "success": True,
+            "data": {
+                "queued": True,
+                "warehouse_id": w_id,
+                "carrier_id": carrier_id,
+                "queue_depth": depth
+            }
+        }
+
+    async def _worker(self) -> None:
+        loop = asyncio.get_event_loop()
+        tpcc = None
+        while True:
+            queued_at, w_id, carrier_id = await self._queue.get()
+            started = loop.time()
+            self.queue_time.record((started - queued_at) * 1000)
+            try:
+                if tpcc is None:
+                    tpcc = TPCCTransaction(self.pool or await get_pool(), self.isolation, self.retry)
+                result = await tpcc.delivery(w_id, carrier_id)
+                self.retries += tpcc.last_retries
+            except Exception as e:
+                log.error("delivery_queue_failed", exc=e, w_id=w_id)
+                result = {"success": False, "error_type": error_type(e), "data": None}
+            finally:
+                self._queue.task_done()
+
+            success = result.get("success", False)
+            self.completion.record(success, (loop.time() - queued_at) * 1000, result.get("error_type"))
+            if success:
+                data = result["data"]
+                self.delivered_orders += len(data["delivered"])
+                self.skipped_districts += len(data["skipped_districts"])
+                if log.debug_enabled:
+                    log.debug(
+                        "delivery_completed",
+                        w_id=w_id,
+                        carrier_id=carrier_id,
+                        delivered=len(data["delivered"]),
+                        skipped=data["skipped_districts"],
+                        queueTime=(started - queued_at) * 1000,
+                        completionTime=(loop.time() - queued_at) * 1000
+                    )
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """等待队列中的请求全部执行完，返回是否在超时前完成"""
+        if self._queue is None:
+            return True
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+            self.drained = True
+        except asyncio.TimeoutError:
+            self.drained = False
+        return self.drained
+
+    async def stop(self) -> None:
+        """停止后台 worker（未执行的请求被丢弃）"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def __getstate__(self) -> Dict:
+        # 只传递统计（多进程负载时由子进程返回），连接池和后台任务不跨进程
+        state = dict(self.__dict__)
+        state.update(pool=None, _queue=None, _tasks=[])
+        return state
+
+    def merge(self, other: "DeliveryQueue") -> None:
+        """合并另一个队列的统计"""
+        self.workers += other.workers
+        self.submitted += other.submitted
+        self.rejected += other.rejected
+        self.max_depth = max(self.max_depth, other.max_depth)
+        self.delivered_orders += other.delivered_orders
+        self.skipped_districts += other.skipped_districts
+        self.retries += other.retries
+        self.drained = self.drained and other.drained
+        self.completion.merge(other.completion)
+        self.queue_time.merge(other.queue_time)
+
+    def to_state(self) -> Dict:
+        """可 JSON 序列化的统计（分布式负载时由代理返回）"""
+        return {
+            "workers": self.workers,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "maxDepth": self.max_depth,
+            "deliveredOrders": self.delivered_orders,
+            "skippedDistricts": self.skipped_districts,
+            "retries": self.retries,
+            "drained": self.drained,
+            "completion": self.completion.to_state(),
+            "queueTime": self.queue_time.to_state()
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> "DeliveryQueue":
+        delivery_queue = cls(workers=state["workers"])
+        delivery_queue.submitted = state["submitted"]
+        delivery_queue.rejected = state["rejected"]
+        delivery_queue.max_depth = state["maxDepth"]
+        delivery_queue.delivered_orders = state["deliveredOrders"]
+        delivery_queue.skipped_districts = state["skippedDistricts"]
+        delivery_queue.retries = state["retries"]
+        delivery_queue.drained = state["drained"]
+        delivery_queue.completion = OperationStats.from_state(state["completion"])
+        delivery_queue.queue_time = LatencyHistogram.from_state(state["queueTime"])
+        return delivery_queue
+
+    def get_stats(self) -> Dict:
+        completion = self.completion.to_dict(0)
+        return {
+            "workers": self.workers,
+            "drained": self.drained,
+            "queueDepth": self.depth,
+            "maxQueueDepth": self.max_depth,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "completed": completion["successful"],
+            "failed": completion["failed"],
+            "errors": completion["errors"],
+            "deliveredOrders": self.delivered_orders,
+            "skippedDistricts": self.skipped_districts,
+            "retries": self.retries,
+            "avgCompletionTime": completion["avgResponseTime"],
+            "completionTime": completion["percentiles"],
+            "queueTime": self.queue_time.percentiles()
+        }
+
+# /api/tpcc/delivery 延迟执行时使用的全局队列
+DELIVERY_QUEUE = DeliveryQueue()
@@ -0,0 +1,105 @@
+"""
+TPC-C 规范中的随机分布（TPC-C 规范 2.1.6、4.3.2）
+包括 NURand 非均匀分布、由音节表生成的 C_LAST、a-string / n-string 随机字符串，
+以及 10% 含 "ORIGINAL" 的 I_DATA / S_DATA。
+"""
+import random
+import string
+from typing import Dict, Optional
+
+# C_LAST 的音节表（规范 4.3.2.3）
+SYLLABLES = ["BAR", "OUGHT", "ABLE", "PRI", "PRES", "ESE", "ANTI", "CALLY", "ATION", "EING"]
+
+ALPHANUMERIC = string.ascii_letters + string.digits
+NUMERIC = string.digits
+
+# 随机字符串从预先生成的字符池中按随机偏移截取，避免逐字符调用随机数
+_POOL_SIZE = 1 << 18
+_pools: Dict[str, str] = {}
+
+def _pool(alphabet: str) -> str:
+    pool = _pools.get(alphabet)
+    if pool is None:
+        # 字符池使用固定种子，保证同一种子生成的数据一致
+        pool = "".join(random.Random(alphabet).choices(alphabet, k=_POOL_SIZE))
+        _pools[alphabet] = pool
+    return pool
+
+def last_name(num: int) -> str:
+    """将 0~999 的数字按百、十、个位映射为三个音节"""
+    return SYLLABLES[num // 100] + SYLLABLES[num // 10 % 10] + SYLLABLES[num % 10]
+
+class TPCCRandom(random.Random):
+    """带 TPC-C 规范随机函数的随机数生成器"""
+
+    def fork(self) -> "TPCCRandom":
+        """派生一个独立的生成器（并发生成多张表时各自使用，保证结果与调度顺序无关）"""
+        return TPCCRandom(self.getrandbits(64))
+
+    def number(self, low: int, high: int) -> int:
+        """[low, high] 内的均匀随机整数（比 randint 开销小）"""
+        return low + int(self.random() * (high - low + 1))
+
+    def nurand(self, a: int, x: int, y: int, c: int) -> int:
+        """NURand(A, x, y) = (((random(0, A) | random(x, y)) + C) % (y - x + 1)) + x"""
+        return (((self.number(0, a) | self.number(x, y)) + c) % (y - x + 1)) + x
+
+    def _string(self, alphabet: str, low: int, high: int) -> str:
+        length = low if low == high else self.number(low, high)
+        offset = int(self.random() * (_POOL_SIZE - length))
+        return _pool(alphabet)[offset:offset + length]
+
+    def a_string(self, low: int, high: int) -> str:
+        """长度在 [low, high] 内的随机字母数字串"""
+        return self._string(ALPHANUMERIC, low, high)
+
+    def n_string(self, low: int, high: int) -> str:
+        """长度在 [low, high] 内的随机数字串"""
+        return self._string(NUMERIC, low, high)
+
+    def state(self) -> str:
+        return self._string(string.ascii_uppercase, 2, 2)
+
+    def zip_code(self) -> str:
+        """4 位随机数字加 '11111'"""
+        return self.n_string(4, 4) + "11111"
+
+    def data_string(self, low: int = 26, high: int = 50) -> str:
+        """I_DATA / S_DATA：其中 10% 在随机位置包含 'ORIGINAL'"""
+        data = self.a_string(low, high)
+        if self.random() < 0.1:
+            pos = self.number(0, len(data) - 8)
+            data = data[:pos] + "ORIGINAL" + data[pos + 8:]
+        return data
+
+    def tax(self) -> float:
+        """[0.0000, 0.2000]"""
+        return self.number(0, 2000) / 10000
+
+class NURandConstants:
+    """
+    NURand 的常数 C（规范 2.1.6）
+    C_LAST 在装载时和运行时取不同的值，二者之差需满足规范 2.1.6.1 的约束
+    """
+
+    def __init__(self, c_last: int, c_id: int, ol_i_id: int):
+        self.c_last = c_last
+        self.c_id = c_id
+        self.ol_i_id = ol_i_id
+
+    @classmethod
+    def for_load(cls, rng: random.Random) -> "NURandConstants":
+        return cls(rng.randint(0, 255), rng.randint(0, 1023), rng.randint(0, 8191))
+
+    @classmethod
+    def for_run(cls, load: "NURandConstants", rng: Optional[random.Random] = None) -> "NURandConstants":
+        """运行时的常数：C_ID 与 OL_I_ID 沿用装载值，C_LAST 的差值在 [65, 119] 内且不为 96、112"""
+        rng = rng or random.Random()
+        while True:
+            c_last = rng.randint(0, 255)
+            delta = abs(c_last - load.c_last)
+            if 65 <= delta <= 119 and delta not in (96, 112):
+                return cls(c_last, load.c_id, load.ol_i_id)
+
+    def to_dict(self) -> Dict:
+        return {"cLast": self.c_last, "cId": self.c_id, "olIId": self.ol_i_id}
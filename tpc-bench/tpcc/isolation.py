@@ -0,0 +1,83 @@
+"""
+TPC-C 事务的隔离级别和重试策略
+每种事务类型可分别配置隔离级别（READ COMMITTED / REPEATABLE READ / SERIALIZABLE）；
+序列化失败（40001）和死锁（40P01）时整个事务按带抖动的指数退避自动重试，
+重试次数用尽后才记为失败。
+"""
+import os
+import random
+from typing import Dict, Mapping, Optional
+
+# TPC-C 的五种事务类型
+TRANSACTION_TYPES = ["NEW_ORDER", "PAYMENT", "ORDER_STATUS", "DELIVERY", "STOCK_LEVEL"]
+
+# 隔离级别名称 -> asyncpg 的 isolation 参数
+ISOLATION_LEVELS = {
+    "READ COMMITTED": "read_committed",
+    "REPEATABLE READ": "repeatable_read",
+    "SERIALIZABLE": "serializable"
+}
+
+# 可重试的 SQLSTATE：serialization_failure、deadlock_detected
+RETRYABLE_SQLSTATES = {"40001", "40P01"}
+
+# 单个事务的最大重试次数
+MAX_RETRIES = int(os.getenv("TPCC_MAX_RETRIES", "5"))
+# 第一次重试的退避上限（秒），之后每次翻倍
+RETRY_BASE_DELAY = float(os.getenv("TPCC_RETRY_BASE_DELAY", "0.01"))
+# 退避上限（秒）
+RETRY_MAX_DELAY = float(os.getenv("TPCC_RETRY_MAX_DELAY", "1"))
+
+def parse_isolation(level: str) -> str:
+    """接受 "REPEATABLE READ"、"repeatable_read" 等写法，返回 asyncpg 的隔离级别名"""
+    name = level.strip().upper().replace("_", " ").replace("-", " ")
+    if name not in ISOLATION_LEVELS:
+        raise ValueError(f"不支持的隔离级别: {level}（可选 {', '.join(ISOLATION_LEVELS)}）")
+    return ISOLATION_LEVELS[name]
+
+def isolation_name(isolation: str) -> str:
+    return isolation.replace("_", " ").upper()
+
+def load_default_isolation(environ: Mapping[str, str] = os.environ) -> Dict[str, str]:
+    """默认隔离级别：TPCC_ISOLATION 作用于全部事务类型，TPCC_ISOLATION_<类型> 覆盖单个类型"""
+    return {
+        transaction_type: parse_isolation(
+            environ.get(f"TPCC_ISOLATION_{transaction_type}") or environ.get("TPCC_ISOLATION", "READ COMMITTED")
+        )
+        for transaction_type in TRANSACTION_TYPES
+    }
+
+DEFAULT_ISOLATION = load_default_isolation()
+
+def resolve_isolation(overrides: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """在默认隔离级别上应用按事务类型的覆盖（未知类型或级别时抛出 ValueError）"""
+    isolation = dict(DEFAULT_ISOLATION)
+    for transaction_type, level in (overrides or {}).items():
+        if transaction_type not in isolation:
+            raise ValueError(f"不支持的事务类型: {transaction_type}")
+        isolation[transaction_type] = parse_isolation(level)
+    return isolation
+
+def is_retryable(exc: BaseException) -> bool:
+    """异常（或其包装的原始异常）是否为可重试的序列化失败或死锁"""
+    while exc is not None:
+        if getattr(exc, "sqlstate", None) in RETRYABLE_SQLSTATES:
+            return True
+        exc = exc.__cause__
+    return False
+
+class RetryPolicy:
+    """带完全抖动的指数退避：第 n 次重试前等待 [0, min(max_delay, base_delay * 2^(n-1))] 内的随机时间"""
+
+    def __init__(
+        self,
+        max_retries: int = MAX_RETRIES,
+        base_delay: float = RETRY_BASE_DELAY,
+        max_delay: float = RETRY_MAX_DELAY
+    ):
+        self.max_retries = max(0, max_retries)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
@@ -0,0 +1,109 @@
+"""
+TPC-C 运行报告（规范 5.4、5.5）
+根据测量区间内的统计计算 tpmC（每分钟提交的新订单数，不含回滚），
+给出各事务类型的比例、第 90 百分位响应时间与规范限制的比较、回滚和失败次数，
+以及事务比例和响应时间约束是否满足的结论。
+"""
+from typing import Dict, Optional
+
+from metrics import RunStats
+from .isolation import TRANSACTION_TYPES
+
+# 各事务类型在全部事务中的最低比例（%，规范 5.2.3）
+MIN_MIX = {
+    "PAYMENT": 43.0,
+    "ORDER_STATUS": 4.0,
+    "DELIVERY": 4.0,
+    "STOCK_LEVEL": 4.0
+}
+
+# 第 90 百分位响应时间上限（秒，规范 5.2.5.4）
+RESPONSE_TIME_LIMITS = {
+    "NEW_ORDER": 5,
+    "PAYMENT": 5,
+    "ORDER_STATUS": 5,
+    "DELIVERY": 5,
+    "STOCK_LEVEL": 20
+}
+
+# 延迟配送从入队到完成的第 90 百分位上限（秒，规范 2.7.2.2）
+DEFERRED_DELIVERY_LIMIT = 80
+
+def build_tpcc_report(
+    stats: RunStats,
+    duration: float,
+    rollbacks: Dict[str, int],
+    delivery_queue: Optional[Dict] = None,
+    retries: Optional[Dict[str, int]] = None
+) -> Dict:
+    """
+    stats 为测量区间内的统计（不含预热），duration 为测量区间时长（秒），
+    rollbacks 为按事务类型的回滚次数，delivery_queue 为延迟配送队列的统计（如有），
+    retries 为按事务类型的重试次数（序列化失败和死锁后自动重试，不计入事务次数）
+    """
+    retries = retries or {}
+    total = stats.overall.total
+    minutes = duration / 60 if duration > 0 else 0
+    violations = []
+    transactions = {}
+
+    for transaction_type in TRANSACTION_TYPES:
+        tstats = stats.by_key.get(transaction_type)
+        count = tstats.total if tstats else 0
+        rolled_back = rollbacks.get(transaction_type, 0)
+        mix = count / total * 100 if total else 0
+        p90 = tstats.histogram.percentile(90) if tstats else 0
+        limit = RESPONSE_TIME_LIMITS[transaction_type]
+
+        mix_ok = mix >= MIN_MIX.get(transaction_type, 0)
+        response_ok = p90 <= limit * 1000
+        if not mix_ok:
+            violations.append(f"{transaction_type} 比例 {mix:.2f}% 低于 {MIN_MIX[transaction_type]}%")
+        if not response_ok:
+            violations.append(f"{transaction_type} 第 90 百分位响应时间 {p90 / 1000:.3f}s 超过 {limit}s")
+
+        transactions[transaction_type] = {
+            "count": count,
+            "committed": (tstats.successful if tstats else 0) - rolled_back,
+            "rolledBack": rolled_back,
+            "aborted": tstats.failed if tstats else 0,
+            "retries": retries.get(transaction_type, 0),
+            "errors": dict(tstats.errors) if tstats else {},
+            "mix": mix,
+            "minMix": MIN_MIX.get(transaction_type),
+            "mixOk": mix_ok,
+            "p90ResponseTime": p90,
+            "responseTimeLimit": limit * 1000,
+            "responseTimeOk": response_ok
+        }
+
+    new_order_rolled_back = rollbacks.get("NEW_ORDER", 0)
+    new_order_count = transactions["NEW_ORDER"]["count"]
+    new_orders_committed = transactions["NEW_ORDER"]["committed"]
+
+    report = {
+        "tpmC": new_orders_committed / minutes if minutes else 0,
+        "measurementInterval": duration,
+        "totalTransactions": total,
+        "newOrdersCommitted": new_orders_committed,
+        "newOrderRollbackRate": new_order_rolled_back / new_order_count * 100 if new_order_count else 0,
+        "rollbacks": sum(rollbacks.values()),
+        "aborts": stats.overall.failed,
+        "retries": sum(retries.values()),
+        "transactions": transactions
+    }
+
+    if delivery_queue is not None:
+        completion_p90 = delivery_queue["completionTime"]["p90"]
+        deferred_ok = completion_p90 <= DEFERRED_DELIVERY_LIMIT * 1000 and delivery_queue.get("drained", True)
+        if not deferred_ok:
+            violations.append(f"延迟配送第 90 百分位完成时间 {completion_p90 / 1000:.3f}s 超过 {DEFERRED_DELIVERY_LIMIT}s 或未执行完")
+        report["deferredDelivery"] = {
+            "p90CompletionTime": completion_p90,
+            "completionTimeLimit": DEFERRED_DELIVERY_LIMIT * 1000,
+            "completionTimeOk": deferred_ok
+        }
+
+    report["violations"] = violations
+    report["passed"] = total > 0 and not violations
+    return report
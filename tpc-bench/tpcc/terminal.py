@@ -0,0 +1,204 @@
+"""
+TPC-C 终端模拟（规范 2.4.1、5.2）
+每个终端绑定一个仓库和地区，按 45/43/4/4/4 的洗牌卡组选择事务类型，
+按规范生成输入：客户和商品ID服从 NURand 分布，1% 的订单项由其他仓库供应，
+1% 的新订单包含不存在的商品而回滚；付款和订单状态事务 60% 按姓氏选择客户，
+15% 的付款属于其他仓库的客户；可选模拟录入时间（keying time）和思考时间（think time）。
+"""
+import random
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+from driver import sample_think_time
+from .data_generator import CUSTOMERS_PER_DISTRICT, DISTRICTS_PER_WAREHOUSE, ITEMS, load_constants
+from .distributions import NURandConstants, TPCCRandom, last_name
+
+# 每 100 张卡中各事务类型的张数（规范 5.2.3 的最低比例）
+TRANSACTION_MIX = {
+    "NEW_ORDER": 45,
+    "PAYMENT": 43,
+    "ORDER_STATUS": 4,
+    "DELIVERY": 4,
+    "STOCK_LEVEL": 4
+}
+
+# 录入时间（秒，规范 5.2.5.7）
+KEYING_TIMES = {
+    "NEW_ORDER": 18,
+    "PAYMENT": 3,
+    "ORDER_STATUS": 2,
+    "DELIVERY": 2,
+    "STOCK_LEVEL": 2
+}
+
+# 平均思考时间（秒，规范 5.2.5.7）
+THINK_TIMES = {
+    "NEW_ORDER": 12,
+    "PAYMENT": 12,
+    "ORDER_STATUS": 10,
+    "DELIVERY": 5,
+    "STOCK_LEVEL": 5
+}
+
+# 订单项由其他仓库供应的比例
+REMOTE_SUPPLY_RATE = 0.01
+# 付款和订单状态事务按姓氏选择客户的比例（规范 2.5.1.2、2.6.1.2）
+BY_LAST_NAME_RATE = 0.6
+# 付款事务的客户属于其他仓库的比例（规范 2.5.1.2）
+REMOTE_PAYMENT_RATE = 0.15
+# 新订单回滚（最后一个订单项使用不存在的商品）的比例
+ROLLBACK_RATE = 0.01
+# 不存在的商品ID
+UNUSED_ITEM_ID = ITEMS + 1
+
+class TransactionDeck:
+    """洗牌卡组：每轮按比例发出全部卡片，保证任意 100 次中的比例与 TRANSACTION_MIX 一致"""
+
+    def __init__(self, rng: random.Random, transaction_types: Optional[List[str]] = None):
+        types = transaction_types or list(TRANSACTION_MIX)
+        self.rng = rng
+        self.cards = [t for t in types for _ in range(TRANSACTION_MIX[t])]
+        self._pending: List[str] = []
+
+    def next(self) -> str:
+        if not self._pending:
+            self._pending = list(self.cards)
+            self.rng.shuffle(self._pending)
+        return self._pending.pop()
+
+class Terminal:
+    """绑定到 (w_id, d_id) 的终端，生成事务类型和输入参数"""
+
+    def __init__(
+        self,
+        terminal_id: int,
+        w_id: int,
+        d_id: int,
+        warehouses: int,
+        rng: TPCCRandom,
+        constants: NURandConstants,
+        transaction_types: Optional[List[str]] = None
+    ):
+        self.terminal_id = terminal_id
+        self.w_id = w_id
+        self.d_id = d_id
+        self.warehouses = warehouses
+        self.rng = rng
+        self.constants = constants
+        self.deck = TransactionDeck(rng, transaction_types)
+        self.last_type: Optional[str] = None
+
+    def customer_id(self) -> int:
+        return self.rng.nurand(1023, 1, CUSTOMERS_PER_DISTRICT, self.constants.c_id)
+
+    def customer_last_name(self) -> str:
+        return last_name(self.rng.nurand(255, 0, 999, self.constants.c_last))
+
+    def customer(self) -> Dict:
+        """60% 按姓氏、40% 按客户ID选择客户"""
+        if self.rng.random() < BY_LAST_NAME_RATE:
+            return {"c_last": self.customer_last_name()}
+        return {"c_id": self.customer_id()}
+
+    def item_id(self) -> int:
+        return self.rng.nurand(8191, 1, ITEMS, self.constants.ol_i_id)
+
+    def district_id(self) -> int:
+        return self.rng.number(1, DISTRICTS_PER_WAREHOUSE)
+
+    def remote_warehouse(self) -> int:
+        """随机选择另一个仓库"""
+        w_id = self.rng.number(1, self.warehouses - 1)
+        return w_id + 1 if w_id >= self.w_id else w_id
+
+    def new_order_params(self) -> Dict:
+        rng = self.rng
+        ol_cnt = rng.number(5, 15)
+        rollback = rng.random() < ROLLBACK_RATE
+        items = []
+        for number in range(1, ol_cnt + 1):
+            supply_w_id = self.w_id
+            if self.warehouses > 1 and rng.random() < REMOTE_SUPPLY_RATE:
+                supply_w_id = self.remote_warehouse()
+            items.append({
+                "i_id": UNUSED_ITEM_ID if rollback and number == ol_cnt else self.item_id(),
+                "supply_w_id": supply_w_id,
+                "quantity": rng.number(1, 10)
+            })
+        return {"w_id": self.w_id, "d_id": self.district_id(), "c_id": self.customer_id(), "items": items}
+
+    def payment_params(self) -> Dict:
+        d_id = self.district_id()
+        # 85% 为本仓库本地区的客户，15% 为其他仓库随机地区的客户
+        c_w_id, c_d_id = self.w_id, d_id
+        if self.warehouses > 1 and self.rng.random() < REMOTE_PAYMENT_RATE:
+            c_w_id, c_d_id = self.remote_warehouse(), self.district_id()
+        return {
+            "w_id": self.w_id,
+            "d_id": d_id,
+            "c_w_id": c_w_id,
+            "c_d_id": c_d_id,
+            "c_id": None,
+            **self.customer(),
+            "amount": self.rng.number(100, 500000) / 100
+        }
+
+    def order_status_params(self) -> Dict:
+        return {"w_id": self.w_id, "d_id": self.district_id(), **self.customer()}
+
+    def delivery_params(self) -> Dict:
+        return {"w_id": self.w_id, "carrier_id": self.rng.number(1, 10)}
+
+    def stock_level_params(self) -> Dict:
+        # 库存水平事务使用终端所属的地区
+        return {"w_id": self.w_id, "d_id": self.d_id, "threshold": self.rng.number(10, 20)}
+
+    def next_transaction(self) -> Tuple[str, Dict]:
+        transaction_type = self.deck.next()
+        builders = {
+            "NEW_ORDER": self.new_order_params,
+            "PAYMENT": self.payment_params,
+            "ORDER_STATUS": self.order_status_params,
+            "DELIVERY": self.delivery_params,
+            "STOCK_LEVEL": self.stock_level_params
+        }
+        return transaction_type, builders[transaction_type]()
+
+async def _sleep_until(seconds: float, deadline: float) -> None:
+    loop = asyncio.get_event_loop()
+    seconds = min(seconds, deadline - loop.time())
+    if seconds > 0:
+        await asyncio.sleep(seconds)
+
+async def keying(transaction_type: str, scale: float, deadline: float) -> None:
+    """模拟录入时间（scale 为相对规范的倍数，0 表示不等待），不超过 deadline"""
+    if scale > 0:
+        await _sleep_until(KEYING_TIMES[transaction_type] * scale, deadline)
+
+async def think(transaction_type: str, scale: float, deadline: float) -> None:
+    """按负指数分布模拟思考时间，不超过 deadline"""
+    if scale > 0:
+        await _sleep_until(sample_think_time(THINK_TIMES[transaction_type] * scale), deadline)
+
+def build_terminals(
+    count: int,
+    warehouses: int,
+    seed=None,
+    load_seed=0,
+    transaction_types: Optional[List[str]] = None
+) -> List[Terminal]:
+    """
+    创建 count 个终端，依次绑定到各仓库的各地区（先遍历仓库，再遍历地区）。
+    NURand 的运行常数由数据生成时的种子 load_seed 推算；指定 seed 时输入序列可复现
+    """
+    constants = NURandConstants.for_run(
+        load_constants(load_seed),
+        random.Random(f"{seed}:nurand") if seed is not None else None
+    )
+    terminals = []
+    for i in range(count):
+        w_id = i % warehouses + 1
+        d_id = (i // warehouses) % DISTRICTS_PER_WAREHOUSE + 1
+        rng = TPCCRandom(f"{seed}:terminal:{i}") if seed is not None else TPCCRandom()
+        terminals.append(Terminal(i, w_id, d_id, warehouses, rng, constants, transaction_types))
+    return terminals
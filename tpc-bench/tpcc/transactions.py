@@ -1,14 +1,348 @@
 import asyncio
 import random
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
 
 import asyncpg
-import traceback
+
+from logs import error_type, get_logger
+from statements import STATEMENTS
+from .isolation import DEFAULT_ISOLATION, RetryPolicy, is_retryable
+
+log = get_logger("tpcc")
+
+# 每个仓库的地区数
+DISTRICTS_PER_WAREHOUSE = 10
+
+class InvalidItemError(ValueError):
+    """新订单包含不存在的商品，事务回滚（规范 2.4.2.3 规定 1% 的新订单以此回滚）"""
+
+# 事务使用的全部 SQL，注册为服务端预备语句（每个连接首次执行时准备）
+NEW_ORDER_CUSTOMER = STATEMENTS.register("tpcc.new_order.customer", """
+    SELECT c_id, c_first, c_middle, c_last, c_balance
+    FROM tpcc_customer
+    WHERE c_w_id = $1 AND c_d_id = $2 AND c_id = $3
+""")
+# 分配订单ID：未指定 $3 时取 d_next_o_id，指定时使用 $3；
+# 只有 $3 不小于 d_next_o_id 时才推进到 $3 之后，指定更小的ID时 d_next_o_id 保持不变，不产生空洞
+NEW_ORDER_NEXT_ORDER_ID = STATEMENTS.register("tpcc.new_order.next_order_id", """
+    UPDATE tpcc_district
+    SET d_next_o_id = CASE
+        WHEN $3::integer IS NULL OR $3::integer >= d_next_o_id THEN COALESCE($3::integer, d_next_o_id) + 1
+        ELSE d_next_o_id
+    END
+    WHERE d_w_id = $1 AND d_id = $2
+    RETURNING COALESCE($3::integer, d_next_o_id - 1) AS o_id
+""")
+# 订单和新订单记录在一条语句中写入
+NEW_ORDER_INSERT_ORDER = STATEMENTS.register("tpcc.new_order.insert_order", """
+    WITH new_order AS (
+        INSERT INTO tpcc_orders (
+            o_w_id, o_d_id, o_id, o_c_id, o_carrier_id,
+            o_ol_cnt, o_all_local, o_entry_d
+        ) VALUES ($1, $2, $3, $4, NULL, $5, $6, CURRENT_TIMESTAMP)
+        RETURNING o_w_id, o_d_id, o_id
+    )
+    INSERT INTO tpcc_new_order (no_w_id, no_d_id, no_o_id)
+    SELECT o_w_id, o_d_id, o_id FROM new_order
+""")
+NEW_ORDER_ITEMS = STATEMENTS.register("tpcc.new_order.items", """
+    SELECT i_id, i_price
+    FROM tpcc_item
+    WHERE i_id = ANY($1::integer[])
+""")
+# 一条语句更新全部订单项的库存（规范 2.4.2.2），同一商品的多个订单项先合并；
+# 先按主键顺序加锁，避免并发新订单以不同顺序更新库存时死锁
+NEW_ORDER_UPDATE_STOCK = STATEMENTS.register("tpcc.new_order.update_stock", """
+    WITH lines AS (
+        SELECT
+            i_id,
+            supply_w_id,
+            SUM(quantity) AS quantity,
+            COUNT(*) AS order_cnt,
+            COUNT(*) FILTER (WHERE supply_w_id <> $1) AS remote_cnt
+        FROM unnest($3::integer[], $4::integer[], $5::integer[]) AS t(i_id, supply_w_id, quantity)
+        GROUP BY i_id, supply_w_id
+    ),
+    locked AS (
+        SELECT s.s_w_id, s.s_i_id
+        FROM tpcc_stock s
+        JOIN lines l ON s.s_w_id = l.supply_w_id AND s.s_i_id = l.i_id
+        ORDER BY s.s_w_id, s.s_i_id
+        FOR UPDATE OF s
+    )
+    UPDATE tpcc_stock s
+    SET s_quantity = CASE
+            WHEN s.s_quantity >= l.quantity + 10 THEN s.s_quantity - l.quantity
+            ELSE s.s_quantity - l.quantity + 91
+        END,
+        s_ytd = s.s_ytd + l.quantity,
+        s_order_cnt = s.s_order_cnt + l.order_cnt,
+        s_remote_cnt = s.s_remote_cnt + l.remote_cnt
+    FROM lines l, locked k
+    WHERE s.s_w_id = l.supply_w_id AND s.s_i_id = l.i_id
+    AND k.s_w_id = s.s_w_id AND k.s_i_id = s.s_i_id
+    RETURNING s.s_i_id, s.s_w_id, s.s_quantity,
+        CASE $2::integer
+            WHEN 1 THEN s.s_dist_01 WHEN 2 THEN s.s_dist_02 WHEN 3 THEN s.s_dist_03
+            WHEN 4 THEN s.s_dist_04 WHEN 5 THEN s.s_dist_05 WHEN 6 THEN s.s_dist_06
+            WHEN 7 THEN s.s_dist_07 WHEN 8 THEN s.s_dist_08 WHEN 9 THEN s.s_dist_09
+            ELSE s.s_dist_10
+        END AS dist_info
+""")
+# 全部订单项通过一条多行 INSERT 写入
+NEW_ORDER_INSERT_ORDER_LINES = STATEMENTS.register("tpcc.new_order.insert_order_lines", """
+    INSERT INTO tpcc_order_line (
+        ol_w_id, ol_d_id, ol_o_id, ol_number,
+        ol_i_id, ol_supply_w_id, ol_quantity,
+        ol_amount, ol_dist_info
+    )
+    SELECT $1::integer, $2::integer, $3::integer, t.*
+    FROM unnest(
+        $4::integer[], $5::integer[], $6::integer[], $7::integer[], $8::numeric[], $9::text[]
+    ) AS t(ol_number, ol_i_id, ol_supply_w_id, ol_quantity, ol_amount, ol_dist_info)
+""")
+
+def _customer_by_last_name(columns: str) -> str:
+    """按姓氏选择客户：同姓客户按 c_first 排序后取第 ceil(n/2) 个（规范 2.5.2.2、2.6.2.2）"""
+    return f"""
+    SELECT {columns}
+    FROM (
+        SELECT {columns}, row_number() OVER (ORDER BY c_first) AS position, count(*) OVER () AS matches
+        FROM tpcc_customer
+        WHERE c_w_id = $1 AND c_d_id = $2 AND c_last = $3
+    ) c
+    WHERE position = (matches + 1) / 2
+"""
+
+PAYMENT_CUSTOMER = STATEMENTS.register("tpcc.payment.customer", """
+    SELECT c_id, c_balance, c_ytd_payment, c_payment_cnt, c_credit, c_data
+    FROM tpcc_customer
+    WHERE c_w_id = $1 AND c_d_id = $2 AND c_id = $3
+""")
+PAYMENT_CUSTOMER_BY_LAST_NAME = STATEMENTS.register(
+    "tpcc.payment.customer_by_last_name",
+    _customer_by_last_name("c_id, c_balance, c_ytd_payment, c_payment_cnt, c_credit, c_data")
+)
+PAYMENT_UPDATE_CUSTOMER = STATEMENTS.register("tpcc.payment.update_customer", """
+    UPDATE tpcc_customer
+    SET c_balance = $1, c_ytd_payment = $2, c_payment_cnt = $3
+    WHERE c_w_id = $4 AND c_d_id = $5 AND c_id = $6
+""")
+PAYMENT_UPDATE_WAREHOUSE = STATEMENTS.register(
+    "tpcc.payment.update_warehouse",
+    "UPDATE tpcc_warehouse SET w_ytd = w_ytd + $1 WHERE w_id = $2"
+)
+PAYMENT_UPDATE_DISTRICT = STATEMENTS.register(
+    "tpcc.payment.update_district",
+    "UPDATE tpcc_district SET d_ytd = d_ytd + $1 WHERE d_w_id = $2 AND d_id = $3"
+)
+PAYMENT_INSERT_HISTORY = STATEMENTS.register("tpcc.payment.insert_history", """
+    INSERT INTO tpcc_history (h_c_id, h_c_d_id, h_c_w_id, h_d_id, h_w_id, h_date, h_amount, h_data)
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+""")
+
+ORDER_STATUS_CUSTOMER = STATEMENTS.register("tpcc.order_status.customer", """
+    SELECT c_id, c_balance, c_first, c_middle, c_last
+    FROM tpcc_customer
+    WHERE c_w_id = $1 AND c_d_id = $2 AND c_id = $3
+""")
+ORDER_STATUS_CUSTOMER_BY_LAST_NAME = STATEMENTS.register(
+    "tpcc.order_status.customer_by_last_name",
+    _customer_by_last_name("c_id, c_balance, c_first, c_middle, c_last")
+)
+# 最近 10 个订单及其全部订单项，一次取回（按订单ID降序、订单项序号升序）
+ORDER_STATUS_ORDERS = STATEMENTS.register("tpcc.order_status.orders", """
+    SELECT
+        o.o_id, o.o_entry_d, o.o_carrier_id,
+        ol.ol_number, ol.ol_i_id, ol.ol_supply_w_id, ol.ol_quantity, ol.ol_amount, ol.ol_delivery_d
+    FROM (
+        SELECT o_id, o_entry_d, o_carrier_id
+        FROM tpcc_orders
+        WHERE o_w_id = $1 AND o_d_id = $2 AND o_c_id = $3
+        ORDER BY o_id DESC
+        LIMIT 10
+    ) o
+    LEFT JOIN tpcc_order_line ol
+        ON ol.ol_w_id = $1 AND ol.ol_d_id = $2 AND ol.ol_o_id = o.o_id
+    ORDER BY o.o_id DESC, ol.ol_number
+""")
+
+# 规范 2.7.4：一条语句处理仓库全部地区最早的未配送订单——删除新订单记录、设置承运人、
+# 更新订单项配送时间，并按订单项金额之和（SUM(ol_amount)）更新客户余额和配送次数。
+# 某地区没有未配送订单（或已被并发的配送事务取走）时该地区跳过
+DELIVERY_BATCH = STATEMENTS.register("tpcc.delivery.batch", """
+    WITH oldest AS (
+        SELECT no_d_id AS d_id, MIN(no_o_id) AS o_id
+        FROM tpcc_new_order
+        WHERE no_w_id = $1
+        GROUP BY no_d_id
+    ),
+    deleted AS (
+        DELETE FROM tpcc_new_order n
+        USING oldest o
+        WHERE n.no_w_id = $1 AND n.no_d_id = o.d_id AND n.no_o_id = o.o_id
+        RETURNING n.no_d_id AS d_id, n.no_o_id AS o_id
+    ),
+    orders AS (
+        UPDATE tpcc_orders o
+        SET o_carrier_id = $2
+        FROM deleted d
+        WHERE o.o_w_id = $1 AND o.o_d_id = d.d_id AND o.o_id = d.o_id
+        RETURNING o.o_d_id AS d_id, o.o_id, o.o_c_id AS c_id
+    ),
+    lines AS (
+        UPDATE tpcc_order_line ol
+        SET ol_delivery_d = CURRENT_TIMESTAMP
+        FROM deleted d
+        WHERE ol.ol_w_id = $1 AND ol.ol_d_id = d.d_id AND ol.ol_o_id = d.o_id
+        RETURNING ol.ol_d_id AS d_id, ol.ol_o_id AS o_id, ol.ol_amount
+    ),
+    totals AS (
+        SELECT o.d_id, o.o_id, o.c_id, COALESCE(SUM(l.ol_amount), 0) AS amount
+        FROM orders o
+        LEFT JOIN lines l ON l.d_id = o.d_id AND l.o_id = o.o_id
+        GROUP BY o.d_id, o.o_id, o.c_id
+    ),
+    customers AS (
+        UPDATE tpcc_customer c
+        SET c_balance = c.c_balance + t.amount,
+            c_delivery_cnt = c.c_delivery_cnt + 1
+        FROM totals t
+        WHERE c.c_w_id = $1 AND c.c_d_id = t.d_id AND c.c_id = t.c_id
+        RETURNING c.c_d_id
+    )
+    SELECT d_id, o_id, c_id, amount
+    FROM totals
+    ORDER BY d_id
+""")
+# 以下语句用于配送指定的单个订单
+DELIVERY_ORDER = STATEMENTS.register("tpcc.delivery.order", """
+    SELECT o_id, o_c_id
+    FROM tpcc_orders
+    WHERE o_w_id = $1 AND o_d_id = $2 AND o_id = $3 AND o_carrier_id IS NULL
+""")
+DELIVERY_UPDATE_ORDER = STATEMENTS.register("tpcc.delivery.update_order", """
+    UPDATE tpcc_orders
+    SET o_carrier_id = $1
+    WHERE o_w_id = $2 AND o_d_id = $3 AND o_id = $4
+""")
+DELIVERY_UPDATE_ORDER_LINES = STATEMENTS.register("tpcc.delivery.update_order_lines", """
+    UPDATE tpcc_order_line
+    SET ol_delivery_d = $1
+    WHERE ol_w_id = $2 AND ol_d_id = $3 AND ol_o_id = $4
+""")
+DELIVERY_DELETE_NEW_ORDER = STATEMENTS.register("tpcc.delivery.delete_new_order", """
+    DELETE FROM tpcc_new_order
+    WHERE no_w_id = $1 AND no_d_id = $2 AND no_o_id = $3
+""")
+DELIVERY_UPDATE_CUSTOMER = STATEMENTS.register("tpcc.delivery.update_customer", """
+    UPDATE tpcc_customer
+    SET c_delivery_cnt = c_delivery_cnt + 1
+    WHERE c_w_id = $1 AND c_d_id = $2 AND c_id = $3
+""")
+
+# 规范 2.8.2.2：地区最近 20 个订单（d_next_o_id - 20 <= ol_o_id < d_next_o_id）中库存低于阈值的不同商品数
+STOCK_LEVEL_COUNT = STATEMENTS.register("tpcc.stock_level.count", """
+    SELECT COUNT(DISTINCT s.s_i_id)
+    FROM tpcc_district d
+    JOIN tpcc_order_line ol
+        ON ol.ol_w_id = d.d_w_id
+        AND ol.ol_d_id = d.d_id
+        AND ol.ol_o_id >= d.d_next_o_id - 20
+        AND ol.ol_o_id < d.d_next_o_id
+    JOIN tpcc_stock s
+        ON s.s_w_id = ol.ol_w_id
+        AND s.s_i_id = ol.ol_i_id
+    WHERE d.d_w_id = $1 AND d.d_id = $2
+    AND s.s_quantity < $3
+""")
+# 以下两条语句用于明细模式（返回最近订单中每个商品的库存信息）
+STOCK_LEVEL_RECENT_ORDERS = STATEMENTS.register("tpcc.stock_level.recent_orders", """
+    SELECT o_id
+    FROM tpcc_orders
+    WHERE o_w_id = $1 AND o_d_id = $2
+    ORDER BY o_id DESC
+    LIMIT 20
+""")
+STOCK_LEVEL_ITEMS = STATEMENTS.register("tpcc.stock_level.items", """
+    SELECT
+        s.s_i_id as item_id,
+        i.i_name as item_name,
+        s.s_quantity as quantity,
+        s.s_ytd as ytd,
+        s.s_order_cnt as order_count,
+        s.s_remote_cnt as remote_count,
+        CASE WHEN s.s_quantity < $3 THEN true ELSE false END as is_low_stock
+    FROM tpcc_stock s
+    JOIN tpcc_item i ON s.s_i_id = i.i_id
+    WHERE s.s_w_id = $1
+    AND s.s_i_id IN (
+        SELECT DISTINCT ol.ol_i_id
+        FROM tpcc_order_line ol
+        WHERE ol.ol_w_id = $1
+        AND ol.ol_d_id = $2
+        AND ol.ol_o_id IN (
+            SELECT o_id
+            FROM tpcc_orders
+            WHERE o_w_id = $1
+            AND o_d_id = $2
+            ORDER BY o_id DESC
+            LIMIT 20
+        )
+    )
+    ORDER BY s.s_i_id
+""")
+
+def _check_customer_key(c_id: Optional[int], c_last: Optional[str]) -> None:
+    """付款和订单状态事务的客户按 c_id 或姓氏之一选择"""
+    if (c_id is None) == (c_last is None):
+        raise ValueError("必须且只能指定 c_id 或 c_last 之一")
+
+def _customer_key(c_id: Optional[int], c_last: Optional[str]) -> str:
+    return f"c_id={c_id}" if c_id is not None else f"c_last={c_last}"
 
 class TPCCTransaction:
-    def __init__(self, pool: asyncpg.Pool):
+    """
+    TPC-C 事务
+    isolation 为按事务类型的隔离级别（asyncpg 名称，默认取环境变量），retry 为可重试错误的重试策略；
+    last_retries 为最近一次事务的重试次数（同一实例同一时间只执行一个事务时准确）
+    """
+
+    def __init__(
+        self,
+        pool: asyncpg.Pool,
+        isolation: Optional[Dict[str, str]] = None,
+        retry: Optional[RetryPolicy] = None
+    ):
         self.pool = pool
+        self.isolation = isolation or DEFAULT_ISOLATION
+        self.retry = retry or RetryPolicy()
+        self.last_retries = 0
+
+    async def _run(self, transaction_type: str, body: Callable[[asyncpg.Connection], Awaitable], read_only: bool = False):
+        """
+        在该事务类型的隔离级别下执行 body(conn) 并返回其结果；
+        序列化失败和死锁时释放连接、退避后重新执行整个事务，重试次数用尽后抛出原始异常
+        """
+        isolation = self.isolation.get(transaction_type, "read_committed")
+        self.last_retries = 0
+        while True:
+            try:
+                async with self.pool.acquire() as conn:
+                    if read_only and isolation == "read_committed":
+                        # 只读事务在读已提交下逐条语句执行即可，省去 BEGIN/COMMIT 往返
+                        return await body(conn)
+                    async with conn.transaction(isolation=isolation, readonly=read_only):
+                        return await body(conn)
+            except asyncpg.PostgresError as e:
+                if not is_retryable(e) or self.last_retries >= self.retry.max_retries:
+                    raise
+                kind = error_type(e)
+            self.last_retries += 1
+            if log.debug_enabled:
+                log.debug("tpcc.retry", transaction_type=transaction_type, attempt=self.last_retries, errorType=kind)
+            await asyncio.sleep(self.retry.delay(self.last_retries))
 
     async def new_order(
         self,
@@ -16,370 +350,365 @@ class TPCCTransaction:
         d_id: int,
         c_id: int,
         items: List[Dict],
-        o_id: int  # 添加订单ID参数
+        o_id: Optional[int] = None
     ):
-        """新订单事务"""
+        """
+        新订单事务
+        未指定 o_id 时在事务内通过 tpcc_district.d_next_o_id 原子分配订单ID，
+        并发执行时不会产生重复的订单主键。
+        商品价格、库存更新和订单项写入均为集合操作，往返次数与订单项数量无关；
+        订单项可指定 supply_w_id（默认为本仓库），商品不存在时整个事务回滚
+        """
+        i_ids = [item['i_id'] for item in items]
+        supply_w_ids = [item.get('supply_w_id', w_id) for item in items]
+        quantities = [item['quantity'] for item in items]
+        all_local = int(all(supply == w_id for supply in supply_w_ids))
+
+        async def body(conn):
+            # 检查客户是否存在
+            customer = await STATEMENTS.fetchrow(conn, NEW_ORDER_CUSTOMER, w_id, d_id, c_id)
+
+            if not customer:
+                raise ValueError(f"客户不存在: 仓库ID={w_id}, 区域ID={d_id}, 客户ID={c_id}")
+
+            # 分配订单ID（同时锁定地区行，直到事务结束）
+            order_id = await STATEMENTS.fetchval(conn, NEW_ORDER_NEXT_ORDER_ID, w_id, d_id, o_id)
+            if order_id is None:
+                raise ValueError(f"区域不存在: 仓库ID={w_id}, 区域ID={d_id}")
+
+            # 创建订单和新订单记录
+            await STATEMENTS.execute(conn, NEW_ORDER_INSERT_ORDER, w_id, d_id, order_id, c_id, len(items), all_local)
+
+            # 获取全部商品价格
+            prices = {
+                row['i_id']: row['i_price']
+                for row in await STATEMENTS.fetch(conn, NEW_ORDER_ITEMS, i_ids)
+            }
+            missing = [i_id for i_id in i_ids if i_id not in prices]
+            if missing:
+                raise InvalidItemError(f"商品不存在: ID={missing[0]}")
+
+            # 更新库存，取回各订单项的地区信息
+            dist_info = {
+                (row['s_i_id'], row['s_w_id']): row['dist_info']
+                for row in await STATEMENTS.fetch(
+                    conn, NEW_ORDER_UPDATE_STOCK, w_id, d_id, i_ids, supply_w_ids, quantities
+                )
+            }
+            missing = [(i_id, supply) for i_id, supply in zip(i_ids, supply_w_ids) if (i_id, supply) not in dist_info]
+            if missing:
+                raise ValueError(f"库存不存在: 商品ID={missing[0][0]}, 供应仓库ID={missing[0][1]}")
+
+            # 创建订单项
+            amounts = [prices[i_id] * quantity for i_id, quantity in zip(i_ids, quantities)]
+            await STATEMENTS.execute(
+                conn, NEW_ORDER_INSERT_ORDER_LINES,
+                w_id, d_id, order_id,
+                list(range(1, len(items) + 1)),
+                i_ids,
+                supply_w_ids,
+                quantities,
+                amounts,
+                [dist_info[key] for key in zip(i_ids, supply_w_ids)]
+            )
+
+            return {
+                "order_id": order_id,
+                "customer_id": c_id,
+                "customer_name": f"{customer['c_first']} {customer['c_middle']} {customer['c_last']}",
+                "warehouse_id": w_id,
+                "district_id": d_id,
+                "items": items,
+                "all_local": bool(all_local),
+                "total_amount": sum(amounts)
+            }
+
         try:
-            async with self.pool.acquire() as conn:
-                # 检查客户是否存在
-                customer = await conn.fetchrow("""
-                    SELECT c_id, c_first, c_middle, c_last, c_balance
-                    FROM tpcc_customer
-                    WHERE c_w_id = $1 AND c_d_id = $2 AND c_id = $3
-                """, w_id, d_id, c_id)
-
-                if not customer:
-                    raise ValueError(f"客户不存在: 仓库ID={w_id}, 区域ID={d_id}, 客户ID={c_id}")
-
-                # 创建订单
-                await conn.execute("""
-                    INSERT INTO tpcc_orders (
-                        o_w_id, o_d_id, o_id, o_c_id, o_carrier_id,
-                        o_ol_cnt, o_all_local, o_entry_d
-                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, CURRENT_TIMESTAMP)
-                """, w_id, d_id, o_id, c_id, None, len(items), 1)
-
-                # 创建订单项
-                total_amount = 0
-                for i, item in enumerate(items, 1):
-                    # 获取商品价格
-                    item_info = await conn.fetchrow("""
-                        SELECT i_price
-                        FROM tpcc_item
-                        WHERE i_id = $1
-                    """, item['i_id'])
-
-                    if not item_info:
-                        raise ValueError(f"商品不存在: ID={item['i_id']}")
-
-                    # 计算订单项金额
-                    amount = item_info['i_price'] * item['quantity']
-                    total_amount += amount
-
-                    await conn.execute("""
-                        INSERT INTO tpcc_order_line (
-                            ol_w_id, ol_d_id, ol_o_id, ol_number,
-                            ol_i_id, ol_supply_w_id, ol_quantity,
-                            ol_amount, ol_dist_info
-                        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-                    """, w_id, d_id, o_id, i, item['i_id'], w_id, item['quantity'],
-                        amount, f"DIST_{d_id}")
+            return await self._run("NEW_ORDER", body)
+        except InvalidItemError:
+            # 预期的回滚，不作为错误记录
+            raise
+        except Exception as e:
+            log.error("tpcc.new_order_failed", exc=e, w_id=w_id, d_id=d_id, c_id=c_id, retries=self.last_retries)
+            raise
 
+    async def payment(
+        self,
+        w_id: int,
+        d_id: int,
+        c_id: Optional[int],
+        amount: float,
+        c_last: Optional[str] = None,
+        c_w_id: Optional[int] = None,
+        c_d_id: Optional[int] = None
+    ) -> Dict:
+        """
+        付款事务
+        客户按 c_id 或姓氏 c_last 选择，可属于其他仓库的地区 (c_w_id, c_d_id)（默认为付款的仓库和地区）
+        """
+        _check_customer_key(c_id, c_last)
+        c_w_id = c_w_id or w_id
+        c_d_id = c_d_id or d_id
+
+        async def body(conn):
+            # 1. 获取客户信息
+            if c_id is not None:
+                customer = await STATEMENTS.fetchrow(conn, PAYMENT_CUSTOMER, c_w_id, c_d_id, c_id)
+            else:
+                customer = await STATEMENTS.fetchrow(conn, PAYMENT_CUSTOMER_BY_LAST_NAME, c_w_id, c_d_id, c_last)
+            if not customer:
                 return {
-                    "order_id": o_id,
-                    "customer_id": c_id,
-                    "customer_name": f"{customer['c_first']} {customer['c_middle']} {customer['c_last']}",
-                    "warehouse_id": w_id,
-                    "district_id": d_id,
-                    "items": items,
-                    "total_amount": total_amount
+                    "success": False,
+                    "message": f"客户不存在: w_id={c_w_id}, d_id={c_d_id}, {_customer_key(c_id, c_last)}",
+                    "data": None
                 }
+            customer_id = customer['c_id']
 
-        except Exception as e:
-            print(f"新订单事务执行失败: {str(e)}")
-            print(traceback.format_exc())
-            raise
+            # 2. 更新客户余额
+            new_balance = float(customer['c_balance']) - float(amount)
+            new_ytd_payment = float(customer['c_ytd_payment']) + float(amount)
+            new_payment_cnt = customer['c_payment_cnt'] + 1
+
+            await STATEMENTS.execute(
+                conn, PAYMENT_UPDATE_CUSTOMER,
+                new_balance, new_ytd_payment, new_payment_cnt, c_w_id, c_d_id, customer_id
+            )
+
+            # 3. 更新仓库和地区余额
+            await STATEMENTS.execute(conn, PAYMENT_UPDATE_WAREHOUSE, float(amount), w_id)
+            await STATEMENTS.execute(conn, PAYMENT_UPDATE_DISTRICT, float(amount), w_id, d_id)
+
+            # 4. 记录历史
+            current_time = datetime.now()
+            history_data = f"Payment {current_time.strftime('%Y%m%d%H%M%S')}"
+            await STATEMENTS.execute(
+                conn, PAYMENT_INSERT_HISTORY,
+                customer_id, c_d_id, c_w_id, d_id, w_id, current_time, float(amount), history_data[:24]
+            )
+
+            return {
+                "success": True,
+                "data": {
+                    'customer': {
+                        'id': customer_id,
+                        'w_id': c_w_id,
+                        'd_id': c_d_id,
+                        'balance': new_balance,
+                        'ytd_payment': new_ytd_payment,
+                        'payment_cnt': new_payment_cnt
+                    },
+                    'amount': float(amount)
+                }
+            }
 
-    async def payment(self, w_id: int, d_id: int, c_id: int, amount: float) -> Dict:
-        """付款事务"""
         try:
-            async with self.pool.acquire() as conn:
-                async with conn.transaction():
-                    # 1. 获取客户信息
-                    customer = await conn.fetchrow(
-                        "SELECT c_balance, c_ytd_payment, c_payment_cnt, c_credit, c_data FROM tpcc_customer WHERE c_w_id = $1 AND c_d_id = $2 AND c_id = $3",
-                        w_id, d_id, c_id
-                    )
-                    if not customer:
-                        return {
-                            "success": False,
-                            "message": f"客户不存在: w_id={w_id}, d_id={d_id}, c_id={c_id}",
-                            "data": None
-                        }
-
-                    # 2. 更新客户余额
-                    new_balance = float(customer['c_balance']) - float(amount)
-                    new_ytd_payment = float(customer['c_ytd_payment']) + float(amount)
-                    new_payment_cnt = customer['c_payment_cnt'] + 1
-
-                    await conn.execute(
-                        """
-                        UPDATE tpcc_customer 
-                        SET c_balance = $1, c_ytd_payment = $2, c_payment_cnt = $3
-                        WHERE c_w_id = $4 AND c_d_id = $5 AND c_id = $6
-                        """,
-                        new_balance, new_ytd_payment, new_payment_cnt, w_id, d_id, c_id
-                    )
-
-                    # 3. 更新仓库和地区余额
-                    await conn.execute(
-                        "UPDATE tpcc_warehouse SET w_ytd = w_ytd + $1 WHERE w_id = $2",
-                        float(amount), w_id
-                    )
-                    await conn.execute(
-                        "UPDATE tpcc_district SET d_ytd = d_ytd + $1 WHERE d_w_id = $2 AND d_id = $3",
-                        float(amount), w_id, d_id
-                    )
-
-                    # 4. 记录历史
-                    current_time = datetime.now()
-                    history_data = f"Payment {current_time.strftime('%Y%m%d%H%M%S')}"
-                    await conn.execute(
-                        """
-                        INSERT INTO tpcc_history (h_c_id, h_c_d_id, h_c_w_id, h_d_id, h_w_id, h_date, h_amount, h_data)
-                        VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
-                        """,
-                        c_id, d_id, w_id, d_id, w_id, current_time, float(amount), history_data[:24]
-                    )
-
-                    return {
-                        "success": True,
-                        "data": {
-                            'customer': {
-                                'id': c_id,
-                                'balance': new_balance,
-                                'ytd_payment': new_ytd_payment,
-                                'payment_cnt': new_payment_cnt
-                            },
-                            'amount': float(amount)
-                        }
-                    }
+            return await self._run("PAYMENT", body)
         except Exception as e:
-            print(f"支付事务执行失败: {str(e)}")
-            print(traceback.format_exc())
+            log.error(
+                "tpcc.payment_failed", exc=e,
+                w_id=w_id, d_id=d_id, c_w_id=c_w_id, c_d_id=c_d_id, c_id=c_id, c_last=c_last, retries=self.last_retries
+            )
             return {
                 "success": False,
                 "message": f"支付事务执行失败: {str(e)}",
+                "error_type": error_type(e),
                 "data": None
             }
 
-    async def order_status(self, w_id: int, d_id: int, c_id: int) -> Dict:
-        """订单状态查询事务"""
-        try:
-            async with self.pool.acquire() as conn:
-                # 1. 获取客户信息
-                print(f"正在查询客户信息: w_id={w_id}, d_id={d_id}, c_id={c_id}")
-                customer = await conn.fetchrow(
-                    "SELECT c_balance, c_first, c_middle, c_last FROM tpcc_customer WHERE c_w_id = $1 AND c_d_id = $2 AND c_id = $3",
-                    w_id, d_id, c_id
-                )
-                if not customer:
-                    print(f"客户不存在: w_id={w_id}, d_id={d_id}, c_id={c_id}")
-                    raise ValueError(f"Customer not found: w_id={w_id}, d_id={d_id}, c_id={c_id}")
-
-                # 2. 获取最近订单（修改为获取最近10个订单）
-                print(f"正在查询最近订单: w_id={w_id}, d_id={d_id}, c_id={c_id}")
-                orders = await conn.fetch(
-                    """
-                    SELECT o_id, o_entry_d, o_carrier_id
-                    FROM tpcc_orders
-                    WHERE o_w_id = $1 AND o_d_id = $2 AND o_c_id = $3
-                    ORDER BY o_id DESC
-                    LIMIT 10
-                    """,
-                    w_id, d_id, c_id
-                )
+    async def order_status(self, w_id: int, d_id: int, c_id: Optional[int] = None, c_last: Optional[str] = None) -> Dict:
+        """订单状态查询事务（客户信息和订单/订单项各一次查询），客户按 c_id 或姓氏 c_last 选择"""
+        _check_customer_key(c_id, c_last)
 
-                if not orders:
-                    print(f"客户没有订单记录: w_id={w_id}, d_id={d_id}, c_id={c_id}")
-                    return {
-                        'customer': {
-                            'id': c_id,
-                            'name': f"{customer['c_first']} {customer['c_middle']} {customer['c_last']}",
-                            'balance': customer['c_balance']
-                        },
-                        'orders': []
-                    }
-
-                # 3. 获取所有订单的订单项
-                order_results = []
-                for order in orders:
-                    print(f"正在查询订单项: w_id={w_id}, d_id={d_id}, o_id={order['o_id']}")
-                    order_lines = await conn.fetch(
-                        """
-                        SELECT ol_number, ol_i_id, ol_supply_w_id, ol_quantity, ol_amount, ol_delivery_d
-                        FROM tpcc_order_line
-                        WHERE ol_w_id = $1 AND ol_d_id = $2 AND ol_o_id = $3
-                        ORDER BY ol_number
-                        """,
-                        w_id, d_id, order['o_id']
-                    )
-
-                    order_results.append({
-                        'order_id': order['o_id'],
-                        'entry_date': order['o_entry_d'],
-                        'carrier_id': order['o_carrier_id'],
-                        'items': [{
-                            'number': ol['ol_number'],
-                            'item_id': ol['ol_i_id'],
-                            'supply_w_id': ol['ol_supply_w_id'],
-                            'quantity': ol['ol_quantity'],
-                            'amount': ol['ol_amount'],
-                            'delivery_date': ol['ol_delivery_d']
-                        } for ol in order_lines]
-                    })
+        async def body(conn):
+            # 1. 获取客户信息
+            if c_id is not None:
+                customer = await STATEMENTS.fetchrow(conn, ORDER_STATUS_CUSTOMER, w_id, d_id, c_id)
+            else:
+                customer = await STATEMENTS.fetchrow(conn, ORDER_STATUS_CUSTOMER_BY_LAST_NAME, w_id, d_id, c_last)
+            if not customer:
+                raise ValueError(f"Customer not found: w_id={w_id}, d_id={d_id}, {_customer_key(c_id, c_last)}")
 
-                return {
-                    'customer': {
-                        'id': c_id,
-                        'name': f"{customer['c_first']} {customer['c_middle']} {customer['c_last']}",
-                        'balance': customer['c_balance']
-                    },
-                    'orders': order_results
-                }
+            # 2. 获取最近10个订单及其订单项
+            rows = await STATEMENTS.fetch(conn, ORDER_STATUS_ORDERS, w_id, d_id, customer['c_id'])
+            return customer, rows
+
+        try:
+            customer, rows = await self._run("ORDER_STATUS", body, read_only=True)
         except asyncpg.PostgresError as e:
-            print(f"数据库错误: {str(e)}")
-            print(f"错误详情: {traceback.format_exc()}")
-            raise ValueError(f"数据库错误: {str(e)}")
+            log.error("tpcc.order_status_failed", exc=e, w_id=w_id, d_id=d_id, c_id=c_id, c_last=c_last, retries=self.last_retries)
+            raise ValueError(f"数据库错误: {str(e)}") from e
         except Exception as e:
-            print(f"未知错误: {str(e)}")
-            print(f"错误详情: {traceback.format_exc()}")
-            raise ValueError(f"未知错误: {str(e)}")
-
-    async def delivery(self, w_id: int, d_id: int, o_id: int, carrier_id: int) -> Dict:
-        """配送事务"""
+            log.error("tpcc.order_status_failed", exc=e, w_id=w_id, d_id=d_id, c_id=c_id, c_last=c_last)
+            raise ValueError(f"未知错误: {str(e)}") from e
+
+        # 3. 按订单分组（结果已按订单排序，订单ID变化时开始新的订单）
+        order_results = []
+        current_id = None
+        current_items = None
+        for row in rows:
+            if row['o_id'] != current_id:
+                current_id = row['o_id']
+                current_items = []
+                order_results.append({
+                    'order_id': current_id,
+                    'entry_date': row['o_entry_d'],
+                    'carrier_id': row['o_carrier_id'],
+                    'items': current_items
+                })
+            # 没有订单项的订单在 LEFT JOIN 中只有一行，订单项列为空
+            if row['ol_number'] is not None:
+                current_items.append({
+                    'number': row['ol_number'],
+                    'item_id': row['ol_i_id'],
+                    'supply_w_id': row['ol_supply_w_id'],
+                    'quantity': row['ol_quantity'],
+                    'amount': row['ol_amount'],
+                    'delivery_date': row['ol_delivery_d']
+                })
+
+        return {
+            'customer': {
+                'id': customer['c_id'],
+                'name': f"{customer['c_first']} {customer['c_middle']} {customer['c_last']}",
+                'balance': customer['c_balance']
+            },
+            'orders': order_results
+        }
+
+    async def delivery(
+        self,
+        w_id: int,
+        carrier_id: int,
+        d_id: Optional[int] = None,
+        o_id: Optional[int] = None
+    ) -> Dict:
+        """
+        配送事务
+        默认按规范在一个事务中配送仓库全部 10 个地区各自最早的未配送订单；
+        同时指定 d_id 和 o_id 时只配送该订单
+        """
+        if o_id is not None:
+            return await self.deliver_order(w_id, d_id, o_id, carrier_id)
         try:
-            async with self.pool.acquire() as conn:
-                async with conn.transaction():
-                    # 1. 检查订单是否存在且未发货
-                    order = await conn.fetchrow(
-                        """
-                        SELECT o_id, o_c_id
-                        FROM tpcc_orders
-                        WHERE o_w_id = $1 AND o_d_id = $2 AND o_id = $3 AND o_carrier_id IS NULL
-                        """,
-                        w_id, d_id, o_id
-                    )
-
-                    if not order:
-                        return {
-                            "success": False,
-                            "message": f"订单不存在或已发货: 仓库ID={w_id}, 区域ID={d_id}, 订单ID={o_id}",
-                            "data": None
-                        }
-
-                    # 2. 更新订单配送信息
-                    await conn.execute(
-                        """
-                        UPDATE tpcc_orders
-                        SET o_carrier_id = $1
-                        WHERE o_w_id = $2 AND o_d_id = $3 AND o_id = $4
-                        """,
-                        carrier_id, w_id, d_id, o_id
-                    )
-
-                    # 3. 更新订单项配送信息
-                    await conn.execute(
-                        """
-                        UPDATE tpcc_order_line
-                        SET ol_delivery_d = $1
-                        WHERE ol_w_id = $2 AND ol_d_id = $3 AND ol_o_id = $4
-                        """,
-                        datetime.now(), w_id, d_id, o_id
-                    )
-
-                    # 4. 更新客户配送计数
-                    await conn.execute(
-                        """
-                        UPDATE tpcc_customer
-                        SET c_delivery_cnt = c_delivery_cnt + 1
-                        WHERE c_w_id = $1 AND c_d_id = $2 AND c_id = $3
-                        """,
-                        w_id, d_id, order['o_c_id']
-                    )
-
-                    return {
-                        "success": True,
-                        "data": {
-                            'warehouse_id': w_id,
-                            'district_id': d_id,
-                            'order_id': o_id,
-                            'carrier_id': carrier_id,
-                            'customer_id': order['o_c_id'],
-                            'delivery_date': datetime.now()
-                        }
-                    }
+            rows = await self._run(
+                "DELIVERY", lambda conn: STATEMENTS.fetch(conn, DELIVERY_BATCH, w_id, carrier_id)
+            )
+
+            delivered = [{
+                'district_id': row['d_id'],
+                'order_id': row['o_id'],
+                'customer_id': row['c_id'],
+                'amount': row['amount']
+            } for row in rows]
+            delivered_districts = {row['d_id'] for row in rows}
+            return {
+                "success": True,
+                "data": {
+                    'warehouse_id': w_id,
+                    'carrier_id': carrier_id,
+                    'delivered': delivered,
+                    'skipped_districts': [d for d in range(1, DISTRICTS_PER_WAREHOUSE + 1) if d not in delivered_districts],
+                    'delivery_date': datetime.now()
+                }
+            }
         except Exception as e:
-            print(f"发货事务执行失败: {str(e)}")
-            print(traceback.format_exc())
+            log.error("tpcc.delivery_failed", exc=e, w_id=w_id, retries=self.last_retries)
             return {
                 "success": False,
                 "message": f"发货事务执行失败: {str(e)}",
+                "error_type": error_type(e),
                 "data": None
             }
 
-    async def stock_level(self, w_id: int, d_id: int, threshold: int) -> Dict:
-        """库存水平查询事务"""
-        async with self.pool.acquire() as conn:
-            # 1. 获取最近订单
-            recent_orders = await conn.fetch(
-                """
-                SELECT o_id
-                FROM tpcc_orders
-                WHERE o_w_id = $1 AND o_d_id = $2
-                ORDER BY o_id DESC
-                LIMIT 20
-                """,
-                w_id, d_id
-            )
+    async def deliver_order(self, w_id: int, d_id: int, o_id: int, carrier_id: int) -> Dict:
+        """配送指定的单个订单"""
+        async def body(conn):
+            # 1. 检查订单是否存在且未发货
+            order = await STATEMENTS.fetchrow(conn, DELIVERY_ORDER, w_id, d_id, o_id)
 
-            if not recent_orders:
+            if not order:
                 return {
+                    "success": False,
+                    "message": f"订单不存在或已发货: 仓库ID={w_id}, 区域ID={d_id}, 订单ID={o_id}",
+                    "data": None
+                }
+
+            # 2. 更新订单配送信息，删除新订单记录
+            await STATEMENTS.execute(conn, DELIVERY_UPDATE_ORDER, carrier_id, w_id, d_id, o_id)
+            await STATEMENTS.execute(conn, DELIVERY_DELETE_NEW_ORDER, w_id, d_id, o_id)
+
+            # 3. 更新订单项配送信息
+            await STATEMENTS.execute(conn, DELIVERY_UPDATE_ORDER_LINES, datetime.now(), w_id, d_id, o_id)
+
+            # 4. 更新客户配送计数
+            await STATEMENTS.execute(conn, DELIVERY_UPDATE_CUSTOMER, w_id, d_id, order['o_c_id'])
+
+            return {
+                "success": True,
+                "data": {
                     'warehouse_id': w_id,
                     'district_id': d_id,
-                    'threshold': threshold,
-                    'low_stock_count': 0,
-                    'items': []
+                    'order_id': o_id,
+                    'carrier_id': carrier_id,
+                    'customer_id': order['o_c_id'],
+                    'delivery_date': datetime.now()
                 }
+            }
 
-            # 2. 获取所有商品的库存信息
-            stock_info = await conn.fetch(
-                """
-                SELECT 
-                    s.s_i_id as item_id,
-                    i.i_name as item_name,
-                    s.s_quantity as quantity,
-                    s.s_ytd as ytd,
-                    s.s_order_cnt as order_count,
-                    s.s_remote_cnt as remote_count,
-                    CASE WHEN s.s_quantity < $3 THEN true ELSE false END as is_low_stock
-                FROM tpcc_stock s
-                JOIN tpcc_item i ON s.s_i_id = i.i_id
-                WHERE s.s_w_id = $1
-                AND s.s_i_id IN (
-                    SELECT DISTINCT ol.ol_i_id
-                    FROM tpcc_order_line ol
-                    WHERE ol.ol_w_id = $1
-                    AND ol.ol_d_id = $2
-                    AND ol.ol_o_id IN (
-                        SELECT o_id 
-                        FROM tpcc_orders 
-                        WHERE o_w_id = $1 
-                        AND o_d_id = $2 
-                        ORDER BY o_id DESC 
-                        LIMIT 20
-                    )
-                )
-                ORDER BY s.s_i_id
-                """,
-                w_id, d_id, threshold
-            )
-
-            # 3. 统计低于阈值的商品数量
-            low_stock_count = sum(1 for item in stock_info if item['is_low_stock'])
+        try:
+            return await self._run("DELIVERY", body)
+        except Exception as e:
+            log.error("tpcc.delivery_failed", exc=e, w_id=w_id, d_id=d_id, o_id=o_id, retries=self.last_retries)
+            return {
+                "success": False,
+                "message": f"发货事务执行失败: {str(e)}",
+                "error_type": error_type(e),
+                "data": None
+            }
 
+    async def stock_level(self, w_id: int, d_id: int, threshold: int, detailed: bool = False) -> Dict:
+        """
+        库存水平查询事务
+        默认按规范只用一条语句统计低库存商品数；detailed=True 时返回最近订单中每个商品的库存明细
+        """
+        if not detailed:
+            low_stock_count = await self._run(
+                "STOCK_LEVEL",
+                lambda conn: STATEMENTS.fetchval(conn, STOCK_LEVEL_COUNT, w_id, d_id, threshold),
+                read_only=True
+            )
             return {
                 'warehouse_id': w_id,
                 'district_id': d_id,
                 'threshold': threshold,
-                'low_stock_count': low_stock_count,
-                'items': [{
-                    'item_id': item['item_id'],
-                    'item_name': item['item_name'],
-                    'quantity': item['quantity'],
-                    'ytd': item['ytd'],
-                    'order_count': item['order_count'],
-                    'remote_count': item['remote_count'],
-                    'is_low_stock': item['is_low_stock']
-                } for item in stock_info]
-            } 
\ No newline at end of file
+                'low_stock_count': low_stock_count
+            }
+
+        async def body(conn):
+            # 1. 获取最近订单
+            recent_orders = await STATEMENTS.fetch(conn, STOCK_LEVEL_RECENT_ORDERS, w_id, d_id)
+            if not recent_orders:
+                return []
+            # 2. 获取所有商品的库存信息
+            return await STATEMENTS.fetch(conn, STOCK_LEVEL_ITEMS, w_id, d_id, threshold)
+
+        stock_info = await self._run("STOCK_LEVEL", body, read_only=True)
+
+        # 3. 统计低于阈值的商品数量
+        low_stock_count = sum(1 for item in stock_info if item['is_low_stock'])
+
+        return {
+            'warehouse_id': w_id,
+            'district_id': d_id,
+            'threshold': threshold,
+            'low_stock_count': low_stock_count,
+            'items': [{
+                'item_id': item['item_id'],
+                'item_name': item['item_name'],
+                'quantity': item['quantity'],
+                'ytd': item['ytd'],
+                'order_count': item['order_count'],
+                'remote_count': item['remote_count'],
+                'is_low_stock': item['is_low_stock']
+            } for item in stock_info]
+        }
@@ -0,0 +1,209 @@
+"""
+TPC-H 性能测试（Power / Throughput 测试及 QphH@Size）
+按规范第 5 章的流程执行：
+  Power 测试：RF1 -> 查询流 0（permute.h 中的顺序）-> RF2，单个会话顺序执行
+  Throughput 测试：S 个查询流并发执行，同时一个刷新流顺序执行 S 对 RF1/RF2
+"""
+import math
+import random
+import asyncio
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from .queries import SCALE_FACTOR, QueryRegistry
+from .refresh import UPDATE_DIR, list_update_sets, refresh_delete, refresh_insert, unused_update_sets
+
+# 各规模因子下 Throughput 测试的最少查询流数（规范 5.3.4）
+MIN_STREAMS = {
+    1: 2, 10: 3, 30: 4, 100: 5, 300: 6,
+    1000: 7, 3000: 8, 10000: 9, 30000: 10, 100000: 11
+}
+
+def min_streams(scale_factor: float) -> int:
+    """规模因子对应的最少查询流数（非标准规模因子按 2 处理）"""
+    return MIN_STREAMS.get(scale_factor, 2)
+
+def _clamp_intervals(seconds: List[float]) -> List[float]:
+    """规范 5.4.1.4：小于最长计时 1/1000 的计时按最长计时的 1/1000 计算"""
+    floor = max(seconds) / 1000
+    return [max(s, floor) for s in seconds]
+
+def power_metric(query_seconds: List[float], refresh_seconds: List[float], scale_factor: float) -> float:
+    """Power@Size = 3600 * SF / (22 个查询与 2 个刷新函数计时的几何平均)"""
+    intervals = _clamp_intervals(query_seconds + refresh_seconds)
+    geo_mean = math.exp(sum(math.log(s) for s in intervals) / len(intervals))
+    return 3600 * scale_factor / geo_mean
+
+def throughput_metric(streams: int, elapsed_seconds: float, scale_factor: float) -> float:
+    """Throughput@Size = S * 22 * 3600 / Ts * SF"""
+    return streams * 22 * 3600 / elapsed_seconds * scale_factor
+
+class TPCHBenchmark:
+    """TPC-H Power / Throughput 测试"""
+
+    def __init__(
+        self,
+        pool,
+        registry: QueryRegistry,
+        run_query: Callable[..., Awaitable[Dict]],
+        scale_factor: float = SCALE_FACTOR,
+        seed: Optional[int] = None,
+        update_dir: Path = UPDATE_DIR
+    ):
+        self.pool = pool
+        self.registry = registry
+        self.run_query = run_query
+        self.scale_factor = scale_factor
+        self.seed = seed if seed is not None else random.randrange(2 ** 31)
+        self.update_dir = update_dir
+        self.update_sets = list_update_sets(update_dir)
+        if not self.update_sets:
+            raise ValueError(f"更新数据目录中没有可用的更新集: {update_dir}")
+        # 本次测试可使用的更新集（由 reserve_update_sets 从数据库中尚未使用的更新集中取出），
+        # 每对 RF1/RF2 依次使用下一个；同一更新集不能重复使用，否则 RF1 会违反 orders 主键
+        self._pending_updates: List[int] = []
+
+    async def reserve_update_sets(self, count: int) -> List[int]:
+        """检查剩余未使用的更新集是否足够执行 count 对刷新函数，不足时抛出 ValueError"""
+        unused = await unused_update_sets(self.pool, self.update_dir)
+        if len(unused) < count:
+            raise ValueError(
+                f"未使用的更新集不足：需要 {count} 个，剩余 {len(unused)} 个（{self.update_dir}），"
+                "请重新导入数据或用 dbgen -U 生成更多更新集"
+            )
+        self._pending_updates = unused[:count]
+        return self._pending_updates
+
+    def _take_update_set(self) -> int:
+        if not self._pending_updates:
+            raise RuntimeError("没有已预留的更新集，请先调用 reserve_update_sets")
+        return self._pending_updates.pop(0)
+
+    async def _refresh_pair(self) -> List[Dict]:
+        update_set = self._take_update_set()
+        return [
+            await self._refresh(refresh_insert, update_set),
+            await self._refresh(refresh_delete, update_set)
+        ]
+
+    async def _refresh(self, function, update_set: int) -> Dict:
+        try:
+            result = await function(self.pool, update_set, self.update_dir)
+            result["success"] = True
+        except Exception as e:
+            result = {
+                "function": "RF1" if function is refresh_insert else "RF2",
+                "updateSet": update_set,
+                "success": False,
+                "error": str(e),
+                "executionTime": 0
+            }
+        result["timestamp"] = datetime.now().isoformat()
+        return result
+
+    async def query_stream(self, stream: int) -> List[Dict]:
+        """按 permute.h 中的顺序执行一个查询流，参数按 qgen 规则由 (seed, stream) 确定"""
+        rng = random.Random(f"{self.seed}:{stream}")
+        results = []
+        for qid in self.registry.stream_order(stream):
+            params = self.registry.resolve_params(qid, None, rng)
+            result = await self.run_query(self.pool, qid, params)
+            result.pop("data", None)
+            result.pop("queryInfo", None)
+            result["stream"] = stream
+            result["parameters"] = [str(p) for p in params]
+            results.append(result)
+        return results
+
+    @staticmethod
+    def _errors(results: List[Dict]) -> List[str]:
+        return [
+            f"{r.get('queryId') or r.get('function')}"
+            + (f" (stream {r['stream']})" if "stream" in r else "")
+            + f": {r.get('error')}"
+            for r in results if not r["success"]
+        ]
+
+    async def power_test(self) -> Dict:
+        """Power 测试：RF1、查询流 0、RF2 顺序执行"""
+        loop = asyncio.get_event_loop()
+        start = loop.time()
+        update_set = self._take_update_set()
+        rf1 = await self._refresh(refresh_insert, update_set)
+        queries = await self.query_stream(0)
+        rf2 = await self._refresh(refresh_delete, update_set)
+        elapsed = loop.time() - start
+
+        errors = self._errors([rf1, *queries, rf2])
+        power = None
+        if not errors:
+            power = power_metric(
+                [r["executionTime"] / 1000 for r in queries],
+                [rf1["executionTime"] / 1000, rf2["executionTime"] / 1000],
+                self.scale_factor
+            )
+        return {
+            "valid": not errors,
+            "errors": errors,
+            "power": power,
+            "elapsed": elapsed,
+            "queries": queries,
+            "refresh": [rf1, rf2]
+        }
+
+    async def throughput_test(self, streams: Optional[int] = None) -> Dict:
+        """Throughput 测试：S 个查询流与一个刷新流并发执行，Ts 为全部结束的时长"""
+        streams = streams or min_streams(self.scale_factor)
+        loop = asyncio.get_event_loop()
+
+        async def refresh_stream() -> List[Dict]:
+            results = []
+            for _ in range(streams):
+                results.extend(await self._refresh_pair())
+            return results
+
+        start = loop.time()
+        # 查询流 1..S，流 0 保留给 Power 测试
+        *stream_results, refresh = await asyncio.gather(
+            *(self.query_stream(s) for s in range(1, streams + 1)),
+            refresh_stream()
+        )
+        elapsed = loop.time() - start
+
+        queries = [r for results in stream_results for r in results]
+        errors = self._errors(queries + refresh)
+        return {
+            "valid": not errors,
+            "errors": errors,
+            "streams": streams,
+            "throughput": throughput_metric(streams, elapsed, self.scale_factor) if not errors else None,
+            "elapsed": elapsed,
+            "queries": queries,
+            "refresh": refresh
+        }
+
+    async def run(self, mode: str = "full", streams: Optional[int] = None) -> Dict:
+        """mode 为 power / throughput / full（先 Power 后 Throughput 并计算 QphH@Size）"""
+        streams = streams or min_streams(self.scale_factor)
+        # Power 测试使用一对刷新函数，Throughput 测试的刷新流使用 S 对
+        await self.reserve_update_sets(
+            (1 if mode in ("power", "full") else 0) + (streams if mode in ("throughput", "full") else 0)
+        )
+        report = {
+            "scaleFactor": self.scale_factor,
+            "seed": self.seed,
+            "mode": mode
+        }
+        if mode in ("power", "full"):
+            report["powerTest"] = await self.power_test()
+        if mode in ("throughput", "full"):
+            report["throughputTest"] = await self.throughput_test(streams)
+        if mode == "full":
+            power = report["powerTest"]["power"]
+            throughput = report["throughputTest"]["throughput"]
+            report["qphh"] = math.sqrt(power * throughput) if power and throughput else None
+        report["valid"] = all(
+            report[key]["valid"] for key in ("powerTest", "throughputTest") if key in report
+        )
+        return report
@@ -0,0 +1,152 @@
+"""
+TPC-H 查询结果缓存
+以 查询ID + 规范化后的替换参数 为键缓存成功的查询结果，按条目数做 LRU 淘汰并设置过期时间。
+数据变更（import_data.py、truncate_tables.py、刷新函数 RF1/RF2）通过 PostgreSQL 的
+NOTIFY tpch_data_changed 通知，服务端在独立连接上 LISTEN，收到通知即清空缓存；
+监听连接不可用时缓存不提供结果，避免返回过期数据。
+"""
+import os
+import asyncio
+import asyncpg
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from db import get_db_config
+
+# 数据变更通知的频道名（脚本中直接使用同名频道）
+CACHE_CHANNEL = "tpch_data_changed"
+
+# 最大缓存条目数，0 表示关闭缓存
+RESULT_CACHE_SIZE = int(os.getenv("TPCH_RESULT_CACHE_SIZE", "128"))
+# 缓存条目的过期时间（秒）
+RESULT_CACHE_TTL = float(os.getenv("TPCH_RESULT_CACHE_TTL", "300"))
+
+def _normalize(value) -> str:
+    if isinstance(value, Decimal):
+        return str(value.normalize())
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+def cache_key(query_id: str, params: List) -> Tuple:
+    """查询ID + 规范化后的参数（如 Decimal('0.0100') 与 Decimal('0.01') 视为相同）"""
+    return (query_id, tuple(_normalize(p) for p in params))
+
+async def notify_data_changed(conn, source: str) -> None:
+    """发送数据变更通知（在事务中调用时提交后才送达）"""
+    await conn.execute("SELECT pg_notify($1, $2)", CACHE_CHANNEL, source)
+
+class ResultCache:
+    """LRU + TTL 的查询结果缓存"""
+
+    def __init__(self, max_size: int = RESULT_CACHE_SIZE, ttl: float = RESULT_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple, Tuple[float, Dict]]" = OrderedDict()
+        self._listener: Optional[asyncpg.Connection] = None
+        self._listener_lock: Optional[asyncio.Lock] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.last_invalidation: Optional[Dict] = None
+        # 每次失效递增；查询执行期间发生过失效时，其结果可能基于旧数据，不写入缓存
+        self.generation = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    @property
+    def active(self) -> bool:
+        """只有在能收到数据变更通知时才使用缓存"""
+        return self.enabled and self._listener is not None and not self._listener.is_closed()
+
+    def get(self, key: Tuple) -> Optional[Dict]:
+        if not self.active:
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires, result = entry
+        if asyncio.get_event_loop().time() >= expires:
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key: Tuple, result: Dict, generation: int) -> None:
+        if not self.active or generation != self.generation:
+            return
+        self._entries[key] = (asyncio.get_event_loop().time() + self.ttl, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, source: str) -> None:
+        """清空缓存"""
+        self._entries.clear()
+        self.generation += 1
+        self.invalidations += 1
+        self.last_invalidation = {"source": source, "time": datetime.now().isoformat()}
+
+    def _on_notify(self, conn, pid, channel, payload) -> None:
+        self.invalidate(payload or channel)
+
+    def _on_listener_closed(self, conn) -> None:
+        # 监听中断期间可能错过通知，已缓存的结果不再可信
+        self._listener = None
+        self.invalidate("listener closed")
+
+    async def start(self) -> None:
+        """建立 LISTEN 连接（幂等，连接断开后再次调用会重新建立）"""
+        if not self.enabled or self.active:
+            return
+        if self._listener_lock is None:
+            self._listener_lock = asyncio.Lock()
+        async with self._listener_lock:
+            if self.active:
+                return
+            conn = await asyncpg.connect(**get_db_config())
+            await conn.add_listener(CACHE_CHANNEL, self._on_notify)
+            conn.add_termination_listener(self._on_listener_closed)
+            self._listener = conn
+            # 建立监听之前的数据变更无法得知
+            self.invalidate("listener started")
+
+    async def ensure_active(self) -> bool:
+        """尝试建立监听，返回缓存当前是否可用（失败时不抛出异常）"""
+        if not self.active:
+            try:
+                await self.start()
+            except Exception:
+                return False
+        return self.active
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            conn, self._listener = self._listener, None
+            await conn.close()
+        self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "active": self.active,
+            "size": len(self._entries),
+            "maxSize": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": self.hits / lookups * 100 if lookups else 0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "lastInvalidation": self.last_invalidation
+        }
@@ -0,0 +1,425 @@
+"""
+TPC-H 查询注册表
+启动时一次性解析 dbgen/queries/*.sql 中的 22 个查询模板，将 qgen 的 :N 替换参数转换为
+PostgreSQL 绑定参数（$N），并按 qgen (varsub.c) 的规则根据种子生成随机替换参数。
+"""
+import os
+import re
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+# TPC-H 工具包目录（包含 dbgen/queries、dbgen/dists.dss、dbgen/answers、ref_data）
+TPCH_HOME = Path(os.getenv("TPCH_HOME", Path(__file__).resolve().parents[2] / "TPC-H V3.0.1"))
+QUERY_DIR = TPCH_HOME / "dbgen" / "queries"
+DISTS_FILE = TPCH_HOME / "dbgen" / "dists.dss"
+PERMUTE_FILE = TPCH_HOME / "dbgen" / "permute.h"
+
+# 数据规模因子，影响 Q11 的 FRACTION 参数
+SCALE_FACTOR = float(os.getenv("TPCH_SCALE_FACTOR", "1"))
+
+QUERY_IDS = [f"Q{n}" for n in range(1, 23)]
+
+# 查询元数据（供前端展示）
+QUERY_METADATA = {
+    "Q1": ("定价汇总报表查询", "按退货标志、线路状态分组的定价汇总报表", "中等", "2-5s"),
+    "Q2": ("最小代价供货商查询", "找出指定地区中供应指定零件且成本最低的供货商", "高", "1-4s"),
+    "Q3": ("运输优先级查询", "获取指定市场细分的客户在指定日期之前的订单收入", "高", "3-8s"),
+    "Q4": ("订单优先级检查查询", "统计指定季度内存在延迟交货明细的订单数量", "中等", "2-6s"),
+    "Q5": ("本地供应商销量查询", "列出指定地区在指定年份的收入", "高", "4-10s"),
+    "Q6": ("预测收入变化查询", "取消指定折扣区间的小订单后可增加的收入", "低", "1-3s"),
+    "Q7": ("销量查询", "两个国家之间的贸易量", "高", "5-12s"),
+    "Q8": ("国家市场份额查询", "指定国家在所属地区某类零件市场中的份额变化", "高", "4-10s"),
+    "Q9": ("产品类型利润估量查询", "按国家和年份统计某类零件的利润", "高", "6-15s"),
+    "Q10": ("退货客户查询", "分析退货客户的损失", "中等", "2-6s"),
+    "Q11": ("重要库存标志查询", "找出指定国家中库存价值占比较高的零件", "中等", "1-3s"),
+    "Q12": ("货运模式和订单优先级查询", "分析货运模式对按时收货的影响", "中等", "2-5s"),
+    "Q13": ("客户分布查询", "按订单数量统计客户分布", "中等", "3-8s"),
+    "Q14": ("促销效果查询", "统计指定月份促销零件带来的收入占比", "低", "1-3s"),
+    "Q15": ("头等供货商查询", "找出指定季度收入最高的供货商（使用视图）", "中等", "2-5s"),
+    "Q16": ("零件/供货商关系查询", "统计满足条件的零件可由多少供货商供应", "中等", "2-5s"),
+    "Q17": ("小订单收入查询", "小批量订单取消后平均每年的收入损失", "高", "3-10s"),
+    "Q18": ("大订单客户查询", "找出下过大批量订单的客户", "高", "5-12s"),
+    "Q19": ("折扣收入查询", "指定品牌、包装和数量范围零件的折扣收入", "中等", "2-6s"),
+    "Q20": ("潜在零件促销查询", "找出指定国家中某类零件库存过剩的供货商", "高", "3-8s"),
+    "Q21": ("不能按时交货供货商查询", "找出导致多供货商订单延迟交货的供货商", "高", "6-15s"),
+    "Q22": ("全球销售机会查询", "找出指定国家代码中可能购买的客户", "中等", "1-4s")
+}
+
+# 替换参数定义：(名称, 标签, 类型, 可选值来源的分布名)
+# 类型为 int / decimal / date / text，决定了绑定参数的 Python 类型
+PARAMETER_SPECS: Dict[str, List[Tuple[str, str, str, Optional[str]]]] = {
+    "Q1": [("delta", "日期偏移(天)", "int", None)],
+    "Q2": [("size", "零件尺寸", "int", None), ("type", "零件类型", "text", "p_type_s3"), ("region", "地区", "text", "regions")],
+    "Q3": [("segment", "市场细分", "text", "msegmnt"), ("date", "日期", "date", None)],
+    "Q4": [("date", "起始日期", "date", None)],
+    "Q5": [("region", "地区", "text", "regions"), ("date", "起始日期", "date", None)],
+    "Q6": [("date", "起始日期", "date", None), ("discount", "折扣", "decimal", None), ("quantity", "数量", "int", None)],
+    "Q7": [("nation1", "国家1", "text", "nations2"), ("nation2", "国家2", "text", "nations2")],
+    "Q8": [("nation", "国家", "text", "nations2"), ("region", "地区", "text", "regions"), ("type", "零件类型", "text", "p_types")],
+    "Q9": [("color", "颜色", "text", "colors")],
+    "Q10": [("date", "起始日期", "date", None)],
+    "Q11": [("nation", "国家", "text", "nations2"), ("fraction", "占比阈值", "decimal", None)],
+    "Q12": [("shipmode1", "货运模式1", "text", "smode"), ("shipmode2", "货运模式2", "text", "smode"), ("date", "起始日期", "date", None)],
+    "Q13": [("word1", "单词1", "text", "q13a"), ("word2", "单词2", "text", "q13b")],
+    "Q14": [("date", "起始日期", "date", None)],
+    "Q15": [("date", "起始日期", "date", None)],
+    "Q16": [("brand", "品牌", "text", None), ("type", "零件类型前缀", "text", None)]
+           + [(f"size{i}", f"尺寸{i}", "int", None) for i in range(1, 9)],
+    "Q17": [("brand", "品牌", "text", None), ("container", "包装", "text", "p_cntr")],
+    "Q18": [("quantity", "数量", "int", None)],
+    "Q19": [(f"brand{i}", f"品牌{i}", "text", None) for i in range(1, 4)]
+           + [(f"quantity{i}", f"数量{i}", "int", None) for i in range(1, 4)],
+    "Q20": [("color", "颜色", "text", "colors"), ("date", "起始日期", "date", None), ("nation", "国家", "text", "nations2")],
+    "Q21": [("nation", "国家", "text", "nations2")],
+    "Q22": [(f"code{i}", f"国家代码{i}", "text", None) for i in range(1, 8)]
+}
+
+# 验证用参数（qgen -d 的默认值，与 dbgen/answers 对应）
+QUALIFICATION_PARAMS: Dict[str, List[str]] = {
+    "Q1": ["90"],
+    "Q2": ["15", "BRASS", "EUROPE"],
+    "Q3": ["BUILDING", "1995-03-15"],
+    "Q4": ["1993-07-01"],
+    "Q5": ["ASIA", "1994-01-01"],
+    "Q6": ["1994-01-01", ".06", "24"],
+    "Q7": ["FRANCE", "GERMANY"],
+    "Q8": ["BRAZIL", "AMERICA", "ECONOMY ANODIZED STEEL"],
+    "Q9": ["green"],
+    "Q10": ["1993-10-01"],
+    "Q11": ["GERMANY", "0.0001"],
+    "Q12": ["MAIL", "SHIP", "1994-01-01"],
+    "Q13": ["special", "requests"],
+    "Q14": ["1995-09-01"],
+    "Q15": ["1996-01-01"],
+    "Q16": ["Brand#45", "MEDIUM POLISHED", "49", "14", "23", "45", "19", "3", "36", "9"],
+    "Q17": ["Brand#23", "MED BOX"],
+    "Q18": ["300"],
+    "Q19": ["Brand#12", "Brand#23", "Brand#34", "1", "10", "20"],
+    "Q20": ["forest", "1994-01-01", "CANADA"],
+    "Q21": ["SAUDI ARABIA"],
+    "Q22": ["13", "31", "23", "29", "30", "18", "17"]
+}
+
+_PARAM_RE = re.compile(r":(\d+)")
+_INTERVAL_DAY_RE = re.compile(r"interval\s+':(\d+)'\s+day\s*\(\s*\d+\s*\)", re.IGNORECASE)
+_DATE_RE = re.compile(r"date\s+':(\d+)'", re.IGNORECASE)
+_LITERAL_RE = re.compile(r"'[^']*'")
+_CREATE_VIEW_RE = re.compile(r"^\s*create\s+view", re.IGNORECASE)
+
+def load_distributions(path: Path = DISTS_FILE) -> Dict[str, List[Tuple[str, int]]]:
+    """解析 dists.dss，返回 {分布名: [(取值, 权重), ...]}"""
+    dists: Dict[str, List[Tuple[str, int]]] = {}
+    current = None
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            keyword = line.split()[0].lower()
+            if keyword == "begin":
+                current = line.split()[1].lower()
+                dists[current] = []
+            elif keyword == "end":
+                current = None
+            elif current is not None:
+                text, _, weight = line.rpartition("|")
+                if text.lower() != "count":
+                    dists[current].append((text, int(weight)))
+    return dists
+
+def load_permutations(path: Path = PERMUTE_FILE) -> List[List[int]]:
+    """解析 permute.h 中各查询流的查询执行顺序（规范附录 A）"""
+    with open(path, "r") as f:
+        text = f.read()
+    body = text[text.index("{", text.index("permutation")) + 1:text.rindex("}")]
+    return [[int(n) for n in re.findall(r"\d+", row)] for row in re.findall(r"\{([^}]*)\}", body)]
+
+def _to_bind_params(sql: str) -> Tuple[str, List[int]]:
+    """
+    将模板中的 :N 替换为 $k 绑定参数
+    返回转换后的 SQL 和 $1..$k 依次对应的模板参数编号
+    """
+    order: List[int] = []
+
+    def slot(number: str) -> str:
+        n = int(number)
+        if n not in order:
+            order.append(n)
+        return f"${order.index(n) + 1}"
+
+    # 按参数在文本中首次出现的顺序编号
+    for m in _PARAM_RE.finditer(sql):
+        slot(m.group(1))
+
+    # interval ':1' day (3)：PostgreSQL 不支持 DAY 字段精度，改为整数乘以 1 天
+    sql = _INTERVAL_DAY_RE.sub(lambda m: f"({slot(m.group(1))}::integer * interval '1 day')", sql)
+    sql = _DATE_RE.sub(lambda m: f"{slot(m.group(1))}::date", sql)
+
+    def literal(m):
+        text = m.group(0)[1:-1]
+        if not _PARAM_RE.search(text):
+            return m.group(0)
+        if _PARAM_RE.fullmatch(text):
+            return slot(text[1:])
+        # LIKE 模式等包含参数的字符串，拆分为字符串拼接
+        parts = []
+        pos = 0
+        for pm in _PARAM_RE.finditer(text):
+            if pm.start() > pos:
+                parts.append(f"'{text[pos:pm.start()]}'")
+            parts.append(f"{slot(pm.group(1))}::text")
+            pos = pm.end()
+        if pos < len(text):
+            parts.append(f"'{text[pos:]}'")
+        return "(" + " || ".join(parts) + ")"
+
+    sql = _LITERAL_RE.sub(literal, sql)
+    sql = _PARAM_RE.sub(lambda m: slot(m.group(1)), sql)
+    return sql, order
+
+class Statement:
+    """模板中的一条 SQL 语句"""
+
+    def __init__(self, sql: str, bind: bool = True):
+        # DDL（如 Q15 的 create view）不支持绑定参数，执行时直接替换为字面量
+        self.bind = bind
+        if bind:
+            self.sql, self.param_order = _to_bind_params(sql)
+        else:
+            self.sql, self.param_order = sql, []
+
+    def render(self, params: List) -> Tuple[str, List]:
+        """返回可执行的 SQL 和绑定参数"""
+        if self.bind:
+            return self.sql, [params[n - 1] for n in self.param_order]
+        sql = _PARAM_RE.sub(lambda m: str(params[int(m.group(1)) - 1]).replace("'", "''"), self.sql)
+        return sql, []
+
+class TPCHQuery:
+    """解析后的查询：准备语句、主查询、清理语句"""
+
+    def __init__(self, query_id: str, setup: List[Statement], main: Statement, teardown: List[Statement]):
+        self.query_id = query_id
+        self.setup = setup
+        self.main = main
+        self.teardown = teardown
+
+    @property
+    def multi_statement(self) -> bool:
+        return bool(self.setup or self.teardown)
+
+def parse_template(query_id: str, text: str, stream: int = 0) -> TPCHQuery:
+    """将 qgen 模板解析为 TPCHQuery"""
+    row_count = -1
+    before_output: List[str] = []
+    after_output: List[str] = []
+    current = before_output
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("--"):
+            continue
+        if stripped.startswith(":x") or stripped.startswith(":b") or stripped.startswith(":e"):
+            continue
+        if stripped.startswith(":o"):
+            current = after_output
+            continue
+        if stripped.startswith(":n"):
+            row_count = int(stripped[2:].strip())
+            continue
+        current.append(line)
+
+    def split(lines: List[str]) -> List[str]:
+        # :s 为查询流编号（Q15 视图名后缀）
+        joined = re.sub(r":s\b", str(stream), "\n".join(lines))
+        return [s.strip() for s in joined.split(";") if s.strip()]
+
+    setup_sql = split(before_output)
+    output_sql = split(after_output)
+    main_sql = output_sql[0]
+    if row_count > 0:
+        main_sql += f"\nlimit {row_count}"
+
+    # Q15 的视图改为会话级临时视图并在事务中执行，多个连接同时执行时视图名不会冲突
+    setup = [Statement(_CREATE_VIEW_RE.sub("create temporary view", s), bind=False) for s in setup_sql]
+    teardown = [Statement(s, bind=False) for s in output_sql[1:]]
+    return TPCHQuery(query_id, setup, Statement(main_sql), teardown)
+
+def _month_start(offset: int) -> date:
+    """1993-01-01 之后第 offset 个月的第一天"""
+    return date(1993 + offset // 12, offset % 12 + 1, 1)
+
+class QueryRegistry:
+    """TPC-H 查询注册表"""
+
+    def __init__(
+        self,
+        query_dir: Path = QUERY_DIR,
+        dists_file: Path = DISTS_FILE,
+        permute_file: Path = PERMUTE_FILE,
+        scale_factor: float = SCALE_FACTOR
+    ):
+        self.scale_factor = scale_factor
+        self.permutations = load_permutations(permute_file)
+        self.queries: Dict[str, TPCHQuery] = {}
+        for query_id in QUERY_IDS:
+            with open(query_dir / f"{query_id[1:]}.sql", "r") as f:
+                self.queries[query_id] = parse_template(query_id, f.read())
+
+        dists = load_distributions(dists_file)
+        self.dists = dists
+        self.regions = [text for text, _ in dists["regions"]]
+        # nations 分布的权重是相对上一个国家的地区编号增量
+        self.nation_region: Dict[str, str] = {}
+        region_index = 0
+        for text, weight in dists["nations"]:
+            region_index += weight
+            self.nation_region[text] = self.regions[region_index]
+        self.options = {
+            "regions": self.regions,
+            "nations2": [text for text, _ in dists["nations2"]],
+            "msegmnt": [text for text, _ in dists["msegmnt"]],
+            "p_types": [text for text, _ in dists["p_types"]],
+            "p_type_s3": sorted({text.split()[-1] for text, _ in dists["p_types"]}),
+            "p_cntr": [text for text, _ in dists["p_cntr"]],
+            "colors": [text for text, _ in dists["colors"]],
+            "smode": [text for text, _ in dists["smode"]],
+            "q13a": [text for text, _ in dists["q13a"]],
+            "q13b": [text for text, _ in dists["q13b"]]
+        }
+
+    def get(self, query_id: str) -> TPCHQuery:
+        return self.queries[query_id]
+
+    def __contains__(self, query_id: str) -> bool:
+        return query_id in self.queries
+
+    def stream_order(self, stream: int) -> List[str]:
+        """查询流 stream 的查询执行顺序（0 为 Power 测试使用的顺序）"""
+        return [f"Q{n}" for n in self.permutations[stream % len(self.permutations)]]
+
+    def _pick(self, rng: random.Random, dist: str) -> str:
+        values, weights = zip(*self.dists[dist])
+        return rng.choices(values, weights=weights)[0]
+
+    def _brand(self, rng: random.Random) -> str:
+        return f"Brand#{rng.randint(1, 5)}{rng.randint(1, 5)}"
+
+    def generate_params(self, query_id: str, rng: random.Random) -> List:
+        """按 qgen (varsub.c) 的规则生成一组随机替换参数"""
+        n = int(query_id[1:])
+        if n == 1:
+            values = [rng.randint(60, 120)]
+        elif n == 2:
+            values = [rng.randint(1, 50), self._pick(rng, "p_types").split()[-1], self._pick(rng, "regions")]
+        elif n == 3:
+            values = [self._pick(rng, "msegmnt"), date(1995, 3, 1) + timedelta(days=rng.randint(0, 30))]
+        elif n == 4:
+            values = [_month_start(rng.randint(0, 57))]
+        elif n == 5:
+            values = [self._pick(rng, "regions"), date(rng.randint(1993, 1997), 1, 1)]
+        elif n == 6:
+            values = [date(rng.randint(1993, 1997), 1, 1), Decimal(rng.randint(2, 9)) / 100, rng.randint(24, 25)]
+        elif n == 7:
+            nation1 = self._pick(rng, "nations2")
+            nation2 = nation1
+            while nation2 == nation1:
+                nation2 = self._pick(rng, "nations2")
+            values = [nation1, nation2]
+        elif n == 8:
+            nation = self._pick(rng, "nations2")
+            values = [nation, self.nation_region[nation], self._pick(rng, "p_types")]
+        elif n == 9:
+            values = [self._pick(rng, "colors")]
+        elif n == 10:
+            values = [_month_start(rng.randint(1, 24))]
+        elif n == 11:
+            values = [self._pick(rng, "nations2"), Decimal("0.0001") / Decimal(str(self.scale_factor))]
+        elif n == 12:
+            mode1 = self._pick(rng, "smode")
+            mode2 = mode1
+            while mode2 == mode1:
+                mode2 = self._pick(rng, "smode")
+            values = [mode1, mode2, date(rng.randint(1993, 1997), 1, 1)]
+        elif n == 13:
+            values = [self._pick(rng, "q13a"), self._pick(rng, "q13b")]
+        elif n == 14:
+            values = [_month_start(rng.randint(0, 59))]
+        elif n == 15:
+            values = [_month_start(rng.randint(0, 57))]
+        elif n == 16:
+            sizes = rng.sample(range(1, 51), 8)
+            values = [self._brand(rng), " ".join(self._pick(rng, "p_types").split()[:2])] + sizes
+        elif n == 17:
+            values = [self._brand(rng), self._pick(rng, "p_cntr")]
+        elif n == 18:
+            values = [rng.randint(312, 315)]
+        elif n == 19:
+            values = [self._brand(rng), self._brand(rng), self._brand(rng),
+                      rng.randint(1, 10), rng.randint(10, 20), rng.randint(20, 30)]
+        elif n == 20:
+            values = [self._pick(rng, "colors"), date(rng.randint(1993, 1997), 1, 1), self._pick(rng, "nations2")]
+        elif n == 21:
+            values = [self._pick(rng, "nations2")]
+        else:
+            values = [str(10 + code) for code in rng.sample(range(25), 7)]
+        return values
+
+    def qualification_params(self, query_id: str) -> List:
+        """验证用参数（与 dbgen/answers 中的结果对应）"""
+        return self.coerce_params(query_id, QUALIFICATION_PARAMS[query_id])
+
+    def coerce_params(self, query_id: str, values: List) -> List:
+        """按参数类型转换取值（例如 HTTP 请求中的字符串日期）"""
+        coerced = []
+        for (name, _, kind, _), value in zip(PARAMETER_SPECS[query_id], values):
+            if kind == "int":
+                coerced.append(int(value))
+            elif kind == "decimal":
+                coerced.append(Decimal(str(value)))
+            elif kind == "date":
+                coerced.append(value if isinstance(value, date) else date.fromisoformat(str(value)))
+            else:
+                coerced.append(str(value))
+        return coerced
+
+    def resolve_params(
+        self,
+        query_id: str,
+        params: Optional[Union[List, Dict]] = None,
+        rng: Optional[random.Random] = None
+    ) -> List:
+        """
+        确定一次执行使用的参数
+        基础取值为随机参数（提供 rng 时）或验证参数；params 可以是按位置的列表或按名称的字典，覆盖对应位置
+        """
+        values = self.generate_params(query_id, rng) if rng is not None else list(QUALIFICATION_PARAMS[query_id])
+        specs = PARAMETER_SPECS[query_id]
+        if isinstance(params, dict):
+            for i, spec in enumerate(specs):
+                if spec[0] in params:
+                    values[i] = params[spec[0]]
+        elif params:
+            values[:len(params)] = params[:len(specs)]
+        return self.coerce_params(query_id, values)
+
+    def describe_parameters(self, query_id: str) -> List[Dict]:
+        """前端使用的参数描述"""
+        described = []
+        for (name, label, kind, source), default in zip(PARAMETER_SPECS[query_id], QUALIFICATION_PARAMS[query_id]):
+            param = {"name": name, "label": label, "default": default}
+            if source is not None:
+                param["type"] = "select"
+                param["options"] = self.options[source]
+            else:
+                param["type"] = "input"
+            described.append(param)
+        return described
+
+    def sql_text(self, query_id: str) -> str:
+        """完整的查询文本（含准备和清理语句）"""
+        query = self.queries[query_id]
+        statements = query.setup + [query.main] + query.teardown
+        return ";\n\n".join(s.sql for s in statements) + ";"
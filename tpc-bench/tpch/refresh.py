@@ -0,0 +1,131 @@
+"""
+TPC-H 刷新函数
+RF1 从 orders.tbl.uN / lineitem.tbl.uN 插入新订单，RF2 按 delete.N 中的订单号删除旧订单。
+默认使用 ref_data/<SF> 下已有的更新数据文件。
+"""
+import os
+import re
+import asyncio
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .cache import notify_data_changed
+from .queries import TPCH_HOME, SCALE_FACTOR
+from .tbl import iter_blocks, stream_tbl
+
+UPDATE_DIR = Path(os.getenv("TPCH_UPDATE_DIR", TPCH_HOME / "ref_data" / f"{SCALE_FACTOR:g}"))
+
+_UPDATE_SET_RE = re.compile(r"^orders\.tbl\.u(\d+)(?:\.\d+)?$")
+
+def list_update_sets(update_dir: Path = UPDATE_DIR) -> List[int]:
+    """更新数据目录中可用的更新集编号"""
+    sets = set()
+    for path in update_dir.iterdir():
+        match = _UPDATE_SET_RE.match(path.name)
+        if match:
+            sets.add(int(match.group(1)))
+    return sorted(sets)
+
+def _piece_number(path: Path) -> int:
+    suffix = path.name.rsplit(".", 1)[-1]
+    return int(suffix) if suffix.isdigit() else 0
+
+def update_files(update_dir: Path, names: List[str]) -> List[Path]:
+    """
+    匹配更新文件：dbgen 直接生成的 <name>（如 orders.tbl.u1、delete.1）
+    以及按 -i/-d 拆分后的 <name>.<k>（如 orders.tbl.u1.1）
+    """
+    files = []
+    for name in names:
+        single = update_dir / name
+        if single.exists():
+            files.append(single)
+        files.extend(sorted(update_dir.glob(f"{name}.*"), key=_piece_number))
+    return files
+
+def _first_key(files: List[Path]) -> Optional[int]:
+    """更新文件中第一行的订单号"""
+    for path in files:
+        with open(path, "rb") as f:
+            line = f.readline()
+        if line.strip():
+            return int(line.split(b"|", 1)[0])
+    return None
+
+async def unused_update_sets(pool, update_dir: Path = UPDATE_DIR) -> List[int]:
+    """
+    尚未使用的更新集：RF1 要插入的订单不在 orders 中，且 RF2 要删除的订单仍在 orders 中。
+    使用状态由数据库中的数据决定，服务重启或多次测试之间不会重复使用更新集，重新导入数据后全部恢复可用
+    """
+    keys = {}
+    for update_set in list_update_sets(update_dir):
+        keys[update_set] = (
+            _first_key(update_files(update_dir, [f"orders.tbl.u{update_set}"])),
+            _first_key(update_files(update_dir, [f"delete.{update_set}", f"delete.u{update_set}"]))
+        )
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(
+            "SELECT o_orderkey FROM tpc.orders WHERE o_orderkey = ANY($1::integer[])",
+            [key for pair in keys.values() for key in pair if key is not None]
+        )
+    existing = {row["o_orderkey"] for row in rows}
+    return [
+        update_set for update_set, (insert_key, delete_key) in keys.items()
+        if insert_key is not None and delete_key is not None
+        and insert_key not in existing and delete_key in existing
+    ]
+
+async def refresh_insert(pool, update_set: int, update_dir: Path = UPDATE_DIR) -> Dict:
+    """RF1：插入新的订单和订单明细"""
+    orders = update_files(update_dir, [f"orders.tbl.u{update_set}"])
+    lineitems = update_files(update_dir, [f"lineitem.tbl.u{update_set}"])
+    if not orders:
+        raise ValueError(f"未找到更新集 {update_set} 的订单数据: {update_dir}")
+
+    async with pool.acquire() as conn:
+        start = asyncio.get_event_loop().time()
+        async with conn.transaction():
+            order_status = await conn.copy_to_table(
+                "orders", schema_name="tpc", source=stream_tbl([(f, 0, None) for f in orders]),
+                format="csv", delimiter="|"
+            )
+            lineitem_status = await conn.copy_to_table(
+                "lineitem", schema_name="tpc", source=stream_tbl([(f, 0, None) for f in lineitems]),
+                format="csv", delimiter="|"
+            )
+            await notify_data_changed(conn, "RF1")
+        elapsed = asyncio.get_event_loop().time() - start
+
+    return {
+        "function": "RF1",
+        "updateSet": update_set,
+        "orders": int(order_status.split()[-1]),
+        "lineitems": int(lineitem_status.split()[-1]),
+        "executionTime": elapsed * 1000
+    }
+
+async def refresh_delete(pool, update_set: int, update_dir: Path = UPDATE_DIR) -> Dict:
+    """RF2：删除旧订单及其订单明细"""
+    keys = [
+        int(line.split(b"|", 1)[0])
+        for path in update_files(update_dir, [f"delete.{update_set}", f"delete.u{update_set}"])
+        for block in iter_blocks(path)
+        for line in block.splitlines() if line
+    ]
+    if not keys:
+        raise ValueError(f"未找到更新集 {update_set} 的删除数据: {update_dir}")
+
+    async with pool.acquire() as conn:
+        start = asyncio.get_event_loop().time()
+        async with conn.transaction():
+            await conn.execute("DELETE FROM tpc.lineitem WHERE l_orderkey = ANY($1::integer[])", keys)
+            await conn.execute("DELETE FROM tpc.orders WHERE o_orderkey = ANY($1::integer[])", keys)
+            await notify_data_changed(conn, "RF2")
+        elapsed = asyncio.get_event_loop().time() - start
+
+    return {
+        "function": "RF2",
+        "updateSet": update_set,
+        "orders": len(keys),
+        "executionTime": elapsed * 1000
+    }
@@ -0,0 +1,98 @@
+"""
+dbgen .tbl 文件读取
+dbgen 在每行末尾多写一个分隔符（"...|last|\n"），COPY 会把它当作多出的一列。
+这里通过内存映射按块读取文件，每块对齐到行尾并去掉行末的分隔符，再经由有界队列
+以异步生成器的形式提供给 copy_to_table，内存占用只与块大小和队列长度有关，与文件大小无关。
+"""
+import os
+import mmap
+import asyncio
+import threading
+from pathlib import Path
+from typing import AsyncIterator, Iterator, List, Optional, Tuple, Union
+
+# 单块大小与预读的块数
+BLOCK_SIZE = 4 << 20
+QUEUE_SIZE = 4
+
+FileRange = Tuple[Path, int, Optional[int]]
+
+def _fix_row_endings(block: bytes) -> bytes:
+    # 字段中不会出现换行符，"|\n" 只可能是行末多出的分隔符
+    block = block.replace(b"|\n", b"\n")
+    if block.endswith(b"|"):
+        block = block[:-1] + b"\n"
+    return block
+
+def iter_blocks(path: Union[str, Path], start: int = 0, end: Optional[int] = None, block_size: int = BLOCK_SIZE) -> Iterator[bytes]:
+    """
+    同步读取文件 [start, end) 范围，产出去掉行末分隔符的数据块
+    start 应位于行首；每块在最后一个换行符处截断，剩余部分并入下一块
+    """
+    size = os.path.getsize(path)
+    end = size if end is None else min(end, size)
+    if end <= start:
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if hasattr(mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        pos = start
+        while pos < end:
+            limit = min(pos + block_size, end)
+            if limit < end:
+                newline = mm.rfind(b"\n", pos, limit)
+                # 单行超过块大小时读到下一个换行符为止
+                if newline < 0:
+                    newline = mm.find(b"\n", limit, end)
+                limit = end if newline < 0 else newline + 1
+            yield _fix_row_endings(mm[pos:limit])
+            pos = limit
+
+async def stream_tbl(
+    ranges: List[FileRange],
+    block_size: int = BLOCK_SIZE,
+    queue_size: int = QUEUE_SIZE
+) -> AsyncIterator[bytes]:
+    """
+    以异步生成器形式依次产出多个文件（范围）的数据块，可直接作为 copy_to_table 的 source
+    读取在线程池中进行，与 COPY 发送重叠；队列满时读取暂停
+    """
+    loop = asyncio.get_event_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    done = object()
+
+    def produce():
+        def put(item):
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+        try:
+            for path, start, end in ranges:
+                for block in iter_blocks(path, start, end, block_size):
+                    if stop.is_set():
+                        return
+                    put(block)
+            put(done)
+        except Exception as e:
+            put(e)
+
+    reader = loop.run_in_executor(None, produce)
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # 提前结束（如 COPY 失败）时通知读取线程停止，并取走队列中的数据使其不再阻塞
+        stop.set()
+        while not reader.done():
+            while not queue.empty():
+                queue.get_nowait()
+            await asyncio.wait({reader}, timeout=0.01)
+
+def stream_file(path: Union[str, Path], start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+    """读取单个文件（或其中一段）"""
+    return stream_tbl([(Path(path), start, end)])
@@ -0,0 +1,149 @@
+"""
+TPC-H 答案集验证
+将验证参数下的查询结果与 dbgen/answers/qN.out 比较，各列的比较方式取自
+check_answers/colprecision.txt（规范 2.1.3.5）：
+  str        字符串完全一致（忽略尾部空格）
+  int / cnt  整数完全一致
+  num        保留两位小数后完全一致
+  sum        保留两位小数后相差不超过 100
+  avg / rat  保留两位小数后相对误差不超过 1%
+验证只在计时区间之外执行，不影响测得的响应时间。
+"""
+from datetime import date
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from .queries import TPCH_HOME
+
+ANSWERS_DIR = TPCH_HOME / "dbgen" / "answers"
+COL_PRECISION_FILE = TPCH_HOME / "dbgen" / "check_answers" / "colprecision.txt"
+
+# 每个查询最多返回的不一致明细条数
+MAX_REPORTED_MISMATCHES = 20
+
+_CENT = Decimal("0.01")
+
+def load_col_precision(path: Path = COL_PRECISION_FILE) -> Dict[str, List[str]]:
+    """读取各查询的列比较类型（第 N 行对应 QN）"""
+    with open(path) as f:
+        return {f"Q{n}": line.split() for n, line in enumerate(f, start=1) if line.strip()}
+
+def load_answer(query_id: str, answers_dir: Path = ANSWERS_DIR) -> List[List[str]]:
+    """读取答案文件（跳过表头行）"""
+    with open(answers_dir / f"q{query_id[1:]}.out") as f:
+        lines = [line.rstrip("\r\n") for line in f]
+    return [line.split("|") for line in lines[1:] if line]
+
+def _text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+def _cents(value: str) -> Decimal:
+    return Decimal(value.strip()).quantize(_CENT, rounding=ROUND_HALF_UP)
+
+def _within_percent(actual: Decimal, expected: Decimal, percent: Decimal) -> bool:
+    if expected == 0:
+        return actual == 0
+    return abs(actual - expected) / abs(expected) * 100 <= percent
+
+def compare_value(kind: str, actual: str, expected: str) -> bool:
+    """按列类型比较单个取值"""
+    if kind == "str":
+        return actual.rstrip() == expected.rstrip()
+    try:
+        if kind in ("int", "cnt"):
+            return Decimal(actual.strip()) == Decimal(expected.strip())
+        a, e = _cents(actual), _cents(expected)
+    except (InvalidOperation, ValueError):
+        return False
+    if kind == "num":
+        return a == e
+    if kind == "sum":
+        return abs(a - e) <= 100
+    if kind in ("avg", "rat"):
+        return _within_percent(a, e, Decimal(1))
+    raise ValueError(f"未知的列类型: {kind}")
+
+class AnswerValidator:
+    """答案集验证器，答案文件和列类型在首次使用时加载并缓存"""
+
+    def __init__(self, answers_dir: Path = ANSWERS_DIR, precision_file: Path = COL_PRECISION_FILE):
+        self.answers_dir = answers_dir
+        self.precision_file = precision_file
+        self._precision: Optional[Dict[str, List[str]]] = None
+        self._answers: Dict[str, List[List[str]]] = {}
+
+    def _column_kinds(self, query_id: str) -> List[str]:
+        if self._precision is None:
+            self._precision = load_col_precision(self.precision_file)
+        return self._precision[query_id]
+
+    def _expected(self, query_id: str) -> List[List[str]]:
+        if query_id not in self._answers:
+            self._answers[query_id] = load_answer(query_id, self.answers_dir)
+        return self._answers[query_id]
+
+    def compare(self, query_id: str, rows: List[Dict]) -> Dict:
+        """将查询结果行（run_query 返回的 data）与答案逐行逐列比较"""
+        expected = self._expected(query_id)
+        kinds = self._column_kinds(query_id)
+        mismatches = []
+        mismatch_count = 0
+
+        for i, (row, answer) in enumerate(zip(rows, expected), start=1):
+            values = [_text(v) for v in row.values()]
+            if len(values) != len(answer):
+                mismatch_count += 1
+                if len(mismatches) < MAX_REPORTED_MISMATCHES:
+                    mismatches.append({"row": i, "error": f"列数不一致: {len(values)} != {len(answer)}"})
+                continue
+            for col, (actual, exp) in enumerate(zip(values, answer)):
+                kind = kinds[col] if col < len(kinds) else "str"
+                if not compare_value(kind, actual, exp):
+                    mismatch_count += 1
+                    if len(mismatches) < MAX_REPORTED_MISMATCHES:
+                        mismatches.append({
+                            "row": i,
+                            "column": col + 1,
+                            "type": kind,
+                            "actual": actual,
+                            "expected": exp.strip()
+                        })
+
+        return {
+            "queryId": query_id,
+            "valid": mismatch_count == 0 and len(rows) == len(expected),
+            "rowCount": len(rows),
+            "expectedRowCount": len(expected),
+            "mismatchCount": mismatch_count,
+            "mismatches": mismatches
+        }
+
+    async def validate(
+        self,
+        pool,
+        run_query: Callable[..., Awaitable[Dict]],
+        query_ids: List[str]
+    ) -> Dict:
+        """
+        以验证参数依次执行查询并比较结果
+        应在计时区间结束后调用（或在独立的 worker 中执行），查询本身的执行时间不计入任何统计
+        """
+        results = []
+        for qid in query_ids:
+            result = await run_query(pool, qid)
+            if not result["success"]:
+                results.append({"queryId": qid, "valid": False, "error": result.get("error")})
+                continue
+            try:
+                results.append(self.compare(qid, result["data"]))
+            except Exception as e:
+                results.append({"queryId": qid, "valid": False, "error": str(e)})
+        return {
+            "valid": all(r["valid"] for r in results),
+            "results": results
+        }